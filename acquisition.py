@@ -0,0 +1,163 @@
+import logging
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.neighbors import NearestNeighbors
+
+
+def fit_bootstrap_ensemble(model, X_scaled: np.ndarray, y: np.ndarray, n_members: int = 5, seed: int = 42) -> list:
+    """
+    기준 모델(model)을 부트스트랩 표본으로 n_members번 다시 학습하여 앙상블을 만듭니다.
+    앙상블 예측의 분산을 모델 불확실성으로 사용합니다.
+    구성원은 체크포인트 없이 서로 다른 시드로 처음부터 학습합니다. (기준 모델의 가중치에서 이어서 학습하면 구성원이 거의 같아져 분산이 사라집니다)
+    """
+    rng = np.random.default_rng(seed)
+    y = np.asarray(y)
+    members = []
+    for i in range(n_members):
+        indices = rng.integers(0, len(X_scaled), len(X_scaled))
+        member = clone(model)
+        params = {'random_state': seed + i}
+        if 'checkpoint' in member.get_params():
+            params['checkpoint'] = None
+        member.set_params(**params)
+        member.fit(X_scaled[indices], y[indices])
+        members.append(member)
+    return members
+
+
+def ensemble_uncertainty(members: list, candidates_scaled: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+    """
+    앙상블 구성원 예측값의 표준편차를 후보별로 계산합니다.
+    후보를 batch_size개씩 나눠 예측하므로 후보 수가 많아도 메모리 사용량이 일정합니다.
+    """
+    uncertainty = np.empty(len(candidates_scaled))
+    for start in range(0, len(candidates_scaled), batch_size):
+        chunk = candidates_scaled[start:start + batch_size]
+        predictions = np.stack([member.predict(chunk) for member in members])
+        std = predictions.std(axis=0)
+        # 다중 출력 모델은 출력별 표준편차의 평균을 사용
+        uncertainty[start:start + len(chunk)] = std.mean(axis=1) if std.ndim == 2 else std
+    return uncertainty
+
+
+def prescreen_candidates(members: list, scaler, candidates: np.ndarray, keep: int, batch_size: int = 65536) -> np.ndarray:
+    """
+    대량의 후보(예: 10^7개)를 앙상블 불확실성만으로 먼저 걸러 상위 keep개의 인덱스를 반환합니다.
+    이후의 KD-tree 희소도 계산과 k-center 선택은 걸러진 후보에 대해서만 수행합니다.
+    """
+    uncertainty = np.empty(len(candidates))
+    for start in range(0, len(candidates), batch_size):
+        chunk = candidates[start:start + batch_size]
+        uncertainty[start:start + len(chunk)] = ensemble_uncertainty(members, _transform(scaler, chunk), batch_size)
+    if keep >= len(candidates):
+        return np.arange(len(candidates))
+    return np.argpartition(uncertainty, -keep)[-keep:]
+
+
+def local_sparsity(candidates_scaled: np.ndarray, data_scaled: np.ndarray, k: int = 5) -> np.ndarray:
+    """기존 샘플 중 가장 가까운 k개까지의 평균 거리. 클수록 주변에 데이터가 적습니다. (KD-tree)"""
+    k = min(k, len(data_scaled))
+    distances, _ = NearestNeighbors(n_neighbors=k).fit(data_scaled).kneighbors(candidates_scaled)
+    return distances.mean(axis=1)
+
+
+def error_proximity(candidates_scaled: np.ndarray, high_error_scaled: np.ndarray, length_scale: float = 0.5) -> np.ndarray:
+    """가장 가까운 고오차 샘플까지의 거리를 RBF 커널로 변환한 값(0~1). 고오차 영역에 가까울수록 1에 가깝습니다."""
+    if len(high_error_scaled) == 0:
+        return np.zeros(len(candidates_scaled))
+    distances, _ = NearestNeighbors(n_neighbors=1).fit(high_error_scaled).kneighbors(candidates_scaled)
+    return np.exp(-(distances[:, 0] ** 2) / (2 * length_scale ** 2))
+
+
+def _unit_scale(values: np.ndarray) -> np.ndarray:
+    span = values.max() - values.min()
+    if span == 0:
+        return np.zeros_like(values, dtype=np.float64)
+    return (values - values.min()) / span
+
+
+def acquisition_scores(uncertainty: np.ndarray, sparsity: np.ndarray, proximity: np.ndarray, weights: tuple[float, float, float] = (0.5, 0.3, 0.2)) -> np.ndarray:
+    """불확실성, 희소도, 고오차 근접도를 각각 [0, 1]로 맞춘 뒤 가중합한 점수를 반환합니다."""
+    w_uncertainty, w_sparsity, w_error = weights
+    return (
+        w_uncertainty * _unit_scale(uncertainty)
+        + w_sparsity * _unit_scale(sparsity)
+        + w_error * _unit_scale(proximity)
+    )
+
+
+def select_diverse_batch(candidates_scaled: np.ndarray, scores: np.ndarray, batch_size: int, diversity: float = 0.5) -> np.ndarray:
+    """
+    점수와 다양성을 함께 고려한 greedy k-center 선택.
+    매 단계마다 (1 - diversity) * 점수 + diversity * (이미 선택된 점까지의 최소 거리 / 최대값)이 가장 큰 후보를 고르고,
+    최소 거리 배열만 벡터 연산으로 갱신하므로 비용은 O(batch_size * M * D)입니다.
+    선택된 후보의 인덱스를 선택 순서대로 반환합니다.
+    """
+    n_candidates = len(candidates_scaled)
+    batch_size = min(batch_size, n_candidates)
+    if batch_size == 0:
+        return np.empty(0, dtype=np.int64)
+
+    selected = np.empty(batch_size, dtype=np.int64)
+    min_distance = np.full(n_candidates, np.inf)
+    available = np.ones(n_candidates, dtype=bool)
+
+    selected[0] = int(np.argmax(scores))
+    for step in range(batch_size):
+        if step > 0:
+            finite = min_distance[available]
+            max_distance = finite.max() if len(finite) else 0
+            coverage = min_distance / max_distance if max_distance > 0 else np.zeros(n_candidates)
+            priority = (1 - diversity) * scores + diversity * coverage
+            priority[~available] = -np.inf
+            selected[step] = int(np.argmax(priority))
+        chosen = selected[step]
+        available[chosen] = False
+        distance = np.linalg.norm(candidates_scaled - candidates_scaled[chosen], axis=1)
+        np.minimum(min_distance, distance, out=min_distance)
+    return selected
+
+
+def _transform(scaler, values: np.ndarray) -> np.ndarray:
+    """DataFrame으로 학습된 scaler에 배열을 넣을 때 컬럼 이름을 맞춰 줍니다."""
+    names = getattr(scaler, 'feature_names_in_', None)
+    if names is not None:
+        values = pd.DataFrame(values, columns=names)
+    return scaler.transform(values)
+
+
+def acquire_batch(members: list, scaler, candidates: np.ndarray, data: np.ndarray, high_error_points: np.ndarray, batch_size: int,
+                  weights: tuple[float, float, float] = (0.5, 0.3, 0.2), diversity: float = 0.5, max_scored: int | None = 100_000) -> tuple[np.ndarray, np.ndarray]:
+    """
+    후보 점들(원래 단위, (M, D))에서 시뮬레이션할 batch_size개를 고릅니다.
+    모든 거리 계산은 학습에 쓴 scaler로 변환한 공간에서 수행합니다.
+    후보가 max_scored개보다 많으면 불확실성 상위 max_scored개로 먼저 걸러낸 뒤 점수를 계산합니다.
+    (선택된 인덱스, 전체 후보 점수)를 반환합니다. 걸러져 점수를 계산하지 않은 후보의 점수는 NaN입니다.
+    """
+    if len(candidates) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    if max_scored is not None and len(candidates) > max_scored:
+        screened = prescreen_candidates(members, scaler, candidates, max_scored)
+        logging.info(f"후보 {len(candidates)}개를 불확실성 기준 상위 {len(screened)}개로 걸러냈습니다.")
+        selected, screened_scores = acquire_batch(members, scaler, candidates[screened], data, high_error_points, batch_size, weights, diversity, None)
+        scores = np.full(len(candidates), np.nan)
+        scores[screened] = screened_scores
+        return screened[selected], scores
+
+    candidates_scaled = _transform(scaler, candidates)
+    data_scaled = _transform(scaler, data)
+    high_error_scaled = _transform(scaler, high_error_points) if len(high_error_points) else np.empty((0, candidates.shape[1]))
+
+    uncertainty = ensemble_uncertainty(members, candidates_scaled)
+    sparsity = local_sparsity(candidates_scaled, data_scaled)
+    proximity = error_proximity(candidates_scaled, high_error_scaled)
+    scores = acquisition_scores(uncertainty, sparsity, proximity, weights)
+
+    selected = select_diverse_batch(candidates_scaled, scores, batch_size, diversity)
+    logging.info(
+        f"후보 {len(candidates)}개 중 {len(selected)}개를 선택했습니다. "
+        f"(평균 점수: 선택 {scores[selected].mean():.3f} / 전체 {scores.mean():.3f})"
+    )
+    return selected, scores
@@ -0,0 +1,161 @@
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from supabase import Client
+from information_gain_pipeline import (
+    PARAMETER_FEATURES,
+    AcquisitionModel,
+    fit_acquisition_model,
+    generate_and_insert_jobs,
+    load_data_from_supabase,
+    select_new_points,
+)
+from data_access import iter_table_pages
+from job_scheduling import DEFAULT_PRIORITY
+from result_cache import parameter_hash
+
+# 큐 깊이에 포함되는 작업 상태 (재시도 대기 중인 작업도 'pending')
+OPEN_JOB_STATUSES = ('pending', 'running')
+
+
+def count_rows(client: Client, table: str, statuses: tuple[str, ...] | None = None) -> int:
+    """테이블의 행 수를 본문 없이 count 헤더만으로 조회합니다. statuses가 있으면 해당 상태의 행만 셉니다."""
+    query = client.table(table).select('id', count='exact')
+    if statuses:
+        query = query.in_('status', list(statuses))
+    return int(query.limit(1).execute().count or 0)
+
+
+class ActiveLearningLoop:
+    """
+    시뮬레이션과 모델 학습을 겹쳐 실행하는 연속 능동 학습 오케스트레이터.
+
+    - 대기/실행 중인 작업 수가 target_queue_depth보다 적으면 현재 모델로 작업을 획득해 보충합니다.
+    - meta_atom_dataset에 새 결과가 retrain_every개 이상 쌓이면 백그라운드 스레드에서 재학습하며,
+      대리 모델은 체크포인트에서 이어서 학습(warm start)합니다. 학습 중에도 이전 모델로 보충은 계속됩니다.
+    - 재학습이 끝나기 전에 큐에 넣은 점은 기존 샘플처럼 취급하여 같은 영역을 반복해서 고르지 않습니다.
+    - 이미 등록된 작업(대기/실행 중이거나 이 루프가 넣은 작업)과 param_hash가 같은 후보는 획득 전에 제외하여
+      삽입 단계의 중복 제거로 보충 수가 모자라지 않게 합니다.
+    - priority를 주면 보충하는 작업을 그 우선순위 등급으로 넣어 초기 설계 작업보다 먼저 계산되게 할 수 있습니다.
+    """
+
+    def __init__(self, client: Client, target_queue_depth: int = 500, retrain_every: int = 200, batch_size: int = 100,
+                 poll_interval: float = 30.0, features: list = PARAMETER_FEATURES, priority: int = DEFAULT_PRIORITY):
+        self.client = client
+        self.target_queue_depth = max(1, target_queue_depth)
+        self.retrain_every = max(1, retrain_every)
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.features = list(features)
+        self.priority = priority
+
+        self.acquisition_model: AcquisitionModel | None = None
+        self._df: pd.DataFrame | None = None
+        self._trained_rows = 0
+        self._queued_points: list[np.ndarray] = []
+        self._queued_hashes: set[str] = set()
+        self._training: Future | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='surrogate-train')
+        self._stopped = threading.Event()
+
+    # --- 재학습 ---
+
+    def _train(self, n_rows: int) -> tuple[AcquisitionModel | None, pd.DataFrame | None, int]:
+        """백그라운드 스레드에서 실행. 로컬 캐시로 새 결과만 내려받은 뒤 학습합니다."""
+        df = load_data_from_supabase()
+        if df is None or df.empty:
+            return None, None, n_rows
+        missing = [f for f in self.features if f not in df.columns]
+        if missing:
+            logging.error(f"데이터에 필요한 파라미터 컬럼이 없습니다: {missing}")
+            return None, None, n_rows
+        started = time.monotonic()
+        acquisition_model = fit_acquisition_model(df, features=self.features)
+        logging.info(f"{len(df)}개 샘플로 재학습을 마쳤습니다. ({time.monotonic() - started:.1f}초)")
+        return acquisition_model, df, n_rows
+
+    def _collect_training(self):
+        """끝난 재학습 결과가 있으면 현재 모델을 교체합니다."""
+        if self._training is None or not self._training.done():
+            return
+        future, self._training = self._training, None
+        try:
+            acquisition_model, df, n_rows = future.result()
+        except Exception as e:
+            logging.error(f"재학습 중 오류 발생: {e}")
+            return
+        if acquisition_model is None:
+            logging.warning("학습할 데이터가 없어 이전 모델을 계속 사용합니다.")
+            return
+        self.acquisition_model, self._df, self._trained_rows = acquisition_model, df, n_rows
+        # 새 모델의 학습 데이터에는 아직 반영되지 않았더라도, 이전에 큐에 넣은 점의 결과가 곧 들어오므로 초기화
+        self._queued_points.clear()
+
+    def _maybe_retrain(self, n_rows: int):
+        if self._training is not None:
+            return
+        if self.acquisition_model is not None and n_rows - self._trained_rows < self.retrain_every:
+            return
+        logging.info(f"새 결과 {n_rows - self._trained_rows}개가 쌓여 백그라운드에서 재학습을 시작합니다.")
+        self._training = self._executor.submit(self._train, n_rows)
+
+    # --- 작업 보충 ---
+
+    def _open_job_hashes(self) -> set[str]:
+        """대기/실행 중인 작업의 param_hash 집합. (다른 프로세스가 넣은 작업 포함, 큐 깊이만큼의 행)"""
+        hashes = set()
+        for status in OPEN_JOB_STATUSES:
+            for page in iter_table_pages(self.client, 'simulation_jobs', 'param_hash', filters={'status': status}):
+                hashes.update(row['param_hash'] for row in page if row.get('param_hash'))
+        return hashes
+
+    def _top_up(self, queue_depth: int) -> int:
+        deficit = self.target_queue_depth - queue_depth
+        if deficit <= 0 or self.acquisition_model is None:
+            return 0
+        n_jobs = min(deficit, self.batch_size)
+        queued = np.vstack(self._queued_points) if self._queued_points else None
+        exclude = self._queued_hashes | self._open_job_hashes()
+        points = select_new_points(self.acquisition_model, self._df, n_jobs, self.features, queued_points=queued, exclude_hashes=exclude)
+        if len(points) == 0:
+            return 0
+        inserted = generate_and_insert_jobs(points, self.features, n_jobs, self.client, self.priority)
+        self._queued_points.append(points)
+        # 결과가 들어와 재학습에 반영되기 전까지는 완료된 작업의 셀도 희소하게 보이므로, 넣은 해시는 계속 제외
+        self._queued_hashes.update(parameter_hash(dict(zip(self.features, point))) for point in points.tolist())
+        return inserted
+
+    def step(self) -> int:
+        """한 주기: 재학습 결과 반영 → 필요하면 재학습 시작 → 큐 깊이 보충. 삽입한 작업 수를 반환합니다."""
+        self._collect_training()
+        n_rows = count_rows(self.client, 'meta_atom_dataset')
+        self._maybe_retrain(n_rows)
+        queue_depth = count_rows(self.client, 'simulation_jobs', OPEN_JOB_STATUSES)
+        inserted = self._top_up(queue_depth)
+        logging.info(
+            f"큐 깊이 {queue_depth}/{self.target_queue_depth}, 결과 {n_rows}개 (학습 반영 {self._trained_rows}개), "
+            f"신규 작업 {inserted}개{' (재학습 중)' if self._training is not None else ''}"
+        )
+        return inserted
+
+    def run(self):
+        logging.info(f"연속 능동 학습 루프를 시작합니다. (목표 큐 깊이: {self.target_queue_depth}, 재학습 주기: 결과 {self.retrain_every}개)")
+        while not self._stopped.is_set():
+            try:
+                inserted = self.step()
+            except Exception as e:
+                logging.error(f"능동 학습 루프 오류: {e}")
+                inserted = 0
+            # 보충할 작업이 남아 있으면 바로 다음 배치를 획득
+            if inserted < self.batch_size or self.acquisition_model is None:
+                self._stopped.wait(self.poll_interval)
+
+    def stop(self):
+        self._stopped.set()
+
+    def close(self):
+        self.stop()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,543 @@
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import cpu_count
+import numpy as np
+from dotenv import load_dotenv
+from supabase import acreate_client, create_client, AsyncClient
+from job_events import AdaptiveBackoff, JobNotificationListener
+from job_queue import DEFAULT_LEASE_SECONDS, RETRY_BASE_DELAY_SECONDS, LeaseLostError, SupabaseJobQueue, make_worker_id
+from job_scheduling import RUNTIME_MODEL_PATH, RuntimeModel, job_costs, pack_batches, split_runtime
+from result_cache import LOOKUP_CHUNK_SIZE, parameter_hash
+from result_writer import (DEFAULT_FLUSH_MAX_ATTEMPTS, RESULTS_TABLE, group_rows_by_table, is_permanent_write_error, triage_failed_rows,
+                           validate_rows)
+from simulation_engine import SimulationEngine, SpectralResult, get_engine
+from spectral_records import SPECTRA_TABLE, frequency_grid, is_spectral_job, spectrum_row
+from worker import _Checkpointer, _get_int_env
+from worker_metrics import DEFAULT_METRICS_DIR, SnapshotWriter, clear_snapshots, get_registry, start_metrics_server
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# 시뮬레이션 프로세스마다 한 번만 만드는 엔진 (_init_engine에서 초기화)
+_engine: SimulationEngine | None = None
+# 재개 가능한 엔진의 체크포인트 저장용 (queue, worker_id, lease_seconds, checkpoint_interval)
+_checkpoint_target: tuple | None = None
+
+
+def _init_engine(engine_name: str, engine_batch_size: int, checkpoint_config: tuple | None = None):
+    """
+    checkpoint_config=(supabase_url, supabase_key, worker_id, lease_seconds, checkpoint_interval)를 주면
+    이 프로세스에서 동기 Supabase 클라이언트를 만들어, 계산 도중 체크포인트를 직접 저장합니다. (이벤트 루프를 거치지 않음)
+    """
+    global _engine, _checkpoint_target
+    _engine = get_engine(engine_name, batch_size=engine_batch_size)
+    if checkpoint_config is not None:
+        supabase_url, supabase_key, worker_id, lease_seconds, checkpoint_interval = checkpoint_config
+        _checkpoint_target = (SupabaseJobQueue(create_client(supabase_url, supabase_key)), worker_id, lease_seconds, checkpoint_interval)
+
+
+def _simulate(params_array: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """프로세스 풀에서 실행되는 CPU 작업. (결과는 pickle 가능한 배열과, 풀 대기 시간을 뺀 계산 시간으로 반환)"""
+    started = time.perf_counter()
+    result = _engine.simulate_batch(params_array)
+    return result.transmission, result.phase, result.frequency, time.perf_counter() - started
+
+
+def _simulate_resumable(job_id, params: np.ndarray, state: dict | None) -> tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """형상 하나를 재개 가능한 엔진으로 계산합니다. 리스를 잃으면 LeaseLostError가 호출한 쪽으로 전달됩니다."""
+    queue, worker_id, lease_seconds, interval = _checkpoint_target
+    started = time.perf_counter()
+    result = _engine.simulate_resumable(params, state, _Checkpointer(queue, worker_id, job_id, lease_seconds, interval))
+    return result.transmission, result.phase, result.frequency, time.perf_counter() - started
+
+
+def _simulate_spectrum(params_array: np.ndarray, frequencies: np.ndarray) -> tuple[SpectralResult, float]:
+    started = time.perf_counter()
+    result = _engine.simulate_spectrum(params_array, frequencies)
+    return result, time.perf_counter() - started
+
+
+class AsyncResultWriter:
+    """
+    ResultWriter의 asyncio 버전. 결과를 모아 결과 테이블별 일괄 upsert + simulation_jobs 일괄 update로 내보냅니다.
+    이벤트 루프 하나에서만 쓰이므로 버퍼 교체에 잠금이 필요 없고, DB 요청 수는 db_semaphore로 제한합니다.
+    작업 완료 처리는 worker_id가 점유 중인('running') 작업에만 적용됩니다.
+    기록 실패 처리(재시도, 한 건씩 다시 기록, max_attempts 초과 시 실패 기록)도 ResultWriter와 같습니다.
+    """
+
+    def __init__(self, client: AsyncClient, db_semaphore: asyncio.Semaphore, worker_id: str, max_rows: int = 50, max_delay_ms: int = 500,
+                 validate: bool = True, max_attempts: int = DEFAULT_FLUSH_MAX_ATTEMPTS):
+        self.client = client
+        self.worker_id = worker_id
+        self.validate = validate
+        self.db_semaphore = db_semaphore
+        self.max_rows = max(1, max_rows)
+        self.max_delay = max(1, max_delay_ms) / 1000
+        self.max_attempts = max(1, max_attempts)
+        self._rows: list[tuple[str, dict]] = []  # (결과 테이블, 행)
+        self._job_ids: list = []
+        self._attempts: dict = {}  # 작업 id -> 연속 기록 실패 횟수
+        self._oldest: float | None = None
+        self._pending_flushes: set[asyncio.Task] = set()
+
+    def add(self, job_id, dataset_row: dict, table: str = RESULTS_TABLE):
+        self._rows.append((table, dataset_row))
+        self._job_ids.append(job_id)
+        if self._oldest is None:
+            self._oldest = asyncio.get_running_loop().time()
+        if len(self._rows) >= self.max_rows:
+            # 결과 업로드는 별도 태스크로 보내 다음 배치 처리와 겹치게 합니다.
+            task = asyncio.create_task(self.flush())
+            self._pending_flushes.add(task)
+            task.add_done_callback(self._pending_flushes.discard)
+
+    async def flush(self) -> int:
+        rows, job_ids = self._rows, self._job_ids
+        self._rows, self._job_ids, self._oldest = [], [], None
+        if not rows:
+            return 0
+        metrics = get_registry()
+        if self.validate:
+            validate_rows(group_rows_by_table(rows), metrics)
+        written = await self._write_batch(rows, job_ids, metrics)
+        if written:
+            logging.info(f"결과 {written}건을 일괄 저장하고 작업 상태를 'completed'로 업데이트했습니다.")
+        return written
+
+    async def _write_batch(self, rows: list[tuple[str, dict]], job_ids: list, metrics, isolate: bool = True) -> int:
+        try:
+            async with self.db_semaphore:
+                with metrics.span('insert'):
+                    for table, table_rows in group_rows_by_table(rows).items():
+                        await self.client.table(table).upsert(table_rows, on_conflict="param_hash", ignore_duplicates=True).execute()
+                with metrics.span('status_update'):
+                    await self.client.table("simulation_jobs").update({
+                        "status": "completed",
+                        "progress": 100,
+                        "lease_expires_at": None,
+                        "checkpoint": None
+                    }).in_("id", job_ids).eq("worker_id", self.worker_id).eq("status", "running").execute()
+        except Exception as e:
+            metrics.inc('flush_errors')
+            if isolate and len(rows) > 1 and is_permanent_write_error(e):
+                logging.warning(f"결과 {len(rows)}건 일괄 기록이 재시도할 수 없는 오류로 실패했습니다: {e}. 원인이 된 행을 찾기 위해 한 건씩 다시 기록합니다.")
+                written = 0
+                for row, job_id in zip(rows, job_ids):
+                    written += await self._write_batch([row], [job_id], metrics, isolate=False)
+                return written
+            await self._handle_failure(rows, job_ids, e, metrics)
+            return 0
+
+        for job_id in job_ids:
+            self._attempts.pop(job_id, None)
+        metrics.inc('jobs_completed', len(rows))
+        return len(rows)
+
+    async def _handle_failure(self, rows: list[tuple[str, dict]], job_ids: list, error: Exception, metrics):
+        retry_rows, retry_ids, give_up = triage_failed_rows(rows, job_ids, self._attempts, error, self.max_attempts)
+        if retry_rows:
+            logging.error(f"작업 {len(retry_ids)}건의 결과 일괄 기록 중 오류 발생: {error}. 다음 flush에서 재시도합니다.")
+            self._rows[:0] = retry_rows
+            self._job_ids[:0] = retry_ids
+            self._oldest = asyncio.get_running_loop().time()
+        if give_up:
+            retryable = not is_permanent_write_error(error)
+            logging.error(f"작업 {len(give_up)}건의 결과를 기록하지 못해 버퍼에서 제외하고 실패로 기록합니다. "
+                          f"({'재시도 횟수 초과' if retryable else '재시도할 수 없는 오류'}: {error})")
+            try:
+                async with self.db_semaphore:
+                    await self.client.rpc("fail_simulation_jobs", {
+                        "p_job_ids": give_up,
+                        "p_worker_id": self.worker_id,
+                        "p_error_message": f"result write failed: {error}",
+                        "p_retryable": retryable,
+                        "p_base_delay_seconds": RETRY_BASE_DELAY_SECONDS,
+                    }).execute()
+            except Exception as fail_e:
+                logging.error(f"Job {give_up}의 실패 상태를 업데이트하는 중에도 오류 발생: {fail_e}")
+            metrics.inc('jobs_failed', len(give_up))
+
+    async def flush_periodically(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.max_delay / 2)
+            if self._oldest is not None and loop.time() - self._oldest >= self.max_delay:
+                await self.flush()
+
+    async def close(self):
+        if self._pending_flushes:
+            await asyncio.gather(*self._pending_flushes, return_exceptions=True)
+        await self.flush()
+
+
+class AsyncWorker:
+    """
+    asyncio 기반 워커. 작업 점유, 결과 캐시 조회, 결과 업로드, 상태 갱신, 하트비트가 하나의 이벤트 루프에서
+    동시에 진행되고(DB 동시 요청 수는 db_concurrency로 제한), CPU를 쓰는 시뮬레이션은 run_in_executor로
+    프로세스 풀에 보냅니다. 네트워크 대기 시간이 계산 시간과 겹치므로 코어가 DB 왕복을 기다리며 쉬지 않습니다.
+    재개 가능한 엔진(resumable)은 worker.py와 같이 작업마다 체크포인트를 저장하며 계산하고, 남아 있는 체크포인트에서 이어서 계산합니다.
+    체크포인트는 시뮬레이션 프로세스가 직접 저장하므로 supabase_url/supabase_key가 필요합니다.
+    """
+
+    def __init__(self, client: AsyncClient, worker_id: str, engine_name: str = 'analytic', engine_batch_size: int = 64,
+                 num_processes: int = 1, prefetch_depth: int = 1, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 db_concurrency: int = 8, flush_rows: int = 50, flush_ms: int = 500, idle_max_interval: float = 15.0,
+                 reap_interval: float = 60.0, db_url: str | None = None, supabase_url: str | None = None,
+                 supabase_key: str | None = None, checkpoint_interval: float = 60.0,
+                 flush_max_attempts: int = DEFAULT_FLUSH_MAX_ATTEMPTS):
+        self.client = client
+        self.worker_id = worker_id
+        self.engine_name = engine_name
+        self.engine_batch_size = engine_batch_size
+        self.num_processes = num_processes
+        self.capacity = num_processes + prefetch_depth
+        self.lease_seconds = lease_seconds
+        self.reap_interval = reap_interval
+        self.idle_max_interval = idle_max_interval
+        self.db_url = db_url
+        self.db_semaphore = asyncio.Semaphore(db_concurrency)
+        self.writer = AsyncResultWriter(client, self.db_semaphore, worker_id, flush_rows, flush_ms, max_attempts=flush_max_attempts)
+        # 파라미터 변환(params_to_array)은 메인 프로세스에서 수행
+        self.engine = get_engine(engine_name, batch_size=engine_batch_size)
+        self.checkpoint_config = None
+        if self.engine.resumable:
+            if not supabase_url or not supabase_key:
+                raise ValueError(f"재개 가능한 엔진('{engine_name}')은 체크포인트 저장을 위해 supabase_url과 supabase_key가 필요합니다.")
+            self.checkpoint_config = (supabase_url, supabase_key, worker_id, lease_seconds, checkpoint_interval)
+        # estimated_cost가 없는 작업의 비용 추정용 (없으면 균등 비용)
+        self.runtime_model = RuntimeModel.load(RUNTIME_MODEL_PATH)
+        self._in_flight: dict[int, list] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._next_batch_id = 0
+        self._wake = asyncio.Event()
+        self._executor: ProcessPoolExecutor | None = None
+
+    # --- DB 호출 (모두 db_semaphore로 동시 요청 수 제한) ---
+
+    async def _rpc(self, name: str, params: dict):
+        async with self.db_semaphore:
+            return (await self.client.rpc(name, params).execute()).data
+
+    async def claim(self, batch_size: int) -> list[dict]:
+        with get_registry().span('claim'):
+            return await self._rpc("claim_simulation_jobs", {
+                "p_worker_id": self.worker_id,
+                "p_batch_size": batch_size,
+                "p_lease_seconds": self.lease_seconds,
+            }) or []
+
+    async def _mark_failed(self, job_ids: list, error_message: str, retryable: bool = True):
+        """재시도 가능한 오류는 백오프 후 재시도(횟수 초과 시 dead_letter), 아니면 'failed'로 기록합니다."""
+        try:
+            await self._rpc("fail_simulation_jobs", {
+                "p_job_ids": job_ids,
+                "p_worker_id": self.worker_id,
+                "p_error_message": error_message,
+                "p_retryable": retryable,
+                "p_base_delay_seconds": RETRY_BASE_DELAY_SECONDS,
+            })
+        except Exception as e:
+            logging.error(f"Job {job_ids}의 실패 상태를 업데이트하는 중에도 오류 발생: {e}")
+        get_registry().inc('jobs_failed', len(job_ids))
+
+    async def _lookup_cached(self, hashes: list[str]) -> dict[str, dict]:
+        """meta_atom_dataset에서 이미 계산된 결과를 조회합니다. (청크별 요청을 동시에 보냄)"""
+        async def lookup(chunk):
+            async with self.db_semaphore:
+                response = await self.client.table('meta_atom_dataset').select('param_hash, transmission, phase, frequency').in_('param_hash', chunk).execute()
+            return response.data or []
+
+        unique = list(dict.fromkeys(hashes))
+        chunks = [unique[i:i + LOOKUP_CHUNK_SIZE] for i in range(0, len(unique), LOOKUP_CHUNK_SIZE)]
+        try:
+            with get_registry().span('cache_lookup'):
+                pages = await asyncio.gather(*(lookup(chunk) for chunk in chunks))
+        except Exception as e:
+            logging.warning(f"결과 캐시 조회 실패: {e}. 캐시 없이 계산합니다.")
+            return {}
+        return {row['param_hash']: row for page in pages for row in page}
+
+    # --- 배치 처리 ---
+
+    async def process_batch(self, jobs: list[dict]):
+        metrics = get_registry()
+        valid_jobs, rows, hashes = [], [], []
+        sweeps: dict[bytes, tuple[np.ndarray, list]] = {}
+        for job in jobs:
+            try:
+                row = self.engine.params_to_array(job['parameters'])
+                param_hash = job.get('param_hash') or parameter_hash(job['parameters'])
+                if is_spectral_job(job['parameters']):
+                    grid = frequency_grid(job['parameters'])
+                    sweeps.setdefault(grid.tobytes(), (grid, []))[1].append((job, row, param_hash))
+                    continue
+                rows.append(row)
+                hashes.append(param_hash)
+                valid_jobs.append(job)
+            except (KeyError, TypeError, ValueError) as e:
+                logging.error(f"Job {job['id']}의 파라미터를 해석할 수 없습니다: {e}")
+                await self._mark_failed([job['id']], f"invalid parameters: {e}", retryable=False)
+        if sweeps:
+            await asyncio.gather(*(self._process_spectra(grid, group) for grid, group in sweeps.values()))
+        if not valid_jobs:
+            return
+
+        cached = await self._lookup_cached(hashes)
+        misses = []
+        for i, job in enumerate(valid_jobs):
+            hit = cached.get(hashes[i])
+            if hit is None:
+                misses.append(i)
+                continue
+            self.writer.add(job['id'], {
+                "job_id": job['id'],
+                "transmission": hit['transmission'],
+                "phase": hit['phase'],
+                "frequency": hit['frequency'],
+                "parameters": job['parameters'],
+                "param_hash": hashes[i]
+            })
+        metrics.inc('jobs_cache_hit', len(valid_jobs) - len(misses))
+        if not misses:
+            return
+
+        # 장시간 솔버는 작업마다 체크포인트를 남기며 개별로 계산 (이전 시도의 체크포인트가 있으면 이어서 계산)
+        if self.engine.resumable:
+            await asyncio.gather(*(self._process_resumable(valid_jobs[i], rows[i], hashes[i]) for i in misses))
+            return
+
+        job_ids = [valid_jobs[i]['id'] for i in misses]
+        try:
+            with metrics.span('simulate'):
+                transmission, phase, frequency, elapsed = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, _simulate, np.vstack([rows[i] for i in misses])
+                )
+            runtimes = split_runtime(elapsed, job_costs([valid_jobs[i] for i in misses]))
+            metrics.inc('jobs_simulated', len(misses))
+            for k, i in enumerate(misses):
+                job = valid_jobs[i]
+                self.writer.add(job['id'], {
+                    "job_id": job['id'],
+                    "transmission": float(transmission[k]),
+                    "phase": float(phase[k]),
+                    "frequency": float(frequency[k]),
+                    "parameters": job['parameters'],
+                    "param_hash": hashes[i],
+                    "runtime_seconds": float(runtimes[k])
+                })
+        except Exception as e:
+            logging.error(f"Job {job_ids} 배치 처리 중 오류 발생: {e}")
+            await self._mark_failed(job_ids, str(e))
+
+    async def _process_resumable(self, job: dict, row: np.ndarray, param_hash: str):
+        """재개 가능한 엔진으로 작업 하나를 계산합니다. 리스를 잃으면 결과를 버리고 중단합니다."""
+        metrics = get_registry()
+        if job.get('checkpoint'):
+            logging.info(f"Job {job['id']}을(를) 체크포인트(진행률 {job.get('progress', 0)}%)에서 이어서 계산합니다.")
+        try:
+            with metrics.span('simulate'):
+                transmission, phase, frequency, elapsed = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, _simulate_resumable, job['id'], row, job.get('checkpoint')
+                )
+        except LeaseLostError as e:
+            logging.warning(f"{e} 다른 워커가 이어서 계산하므로 중단합니다.")
+            metrics.inc('jobs_lease_lost')
+            return
+        except Exception as e:
+            logging.error(f"Job {job['id']} 처리 중 오류 발생: {e}")
+            await self._mark_failed([job['id']], str(e))
+            return
+        metrics.inc('jobs_simulated')
+        self.writer.add(job['id'], {
+            "job_id": job['id'],
+            "transmission": float(transmission[0]),
+            "phase": float(phase[0]),
+            "frequency": float(frequency[0]),
+            "parameters": job['parameters'],
+            "param_hash": param_hash,
+            "runtime_seconds": float(elapsed)
+        })
+
+    async def _process_spectra(self, frequencies: np.ndarray, group: list[tuple[dict, np.ndarray, str]]):
+        """같은 주파수 격자를 쓰는 스펙트럼 작업들을 한 번에 계산하여 meta_atom_spectra 행으로 추가합니다."""
+        metrics = get_registry()
+        job_ids = [job['id'] for job, _, _ in group]
+        try:
+            with metrics.span('simulate'):
+                result, elapsed = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, _simulate_spectrum, np.vstack([row for _, row, _ in group]), frequencies
+                )
+            runtimes = split_runtime(elapsed, job_costs([job for job, _, _ in group]))
+            metrics.inc('jobs_simulated', len(group))
+            for i, (job, _, param_hash) in enumerate(group):
+                self.writer.add(job['id'], {**spectrum_row(job, param_hash, result, i), "runtime_seconds": float(runtimes[i])}, table=SPECTRA_TABLE)
+        except Exception as e:
+            logging.error(f"Job {job_ids} 스펙트럼 계산 중 오류 발생: {e}")
+            await self._mark_failed(job_ids, str(e))
+
+    def _submit(self, jobs: list[dict]):
+        batch_id = self._next_batch_id
+        self._next_batch_id += 1
+        self._in_flight[batch_id] = [job['id'] for job in jobs]
+
+        async def run():
+            with get_registry().span('batch'):
+                await self.process_batch(jobs)
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+
+        def release(finished: asyncio.Task):
+            self._tasks.discard(finished)
+            self._in_flight.pop(batch_id, None)
+            if not finished.cancelled() and finished.exception() is not None:
+                logging.error(f"Job {[job['id'] for job in jobs]} 배치 실행 중 처리되지 않은 오류 발생: {finished.exception()}")
+            self._wake.set()
+        task.add_done_callback(release)
+
+    async def _wait(self, timeout: float):
+        """배치가 끝나거나, 새 작업 알림이 오거나, timeout이 지날 때까지 대기합니다."""
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    # --- 백그라운드 태스크 ---
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            job_ids = [job_id for ids in self._in_flight.values() for job_id in ids]
+            if not job_ids:
+                continue
+            try:
+                extended = int(await self._rpc("heartbeat_simulation_jobs", {
+                    "p_worker_id": self.worker_id,
+                    "p_job_ids": job_ids,
+                    "p_lease_seconds": self.lease_seconds,
+                }) or 0)
+                if extended < len(job_ids):
+                    logging.warning(f"하트비트: {len(job_ids)}개 중 {extended}개의 리스만 연장되었습니다. 일부 작업이 회수되었을 수 있습니다.")
+            except Exception as e:
+                logging.error(f"리스 하트비트 전송 중 오류 발생: {e}")
+
+    async def _reap(self):
+        while True:
+            try:
+                with get_registry().span('reap'):
+                    reaped = int(await self._rpc("reap_expired_simulation_jobs", {"p_base_delay_seconds": RETRY_BASE_DELAY_SECONDS}) or 0)
+                if reaped:
+                    logging.info(f"리스가 만료된 작업 {reaped}개를 재시도 대기(시도 횟수 초과 시 dead_letter)로 전환했습니다.")
+            except Exception as e:
+                logging.error(f"만료된 리스 회수 중 오류 발생: {e}")
+            await asyncio.sleep(self.reap_interval)
+
+    # --- 메인 루프 ---
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        metrics = get_registry()
+        self._executor = ProcessPoolExecutor(self.num_processes, initializer=_init_engine,
+                                             initargs=(self.engine_name, self.engine_batch_size, self.checkpoint_config))
+        background = [
+            asyncio.create_task(self._heartbeat()),
+            asyncio.create_task(self._reap()),
+            asyncio.create_task(self.writer.flush_periodically()),
+        ]
+        listener = None
+        if self.db_url:
+            listener = JobNotificationListener(self.db_url, on_notify=lambda: loop.call_soon_threadsafe(self._wake.set))
+            listener.start()
+        backoff = AdaptiveBackoff(max_interval=self.idle_max_interval * 4 if listener else self.idle_max_interval)
+        logging.info(f"비동기 워커 {self.worker_id} 시작 (프로세스 {self.num_processes}개, 동시 배치 {self.capacity}개).")
+
+        try:
+            while True:
+                try:
+                    free_slots = self.capacity - len(self._in_flight)
+                    metrics.set_gauge('free_slots', free_slots)
+                    metrics.set_gauge('in_flight_batches', len(self._in_flight))
+                    if free_slots <= 0:
+                        await self._wait(self.reap_interval)
+                        continue
+
+                    pending_jobs = await self.claim(free_slots * self.engine_batch_size)
+                    metrics.inc('jobs_claimed', len(pending_jobs))
+                    if not pending_jobs:
+                        await self._wait(backoff.next_delay())
+                        continue
+
+                    backoff.reset()
+                    logging.info(f"{len(pending_jobs)}개의 작업을 점유했습니다.")
+                    for batch in pack_batches(pending_jobs, free_slots, self.engine_batch_size, job_costs(pending_jobs, self.runtime_model)):
+                        self._submit(batch)
+                except Exception as e:
+                    logging.error(f"메인 루프에서 오류 발생: {e}")
+                    metrics.inc('main_loop_errors')
+                    await asyncio.sleep(10)
+        finally:
+            logging.info("종료합니다. 실행 중인 배치와 남은 결과를 마무리합니다...")
+            if listener is not None:
+                listener.stop()
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            await self.writer.close()
+            for task in background:
+                task.cancel()
+            self._executor.shutdown()
+
+
+def main():
+    """WORKER_MODE=async 또는 단독 실행 시 사용하는 asyncio 워커 진입점."""
+    load_dotenv()
+    supabase_url = os.environ.get("SUPABASE_URL")
+    supabase_key = os.environ.get("SUPABASE_KEY")
+    if not supabase_url or not supabase_key:
+        logging.error("Supabase URL 또는 Key가 .env 파일에 설정되지 않았습니다. 스크립트를 종료합니다.")
+        return
+
+    num_processes = max(1, _get_int_env("WORKER_PROCESSES", cpu_count()))
+    metrics_port = _get_int_env("WORKER_METRICS_PORT", 0)
+    clear_snapshots(DEFAULT_METRICS_DIR)
+    snapshots = SnapshotWriter(DEFAULT_METRICS_DIR, max(1, _get_int_env("WORKER_METRICS_INTERVAL", 10)))
+    snapshots.start()
+    metrics_server = start_metrics_server(metrics_port) if metrics_port > 0 else None
+
+    async def run():
+        client = await acreate_client(supabase_url, supabase_key)
+        worker = AsyncWorker(
+            client,
+            make_worker_id(),
+            engine_name=os.environ.get("SIMULATION_ENGINE", "analytic"),
+            engine_batch_size=max(1, _get_int_env("ENGINE_BATCH_SIZE", 64)),
+            num_processes=num_processes,
+            prefetch_depth=max(0, _get_int_env("WORKER_PREFETCH", num_processes)),
+            lease_seconds=_get_int_env("WORKER_LEASE_SECONDS", DEFAULT_LEASE_SECONDS),
+            db_concurrency=max(1, _get_int_env("WORKER_DB_CONCURRENCY", 8)),
+            flush_rows=max(1, _get_int_env("WORKER_FLUSH_ROWS", 50)),
+            flush_ms=max(1, _get_int_env("WORKER_FLUSH_MS", 500)),
+            flush_max_attempts=max(1, _get_int_env("WORKER_FLUSH_MAX_ATTEMPTS", DEFAULT_FLUSH_MAX_ATTEMPTS)),
+            idle_max_interval=max(1, _get_int_env("WORKER_IDLE_MAX_INTERVAL", 15)),
+            db_url=os.environ.get("SUPABASE_DB_URL"),
+            supabase_url=supabase_url,
+            supabase_key=supabase_key,
+            checkpoint_interval=max(1, _get_int_env("WORKER_CHECKPOINT_INTERVAL", 60)),
+        )
+        await worker.run()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        logging.info("종료 신호를 받았습니다.")
+    finally:
+        snapshots.stop()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import platform
+import argparse
+import tempfile
+import itertools
+import subprocess
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import StandardScaler
+import worker
+import async_worker
+from acquisition import fit_bootstrap_ensemble
+from data_access import DEFAULT_PAGE_SIZE
+from export_dataset import export_streaming
+from fake_supabase import FakeSupabase, SyntheticDataset
+from information_gain_pipeline import N_BINS_FOR_SPARSITY_CHECK, AcquisitionModel, generate_and_insert_jobs, select_new_points
+from job_queue import SupabaseJobQueue
+from result_cache import ResultCache, parameter_hash
+from result_writer import ResultWriter
+from simulation_engine import get_engine
+from worker_metrics import reset_registry
+
+BENCHMARK_VERSION = 1
+DEFAULT_OUTPUT_DIR = os.environ.get("BENCHMARK_OUTPUT_DIR", ".cache/benchmarks")
+
+# 시나리오별 기본 스윕 (--profile). full은 10^7행까지 포함하므로 수십 분 이상 걸릴 수 있습니다.
+PROFILES = {
+    'quick': {
+        'jobs': 2_000,
+        'workers': [1, 4],
+        'batch_sizes': [16, 64],
+        'sizes': [1_000, 10_000],
+        'dims': [2, 4],
+    },
+    'full': {
+        'jobs': 20_000,
+        'workers': [1, 2, 4, 8, 16],
+        'batch_sizes': [1, 16, 64, 256],
+        'sizes': [1_000, 10_000, 100_000, 1_000_000, 10_000_000],
+        'dims': [2, 4, 8],
+    },
+}
+
+
+def parameter_names(dims: int) -> list[str]:
+    """합성 파라미터 이름. 앞의 두 개는 익스포트 입력 컬럼(radius, period)과 같게 둡니다."""
+    return (['radius', 'period'] + [f'p{i}' for i in range(2, dims)])[:dims]
+
+
+def stage_summary(snapshot: dict) -> dict:
+    """MetricsRegistry 스냅샷의 단계별 히스토그램을 (횟수, 평균 ms, 합계 s)로 요약합니다."""
+    return {
+        stage: {
+            'count': histogram['count'],
+            'mean_ms': 1000 * histogram['sum'] / histogram['count'] if histogram['count'] else 0.0,
+            'total_s': histogram['sum'],
+        }
+        for stage, histogram in snapshot['histograms'].items()
+    }
+
+
+def _seed_jobs(client: FakeSupabase, n_jobs: int, dims: int, seed: int):
+    """
+    지연 없이 simulation_jobs에 n_jobs개의 'pending' 작업을 넣습니다. (frequency + 합성 형상 파라미터)
+    period는 항상 2 * radius보다 크게 만들어 형상 제약(radius < period/2)을 통과하는 유효한 행으로 처리량을 잽니다.
+    """
+    columns = SyntheticDataset(n_jobs, parameter_names(dims), seed).columns(0, n_jobs)
+    if 'period' in columns:
+        columns['period'] = 2 * columns['radius'] + columns['period']
+    rows = []
+    for i in range(n_jobs):
+        parameters = {'frequency': float(columns['frequency'][i])}
+        parameters.update({name: float(columns[name][i]) for name in parameter_names(dims)})
+        rows.append({'parameters': parameters, 'param_hash': parameter_hash(parameters), 'status': 'pending'})
+    client.get_table('simulation_jobs').insert(rows)
+    client.requests.clear()
+
+
+def _job_summary(client: FakeSupabase, n_jobs: int, elapsed: float) -> dict:
+    statuses = [job['status'] for job in client.queue.jobs.values()]
+    requests = sum(client.requests.values())
+    return {
+        'completed': statuses.count('completed'),
+        'seconds': elapsed,
+        'jobs_per_sec': statuses.count('completed') / elapsed if elapsed > 0 else 0.0,
+        'requests': requests,
+        'requests_per_job': requests / n_jobs if n_jobs else 0.0,
+        'requests_by_call': dict(client.requests),
+    }
+
+
+def bench_worker(n_jobs: int, workers: int, batch_size: int, dims: int, latency: float, jitter: float,
+                 flush_rows: int = 50, flush_ms: int = 500, seed: int = 0) -> dict:
+    """
+    worker.py의 배치 처리 경로(claim RPC → 결과 캐시 조회 → simulate_batch → ResultWriter flush) 처리량.
+    풀 프로세스 대신 workers개의 스레드가 같은 가짜 DB를 공유하며 큐가 빌 때까지 점유/처리를 반복합니다.
+    """
+    client = FakeSupabase(latency, jitter, seed=seed)
+    _seed_jobs(client, n_jobs, dims, seed)
+    metrics = reset_registry()
+    queue = SupabaseJobQueue(client)
+    worker._supabase, worker._queue, worker._worker_id = client, queue, 'benchmark'
+    worker._writer = ResultWriter(client, 'benchmark', flush_rows, flush_ms)
+    worker._engine = get_engine('instant', batch_size=batch_size)
+    worker._cache = ResultCache(client)
+
+    def drain():
+        while True:
+            with metrics.span('claim'):
+                jobs = queue.claim('benchmark', batch_size)
+            if not jobs:
+                return
+            worker.process_batch(jobs)
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(drain) for _ in range(workers)]:
+                future.result()
+        worker._writer.close()
+    finally:
+        elapsed = time.perf_counter() - started
+        worker._supabase = worker._writer = worker._engine = worker._cache = worker._queue = None
+    return {**_job_summary(client, n_jobs, elapsed), 'stages': stage_summary(metrics.snapshot())}
+
+
+def bench_async_worker(n_jobs: int, workers: int, batch_size: int, dims: int, latency: float, jitter: float,
+                       flush_rows: int = 50, flush_ms: int = 500, seed: int = 0) -> dict:
+    """
+    async_worker.AsyncWorker 처리량. DB 동시 요청 수(db_concurrency)와 동시 배치 수를 workers로 두고,
+    시뮬레이션은 프로세스 하나의 풀에서 계산합니다. 모든 작업이 'completed'가 되면 종료합니다.
+    """
+    client = FakeSupabase(latency, jitter, seed=seed)
+    _seed_jobs(client, n_jobs, dims, seed)
+    metrics = reset_registry()
+
+    async def run() -> float:
+        runner = async_worker.AsyncWorker(
+            client.as_async(), 'benchmark', engine_name='instant', engine_batch_size=batch_size,
+            num_processes=1, prefetch_depth=max(0, workers - 1), db_concurrency=workers,
+            flush_rows=flush_rows, flush_ms=flush_ms, idle_max_interval=0.5,
+        )
+        started = time.perf_counter()
+        task = asyncio.create_task(runner.run())
+        while not task.done():
+            await asyncio.sleep(0.01)
+            if all(job['status'] == 'completed' for job in client.queue.jobs.values()):
+                break
+        elapsed = time.perf_counter() - started
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        return elapsed
+
+    elapsed = asyncio.run(run())
+    return {**_job_summary(client, n_jobs, elapsed), 'stages': stage_summary(metrics.snapshot())}
+
+
+def bench_export(n_rows: int, dims: int, latency: float, jitter: float, page_size: int = DEFAULT_PAGE_SIZE, seed: int = 0) -> dict:
+    """export_dataset.export_streaming(HDF5)의 행 처리량. meta_atom_dataset은 행을 저장하지 않는 합성 테이블입니다."""
+    client = FakeSupabase(latency, jitter, seed=seed)
+    client.add_synthetic_table('meta_atom_dataset', n_rows, parameter_names(dims), seed)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'benchmark.h5')
+        started = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            export_streaming(client, path, page_size)
+        elapsed = time.perf_counter() - started
+        file_bytes = os.path.getsize(path)
+    return {
+        'seconds': elapsed,
+        'rows_per_sec': n_rows / elapsed if elapsed > 0 else 0.0,
+        'requests': sum(client.requests.values()),
+        'file_bytes': file_bytes,
+    }
+
+
+def _carve_holes(df: pd.DataFrame, features: list, n_bins: int = N_BINS_FOR_SPARSITY_CHECK, fraction: float = 0.5, seed: int = 0) -> pd.DataFrame:
+    """
+    희소 구간 탐색 격자(n_bins)의 내부 셀 중 fraction만큼을 비웁니다. 균등 분포 데이터는 희소한 셀이 없어
+    획득 단계가 바로 끝나므로, 구멍을 내어 항상 후보가 생기게 합니다. (경계 셀은 남겨 격자 범위가 바뀌지 않게 함)
+    """
+    data = df[features].to_numpy()
+    lower, upper = data.min(axis=0), data.max(axis=0)
+    cells = np.clip(np.floor((data - lower) / ((upper - lower) / n_bins)), 0, n_bins - 1).astype(np.int64)
+    interior = ((cells > 0) & (cells < n_bins - 1)).all(axis=1)
+    keys = cells @ (n_bins ** np.arange(len(features)))
+    hole_keys = np.unique(keys[interior])
+    rng = np.random.default_rng(seed)
+    holes = rng.choice(hole_keys, max(1, int(len(hole_keys) * fraction)), replace=False) if len(hole_keys) else hole_keys
+    return df[~np.isin(keys, holes)].reset_index(drop=True)
+
+
+def bench_acquisition(n_rows: int, dims: int, latency: float, jitter: float, n_jobs: int = 100, n_members: int = 5,
+                      max_fit_rows: int = 10_000, seed: int = 0) -> dict:
+    """
+    information_gain_pipeline의 작업 획득 지연: 희소 구간 탐색 + 배치 획득(select_new_points)과 중복 검사 후 삽입.
+    대리 모델 학습 비용은 제외하기 위해 앙상블은 최대 max_fit_rows행의 Ridge 회귀로 만듭니다.
+    데이터에는 희소 구간(_carve_holes)을 만들어 두며, 획득한 점이 없으면 조기 반환만 잰 것이므로 오류로 기록합니다.
+    """
+    features = parameter_names(dims)
+    columns = SyntheticDataset(n_rows, features, seed).columns(0, n_rows)
+    df = _carve_holes(pd.DataFrame({name: columns[name] for name in features + ['phase']}), features, seed=seed)
+
+    started = time.perf_counter()
+    fit_rows = df.sample(min(len(df), max_fit_rows), random_state=seed)
+    scaler = StandardScaler().fit(df[features])
+    X_scaled = scaler.transform(fit_rows[features])
+    model = Ridge().fit(X_scaled, fit_rows['phase'])
+    members = fit_bootstrap_ensemble(model, X_scaled, fit_rows['phase'].to_numpy(), n_members=n_members, seed=seed)
+    error = np.abs(model.predict(X_scaled) - fit_rows['phase'].to_numpy())
+    acquisition_model = AcquisitionModel(
+        model=model,
+        scaler=scaler,
+        members=members,
+        data_points=df[features].to_numpy(),
+        high_error_points=fit_rows[features].to_numpy()[error >= np.quantile(error, 0.9)],
+    )
+    fit_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    points = select_new_points(acquisition_model, df, n_jobs, features)
+    select_seconds = time.perf_counter() - started
+    if len(points) == 0:
+        raise RuntimeError(f"희소 구간 후보가 없어 획득한 점이 없습니다 (행 {len(df)}개, 차원 {dims}).")
+
+    client = FakeSupabase(latency, jitter, seed=seed)
+    started = time.perf_counter()
+    inserted = generate_and_insert_jobs(points, features, n_jobs, client)
+    insert_seconds = time.perf_counter() - started
+    return {
+        'fit_seconds': fit_seconds,
+        'select_seconds': select_seconds,
+        'insert_seconds': insert_seconds,
+        'seconds': select_seconds + insert_seconds,
+        'selected': len(points),
+        'inserted': inserted,
+        'requests': sum(client.requests.values()),
+    }
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_benchmarks(scenarios: list[str], sweep: dict, latency: float, jitter: float, seed: int = 0) -> list[dict]:
+    """선택한 시나리오의 스윕 조합을 차례로 실행하고 결과 레코드 목록을 반환합니다."""
+    plans = []
+    for scenario in scenarios:
+        if scenario in ('worker', 'async_worker'):
+            for workers, batch_size, dims in itertools.product(sweep['workers'], sweep['batch_sizes'], sweep['dims']):
+                plans.append((scenario, {'n_jobs': sweep['jobs'], 'workers': workers, 'batch_size': batch_size, 'dims': dims}))
+        else:
+            for n_rows, dims in itertools.product(sweep['sizes'], sweep['dims']):
+                plans.append((scenario, {'n_rows': n_rows, 'dims': dims}))
+
+    functions = {'worker': bench_worker, 'async_worker': bench_async_worker, 'export': bench_export, 'acquisition': bench_acquisition}
+    results = []
+    for index, (scenario, params) in enumerate(plans, 1):
+        logging.warning(f"[{index}/{len(plans)}] {scenario} {params}")
+        record = {'scenario': scenario, 'params': params, 'latency_ms': latency * 1000, 'jitter_ms': jitter * 1000}
+        try:
+            record['metrics'] = functions[scenario](**params, latency=latency, jitter=jitter, seed=seed)
+        except Exception as e:
+            logging.error(f"{scenario} {params} 실행 중 오류 발생: {e}")
+            record['error'] = str(e)
+        results.append(record)
+    return results
+
+
+def _headline(record: dict) -> str:
+    metrics = record.get('metrics')
+    if metrics is None:
+        return f"오류: {record['error']}"
+    if 'jobs_per_sec' in metrics:
+        return f"{metrics['jobs_per_sec']:.0f} jobs/s, 작업당 요청 {metrics['requests_per_job']:.2f}회"
+    if 'rows_per_sec' in metrics:
+        return f"{metrics['rows_per_sec']:.0f} rows/s"
+    return f"획득 {metrics['select_seconds'] * 1000:.0f} ms + 삽입 {metrics['insert_seconds'] * 1000:.0f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="인메모리 Supabase와 지연 없는 엔진으로 워커/익스포트/작업 획득 처리량을 측정합니다.")
+    parser.add_argument('--scenarios', nargs='+', choices=['worker', 'async_worker', 'export', 'acquisition'],
+                        default=['worker', 'async_worker', 'export', 'acquisition'], help="실행할 시나리오")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='quick', help="기본 스윕 범위 (기본값: quick)")
+    parser.add_argument('--jobs', type=int, default=None, help="워커 시나리오의 작업 수")
+    parser.add_argument('--workers', type=int, nargs='+', default=None, help="워커(스레드/동시 배치) 수 스윕")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=None, help="배치 크기 스윕")
+    parser.add_argument('--sizes', type=int, nargs='+', default=None, help="데이터셋 행 수 스윕 (export, acquisition)")
+    parser.add_argument('--dims', type=int, nargs='+', default=None, help="파라미터 차원 스윕")
+    parser.add_argument('--latency-ms', type=float, default=10.0, help="요청당 주입 지연 (ms, 기본값: 10)")
+    parser.add_argument('--jitter-ms', type=float, default=2.0, help="요청당 추가 지연 상한 U(0, jitter) (ms, 기본값: 2)")
+    parser.add_argument('--seed', type=int, default=0, help="합성 데이터/지연 난수 시드")
+    parser.add_argument('--output', default=None, help="결과 JSON 경로 (기본값: .cache/benchmarks/bench-<시각>.json)")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    sweep = dict(PROFILES[args.profile])
+    for key in ('jobs', 'workers', 'batch_sizes', 'sizes', 'dims'):
+        if getattr(args, key) is not None:
+            sweep[key] = getattr(args, key)
+
+    started_at = datetime.now(timezone.utc)
+    results = run_benchmarks(args.scenarios, sweep, args.latency_ms / 1000, args.jitter_ms / 1000, args.seed)
+    report = {
+        'benchmark_version': BENCHMARK_VERSION,
+        'started_at': started_at.isoformat(),
+        'environment': _environment(),
+        'profile': args.profile,
+        'sweep': sweep,
+        'results': results,
+    }
+
+    output = args.output or os.path.join(DEFAULT_OUTPUT_DIR, f"bench-{started_at:%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for record in results:
+        print(f"{record['scenario']:<13} {json.dumps(record['params'])}: {_headline(record)}")
+    print(f"\n결과를 '{output}'에 저장했습니다.")
+    return 0 if all('error' not in record for record in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+# 스칼라 결과 테이블 (스펙트럼 결과는 spectral_records.SPECTRA_TABLE)
+RESULTS_TABLE = 'meta_atom_dataset'
+# 한 번의 요청으로 가져올 행 수 (PostgREST max-rows 기본값 이하로 유지)
+DEFAULT_PAGE_SIZE = 1000
+# 로컬 캐시 위치와 최대 크기 (환경 변수로 조정 가능)
+DEFAULT_CACHE_DIR = os.environ.get("META_ATOM_CACHE_DIR", ".cache/meta_atom")
+DEFAULT_CACHE_MAX_BYTES = int(os.environ.get("META_ATOM_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+# 파트 파일이 이 개수를 넘으면 하나로 합칩니다.
+COMPACT_PARTS_THRESHOLD = 64
+# 증분 조회 시 워터마크 뒤로 다시 읽는 겹침 구간(초). 가장 긴 쓰기 트랜잭션보다 길어야 합니다.
+WATERMARK_OVERLAP_SECONDS = float(os.environ.get("META_ATOM_WATERMARK_OVERLAP_SECONDS", 300))
+# 키셋 시작점의 id 자리에 쓰는 가장 작은 UUID
+NIL_UUID = '00000000-0000-0000-0000-000000000000'
+
+
+def get_supabase_client() -> Client:
+    """환경 변수에서 Supabase 접속 정보를 읽어 클라이언트를 생성합니다."""
+    load_dotenv()
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_KEY")
+    if not url or not key:
+        raise EnvironmentError("SUPABASE_URL and SUPABASE_KEY 환경 변수를 설정해야 합니다.")
+    return create_client(url, key)
+
+
+def flatten_records(records: list[dict]) -> pd.DataFrame:
+    """
+    'parameters' JSON을 별도의 컬럼으로 벡터화하여 확장합니다. (json_normalize)
+    최상위 컬럼과 이름이 겹치는 파라미터(예: frequency)는 최상위 값을 유지합니다.
+    """
+    df = pd.json_normalize(records, max_level=1)
+    rename = {col: col[len('parameters.'):] for col in df.columns if col.startswith('parameters.')}
+    duplicated = [col for col, name in rename.items() if name in df.columns]
+    df = df.drop(columns=duplicated + (['parameters'] if 'parameters' in df.columns else []))
+    return df.rename(columns=rename)
+
+
+def _with_keyset_columns(columns: str) -> str:
+    """키셋 페이지네이션에 필요한 id, created_at 컬럼을 선택 목록에 추가합니다."""
+    selected = [col.strip() for col in columns.split(',') if col.strip()]
+    for col in ('created_at', 'id'):
+        if col not in selected and '*' not in selected:
+            selected.insert(0, col)
+    return ', '.join(selected)
+
+
+def iter_table_pages(client: Client, table: str, columns: str, filters: dict | None = None, page_size: int = DEFAULT_PAGE_SIZE, after: tuple | None = None):
+    """
+    테이블을 (created_at, id) 키셋 페이지네이션으로 조회하여 페이지 단위 레코드 리스트를 반환합니다.
+    OFFSET을 쓰지 않으므로 테이블 크기와 무관하게 페이지당 비용이 일정하고, PostgREST의 행 수 제한에 걸리지 않습니다.
+    filters는 eq 조건({컬럼: 값}), after=(created_at, id)를 주면 그 이후의 행만 조회합니다.
+    """
+    columns = _with_keyset_columns(columns)
+    cursor = after
+    while True:
+        query = client.table(table).select(columns)
+        for col, value in (filters or {}).items():
+            query = query.eq(col, value)
+        if cursor is not None:
+            created_at, last_id = cursor
+            query = query.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{last_id})')
+        response = query.order('created_at').order('id').limit(page_size).execute()
+
+        records = response.data
+        if not records:
+            return
+        yield records
+
+        if len(records) < page_size:
+            return
+        cursor = (records[-1]['created_at'], records[-1]['id'])
+
+
+def _timestamp(value) -> pd.Timestamp:
+    stamp = pd.Timestamp(value)
+    return stamp.tz_localize('UTC') if stamp.tzinfo is None else stamp
+
+
+def _timestamps(values) -> pd.Series:
+    return pd.to_datetime(pd.Series(list(values), dtype=object), utc=True, format='ISO8601')
+
+
+class IncrementalWatermark:
+    """
+    증분 조회 상태: 마지막으로 받은 행의 (created_at, id) 워터마크와, 아직 커밋되지 않은 행이 있을 수 있는 구간에서 이미 받은 행의 id.
+
+    created_at은 트랜잭션 시작 시각(NOW())이므로, 오래 걸린 쓰기 트랜잭션의 행은 워터마크보다 이른 created_at으로 늦게 커밋될 수 있습니다.
+    조회를 시작한 시각에서 overlap초를 뺀 시점(settled) 이전의 행은 모두 커밋되었다고 보고, 다음 조회는 워터마크와 settled 중
+    이른 쪽부터 다시 읽습니다. 겹쳐 다시 읽은 행은 accept에서 id로 걸러내므로, 기억하는 id는 settled 이후의 행뿐입니다.
+    (settled는 클라이언트 시계 기준이므로 DB와의 시계 차이는 overlap보다 작아야 합니다.)
+    """
+
+    def __init__(self, watermark: tuple | list | None = None, settled: str | None = None, seen: dict | None = None,
+                 overlap: float = WATERMARK_OVERLAP_SECONDS):
+        self.watermark = tuple(watermark) if watermark else None
+        self.settled = settled
+        self.seen = dict(seen or {})  # id -> created_at
+        self.overlap = overlap
+        self._horizon = None
+
+    @classmethod
+    def from_state(cls, state: dict | None, overlap: float = WATERMARK_OVERLAP_SECONDS) -> "IncrementalWatermark":
+        state = state or {}
+        return cls(state.get('watermark'), state.get('settled'), state.get('seen'), overlap)
+
+    def state(self) -> dict:
+        """저장할 상태. settled 이전으로 밀려난 id는 버립니다."""
+        if self._horizon is not None:
+            self.settled = self._horizon.isoformat(timespec='microseconds')
+        if self.settled is None or self.overlap <= 0:
+            self.seen = {}
+        elif self.seen:
+            keep = (_timestamps(self.seen.values()) >= _timestamp(self.settled)).to_numpy()
+            self.seen = {row_id: created_at for (row_id, created_at), kept in zip(self.seen.items(), keep) if kept}
+        return {'watermark': list(self.watermark) if self.watermark else None, 'settled': self.settled, 'seen': self.seen}
+
+    def start(self) -> tuple | None:
+        """이번 조회의 키셋 시작점(after). 조회 직전에 호출합니다."""
+        self._horizon = pd.Timestamp.now(tz='UTC') - pd.Timedelta(seconds=self.overlap)
+        if self.watermark is None or self.settled is None or self.overlap <= 0:
+            return self.watermark
+        if _timestamp(self.watermark[0]) <= _timestamp(self.settled):
+            return self.watermark
+        return (self.settled, NIL_UUID)
+
+    def advance(self, created_at, row_id):
+        """워터마크를 (created_at, id)까지 옮깁니다. 뒤로 가지는 않습니다."""
+        key = (created_at, str(row_id))
+        if self.watermark is None or (_timestamp(key[0]), key[1]) > (_timestamp(self.watermark[0]), self.watermark[1]):
+            self.watermark = key
+
+    def accept(self, records: list[dict]) -> list[dict]:
+        """페이지 하나에서 처음 보는 행만 돌려주고, 워터마크와 settled 이후 행의 id를 갱신합니다."""
+        if not records:
+            return []
+        fresh = [record for record in records if str(record['id']) not in self.seen]
+        if fresh and self.overlap > 0:
+            horizon = self._horizon if self._horizon is not None else pd.Timestamp.now(tz='UTC') - pd.Timedelta(seconds=self.overlap)
+            recent = (_timestamps(record['created_at'] for record in fresh) >= horizon).to_numpy()
+            for record, is_recent in zip(fresh, recent):
+                if is_recent:
+                    self.seen[str(record['id'])] = record['created_at']
+        self.advance(records[-1]['created_at'], records[-1]['id'])
+        return fresh
+
+
+class DatasetCache:
+    """
+    Supabase 테이블 조회 결과를 (테이블, 컬럼, 필터) 키별로 로컬 Parquet 파일에 보관하는 캐시.
+
+    - 동기화: 마지막으로 받은 행의 (created_at, id) 이후만 받아 새 파트 파일로 추가합니다. (증분)
+      늦게 커밋된 행을 놓치지 않도록 최근 WATERMARK_OVERLAP_SECONDS 구간은 다시 읽고 id로 중복을 거릅니다. (IncrementalWatermark)
+      기존 행의 수정(예: is_valid 변경)은 증분 동기화로 반영되지 않으므로, 기존 행을 고치는 쪽(validity.backfill)이
+      invalidate(table)로 해당 테이블의 항목을 지워 다음 동기화에서 전체를 다시 받게 합니다. (또는 refresh=True)
+    - 신선도: 마지막 동기화가 max_age초 이내이면 네트워크 요청 없이 로컬 파일만 읽습니다.
+    - 용량: 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제합니다.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def cache_key(table: str, columns: str, filters: dict | None) -> str:
+        spec = json.dumps({'table': table, 'columns': columns, 'filters': filters or {}}, sort_keys=True, default=str)
+        return hashlib.sha1(spec.encode()).hexdigest()[:16]
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def _read_manifest(self, key: str) -> dict | None:
+        path = os.path.join(self._entry_dir(key), self.MANIFEST)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, key: str, manifest: dict):
+        path = os.path.join(self._entry_dir(key), self.MANIFEST)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def _parts(self, key: str) -> list[str]:
+        directory = self._entry_dir(key)
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.parquet'))
+
+    def sync(self, client: Client, table: str, columns: str, filters: dict | None = None, max_age: float = 0, refresh: bool = False, page_size: int = DEFAULT_PAGE_SIZE) -> str:
+        """캐시 항목을 최신 상태로 맞추고 키를 반환합니다."""
+        key = self.cache_key(table, columns, filters)
+        directory = self._entry_dir(key)
+        manifest = None if refresh else self._read_manifest(key)
+        if manifest is None:
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory, exist_ok=True)
+            manifest = {'table': table, 'columns': columns, 'filters': filters or {}, 'watermark': None, 'rows': 0, 'synced_at': 0, 'next_part': 0}
+
+        if time.time() - manifest['synced_at'] <= max_age:
+            logging.info(f"캐시가 최신 상태입니다 ({table}, {manifest['rows']}행). 동기화를 건너뜁니다.")
+            return key
+
+        progress = IncrementalWatermark.from_state(manifest)
+        added = 0
+        for records in iter_table_pages(client, table, columns, filters, page_size, after=progress.start()):
+            records = progress.accept(records)
+            if records:
+                part_path = os.path.join(directory, f"part-{manifest['next_part']:06d}.parquet")
+                pq.write_table(pa.Table.from_pandas(flatten_records(records), preserve_index=False), part_path)
+                manifest['next_part'] += 1
+            # 파트 파일을 쓴 뒤에 워터마크를 옮겨야 중단되더라도 누락 없이 이어집니다.
+            manifest.update(progress.state())
+            manifest['rows'] += len(records)
+            self._write_manifest(key, manifest)
+            added += len(records)
+
+        manifest.update(progress.state())
+        manifest['synced_at'] = time.time()
+        self._write_manifest(key, manifest)
+        logging.info(f"캐시 동기화 완료 ({table}): 신규 {added}행, 전체 {manifest['rows']}행.")
+
+        if len(self._parts(key)) > COMPACT_PARTS_THRESHOLD:
+            self._compact(key)
+        return key
+
+    def _compact(self, key: str):
+        """여러 파트 파일을 하나로 합칩니다."""
+        parts = self._parts(key)
+        df = self._read_parts(parts)
+        manifest = self._read_manifest(key)
+        compact_path = os.path.join(self._entry_dir(key), f"part-{manifest['next_part']:06d}.parquet")
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), compact_path)
+        manifest['next_part'] += 1
+        self._write_manifest(key, manifest)
+        for path in parts:
+            os.remove(path)
+
+    @staticmethod
+    def _read_parts(parts: list[str]) -> pd.DataFrame:
+        # 파트마다 파라미터 컬럼이 다를 수 있으므로 pandas concat으로 합집합 컬럼을 만듭니다.
+        frames = [pd.read_parquet(path) for path in parts]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def read(self, key: str) -> pd.DataFrame:
+        manifest = self._read_manifest(key)
+        if manifest is not None:
+            manifest['last_access'] = time.time()
+            self._write_manifest(key, manifest)
+        return self._read_parts(self._parts(key))
+
+    def part_paths(self, key: str) -> list[str]:
+        """캐시 항목의 Parquet 파트 파일 경로 목록. DataFrame으로 합치지 않고 청크 단위로 읽을 때 사용합니다."""
+        manifest = self._read_manifest(key)
+        if manifest is None:
+            return []
+        manifest['last_access'] = time.time()
+        self._write_manifest(key, manifest)
+        return self._parts(key)
+
+    def invalidate(self, table: str) -> int:
+        """table을 조회한 캐시 항목을 모두 삭제하고 삭제한 항목 수를 반환합니다. (컬럼/필터와 무관)"""
+        removed = 0
+        for entry in self.entries():
+            if entry['table'] == table:
+                shutil.rmtree(self._entry_dir(entry['key']), ignore_errors=True)
+                removed += 1
+        if removed:
+            logging.info(f"{table}의 로컬 캐시 항목 {removed}개를 삭제했습니다. 다음 동기화에서 다시 받습니다.")
+        return removed
+
+    def entries(self) -> list[dict]:
+        """캐시 항목 목록(키, 크기, 마지막 사용 시각 등)을 반환합니다."""
+        result = []
+        for key in os.listdir(self.root):
+            manifest = self._read_manifest(key)
+            if manifest is None:
+                continue
+            directory = self._entry_dir(key)
+            size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+            result.append({'key': key, 'bytes': size, **manifest})
+        return result
+
+    def evict(self, keep: set | None = None):
+        """전체 크기가 max_bytes 이하가 될 때까지 가장 오래 사용하지 않은 항목부터 삭제합니다."""
+        keep = keep or set()
+        entries = sorted(self.entries(), key=lambda entry: entry.get('last_access', entry['synced_at']))
+        total = sum(entry['bytes'] for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry['key'] in keep:
+                continue
+            shutil.rmtree(self._entry_dir(entry['key']), ignore_errors=True)
+            total -= entry['bytes']
+            logging.info(f"캐시 항목 {entry['key']} ({entry['table']}, {entry['bytes']} bytes)를 삭제했습니다.")
+
+    def load(self, client: Client | None, table: str, columns: str, filters: dict | None = None, max_age: float = 0, refresh: bool = False) -> pd.DataFrame:
+        """캐시를 동기화한 뒤 DataFrame으로 읽습니다. client가 None이면 동기화 없이 로컬 캐시만 읽습니다."""
+        key = self.cache_key(table, columns, filters)
+        if client is not None:
+            key = self.sync(client, table, columns, filters, max_age=max_age, refresh=refresh)
+        elif self._read_manifest(key) is None:
+            return pd.DataFrame()
+        df = self.read(key)
+        self.evict(keep={key})
+        return df
+
+
+def load_dataset(columns: str = 'transmission, phase, frequency, parameters', filters: dict | None = None, max_age: float = 0,
+                 refresh: bool = False, client: Client | None = None, cache: DatasetCache | None = None, table: str = 'meta_atom_dataset') -> pd.DataFrame:
+    """
+    meta_atom_dataset(기본값)을 로컬 캐시를 거쳐 조회하고, 'parameters'가 펼쳐진 DataFrame을 반환합니다.
+    EDA, 모델 학습, 능동 학습, 익스포트 스크립트가 같은 캐시를 공유합니다.
+    """
+    if client is None:
+        client = get_supabase_client()
+    cache = cache or DatasetCache()
+    return cache.load(client, table, columns, filters, max_age=max_age, refresh=refresh)
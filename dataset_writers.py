@@ -0,0 +1,404 @@
+import os
+import json
+import uuid
+import shutil
+from abc import ABC, abstractmethod
+from datetime import date
+import h5py
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from data_access import IncrementalWatermark
+
+# HDF5 데이터셋 청크의 행 수
+HDF5_CHUNK_ROWS = 4096
+# 학습 입력/출력으로 쓰는 컬럼
+INPUT_CANDIDATES = ['radius', 'period', 'frequency']
+OUTPUT_COLS = ['transmission', 'phase']
+
+
+def append_to_hdf5(f: h5py.File, name: str, values: np.ndarray):
+    """2차원 배열을 크기 조절 가능한(chunked, maxshape=None) 데이터셋 끝에 이어 씁니다."""
+    if name not in f:
+        f.create_dataset(
+            name,
+            data=values,
+            maxshape=(None, values.shape[1]),
+            chunks=(HDF5_CHUNK_ROWS, values.shape[1]),
+        )
+        return
+    dataset = f[name]
+    start = dataset.shape[0]
+    dataset.resize(start + len(values), axis=0)
+    dataset[start:] = values
+
+
+class RunningStats:
+    """
+    열 단위 count/mean/M2/min/max를 한 번의 스캔으로 누적하는 통계 (Welford / Chan 병합 공식).
+    청크 단위로 갱신하거나 다른 RunningStats와 병합할 수 있어 전체 데이터를 메모리에 올릴 필요가 없습니다.
+    """
+
+    def __init__(self, n_cols: int):
+        self.count = 0
+        self.mean = np.zeros(n_cols)
+        self.m2 = np.zeros(n_cols)
+        self.min = np.full(n_cols, np.inf)
+        self.max = np.full(n_cols, -np.inf)
+
+    def update(self, values: np.ndarray):
+        """(N, C) 배열 하나로 통계를 갱신합니다."""
+        if len(values) == 0:
+            return
+        other = RunningStats(values.shape[1])
+        other.count = len(values)
+        other.mean = values.mean(axis=0)
+        other.m2 = ((values - other.mean) ** 2).sum(axis=0)
+        other.min = values.min(axis=0)
+        other.max = values.max(axis=0)
+        self.merge(other)
+
+    def merge(self, other: "RunningStats"):
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.count / total)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * (self.count * other.count / total)
+        self.count = total
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+
+    @property
+    def var(self) -> np.ndarray:
+        return self.m2 / self.count if self.count > 0 else np.zeros_like(self.m2)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var)
+
+    def save(self, group: h5py.Group, columns: list):
+        for key in ('mean', 'm2', 'min', 'max'):
+            group.attrs[key] = getattr(self, key)
+        group.attrs['count'] = self.count
+        group.attrs['columns'] = columns
+
+    @classmethod
+    def load(cls, group: h5py.Group) -> "RunningStats":
+        stats = cls(len(group.attrs['columns']))
+        stats.count = int(group.attrs['count'])
+        for key in ('mean', 'm2', 'min', 'max'):
+            setattr(stats, key, np.asarray(group.attrs[key], dtype=np.float64))
+        return stats
+
+
+def normalize_hdf5(f: h5py.File, input_stats: RunningStats, output_stats: RunningStats):
+    """
+    원본 데이터셋('inputs_raw'/'outputs_raw')을 청크 단위로 읽어 min/max 정규화한 'inputs'/'outputs'를 다시 씁니다.
+    분모가 0인(모든 값이 동일한) 열은 0.5로 채웁니다.
+    """
+    for raw_name, name, stats in (('inputs_raw', 'inputs', input_stats), ('outputs_raw', 'outputs', output_stats)):
+        if name in f:
+            del f[name]
+        raw = f[raw_name]
+        span = stats.max - stats.min
+        flat = span == 0
+        width = np.where(flat, 1, span)
+        normalized = f.create_dataset(name, shape=raw.shape, dtype=np.float32, maxshape=(None, raw.shape[1]), chunks=raw.chunks)
+        for start in range(0, raw.shape[0], HDF5_CHUNK_ROWS):
+            block = (raw[start:start + HDF5_CHUNK_ROWS] - stats.min) / width
+            block[:, flat] = 0.5
+            normalized[start:start + HDF5_CHUNK_ROWS] = block
+
+
+class DatasetWriter(ABC):
+    """
+    익스포트 청크(flatten_records 결과 DataFrame)를 저장 포맷으로 기록하는 writer 인터페이스.
+    progress는 마지막으로 기록한 행의 (created_at, id) 워터마크와 겹침 구간의 id(IncrementalWatermark)이며,
+    이어 쓰기 시 progress.start() 이후의 행을 조회해 progress.accept()로 이미 기록한 행을 거릅니다.
+    """
+
+    progress: IncrementalWatermark
+
+    @property
+    def watermark(self) -> tuple | None:
+        return self.progress.watermark
+
+    @abstractmethod
+    def write_chunk(self, chunk: pd.DataFrame) -> int:
+        """청크 하나를 기록하고, 기록한 행 수를 반환합니다."""
+
+    @abstractmethod
+    def close(self) -> dict | None:
+        """남은 데이터를 기록하고 파일을 닫습니다. 컬럼별 요약 통계를 반환합니다. (데이터가 없으면 None)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class HDF5Writer(DatasetWriter):
+    """
+    학습용 dense float32 행렬을 HDF5에 기록합니다.
+    원본 값은 'inputs_raw'/'outputs_raw'에, 정규화 통계(Welford)는 'stats/inputs', 'stats/outputs' 그룹 속성에 따로 저장하고,
+    워터마크는 파일 속성(watermark_created_at, watermark_id)으로, 겹침 구간 상태는 'watermark_state' 데이터셋(JSON)으로 기록합니다.
+
+    새 파일에는 기존 형식의 독자를 위해 정규화된 'inputs'/'outputs'도 씁니다.
+    append=True로 기존 파일에 이어 쓸 때는 이 사본을 전체 통계로 다시 쓰지 않고(파일 전체를 다시 쓰게 되므로) 그대로 두며,
+    사본이 덮는 행 수를 파일 속성 'normalized_rows'에 남깁니다. normalize=True를 주면 이어 쓸 때도 사본을 새로 씁니다.
+    (training_bridge 등 원본을 읽는 소비자는 저장된 통계로 즉석에서 정규화하므로 영향이 없습니다.)
+    """
+
+    def __init__(self, filename: str = "meta_atom_dataset.h5", append: bool = False, normalize: bool | None = None):
+        self.filename = filename
+        self.f = h5py.File(filename, 'a' if append else 'w')
+        # 기본값: 새로 만드는 파일만 정규화 사본을 씀 (이어 쓰기는 원본 *_raw와 통계만 갱신)
+        self.normalize = normalize if normalize is not None else not (append and 'stats' in self.f)
+        self.input_cols, self.input_stats, self.output_stats = None, None, None
+        self.progress = IncrementalWatermark()
+        self.added = 0
+        if append and 'stats' in self.f:
+            self.input_cols = list(self.f.attrs['input_cols'])
+            self.input_stats = RunningStats.load(self.f['stats/inputs'])
+            self.output_stats = RunningStats.load(self.f['stats/outputs'])
+            if 'watermark_state' in self.f:
+                self.progress = IncrementalWatermark.from_state(json.loads(self.f['watermark_state'][()]))
+            elif 'watermark_created_at' in self.f.attrs:
+                self.progress = IncrementalWatermark((self.f.attrs['watermark_created_at'], self.f.attrs['watermark_id']))
+            print(f"기존 파일에 이어 씁니다. 워터마크: {self.watermark}, 기존 행 수: {self.input_stats.count}")
+
+    def write_chunk(self, chunk: pd.DataFrame) -> int:
+        f = self.f
+        if self.input_cols is None:
+            self.input_cols = [col for col in INPUT_CANDIDATES if col in chunk.columns]
+            self.input_stats, self.output_stats = RunningStats(len(self.input_cols)), RunningStats(len(OUTPUT_COLS))
+            f.attrs['input_cols'] = self.input_cols
+            f.attrs['output_cols'] = OUTPUT_COLS
+        cols = self.input_cols + OUTPUT_COLS
+        missing = set(cols) - set(chunk.columns)
+        if missing:
+            raise ValueError(f"DataFrame에 필요한 컬럼이 없습니다: {missing}")
+
+        values = chunk[cols].apply(pd.to_numeric, errors='coerce').dropna().to_numpy(dtype=np.float64)
+        if len(values) > 0:
+            n_in = len(self.input_cols)
+            inputs, outputs = values[:, :n_in], values[:, n_in:]
+            append_to_hdf5(f, 'inputs_raw', inputs.astype(np.float32))
+            append_to_hdf5(f, 'outputs_raw', outputs.astype(np.float32))
+            self.input_stats.update(inputs)
+            self.output_stats.update(outputs)
+            self.input_stats.save(f.require_group('stats/inputs'), self.input_cols)
+            self.output_stats.save(f.require_group('stats/outputs'), OUTPUT_COLS)
+            self.added += len(values)
+
+        # 청크를 기록한 뒤에 워터마크를 옮겨야 중단되더라도 다음 실행에서 누락 없이 이어집니다.
+        last = chunk.iloc[-1]
+        self.progress.advance(last['created_at'], last['id'])
+        f.attrs['watermark_created_at'], f.attrs['watermark_id'] = self.watermark
+        if 'watermark_state' in f:
+            del f['watermark_state']
+        f.create_dataset('watermark_state', data=json.dumps(self.progress.state()))
+        f.flush()
+        return len(values)
+
+    def close(self) -> dict | None:
+        if not self.f.id.valid:
+            return None
+        try:
+            if self.input_stats is None or self.input_stats.count == 0:
+                return None
+            if self.normalize:
+                normalize_hdf5(self.f, self.input_stats, self.output_stats)
+            if 'inputs' in self.f:
+                self.f.attrs['normalized_rows'] = self.f['inputs'].shape[0]
+            stats = {}
+            for cols, running in ((self.input_cols, self.input_stats), (OUTPUT_COLS, self.output_stats)):
+                for i, col in enumerate(cols):
+                    stats[col] = {'min': running.min[i], 'max': running.max[i], 'mean': running.mean[i], 'std': running.std[i]}
+            print(f"'{self.filename}' 파일에 {self.added}개 행을 새로 기록했습니다. (전체 {self.input_stats.count}개)")
+            return stats
+        finally:
+            self.f.close()
+
+
+class ParquetWriter(DatasetWriter):
+    """
+    원본 파라미터 컬럼과 job_id, created_at을 유지한 채 파티션된 Parquet 데이터셋(hive 형식)으로 기록합니다.
+    partition_by='frequency_band'이면 frequency를 band_width 폭의 구간('10-15' 등)으로, 'export_date'이면 익스포트 날짜로 나눕니다.
+    파티션마다 ParquetWriter를 하나씩 열어 row_group_size 단위로 row group을 쓰므로, 읽는 쪽은 컬럼 pruning과
+    파티션/통계 기반 predicate pushdown으로 필요한 부분만 스캔합니다.
+    워터마크와 겹침 구간 상태는 루트 디렉터리의 '_export_state.json'에 기록하며, 이어 쓰기 시 새 part 파일이 추가됩니다.
+    append가 아니면 HDF5Writer의 'w' 모드처럼 기존 파티션 디렉터리와 상태 파일을 지우고 새로 씁니다.
+    """
+
+    STATE_FILE = '_export_state.json'
+
+    def __init__(self, root_path: str = "meta_atom_dataset_parquet", partition_by: str = 'frequency_band',
+                 band_width: float = 5.0, compression: str = 'zstd', row_group_size: int = 128 * 1024,
+                 append: bool = False):
+        if partition_by not in ('frequency_band', 'export_date'):
+            raise ValueError(f"지원하지 않는 파티션 기준입니다: '{partition_by}' (frequency_band, export_date 중 선택)")
+        self.root_path = root_path
+        self.partition_by = partition_by
+        self.band_width = band_width
+        self.compression = compression
+        self.row_group_size = max(1, row_group_size)
+        self.export_date = date.today().isoformat()
+        self.schema: pa.Schema | None = None
+        self._writers: dict[str, pq.ParquetWriter] = {}
+        self._buffers: dict[str, list[pa.Table]] = {}
+        self._buffered_rows: dict[str, int] = {}
+        self._file_tag = uuid.uuid4().hex[:12]
+        self.stats = None
+        self.progress = IncrementalWatermark()
+        self.added = 0
+        self._closed = False
+
+        os.makedirs(root_path, exist_ok=True)
+        state_path = os.path.join(root_path, self.STATE_FILE)
+        if not append:
+            self._clear()
+        elif os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+            self.progress = IncrementalWatermark.from_state(state)
+            print(f"기존 Parquet 데이터셋에 이어 씁니다. 워터마크: {self.watermark}")
+
+    def _clear(self):
+        """이전 익스포트의 파티션(hive 형식 'frequency_band=...', 'export_date=...')과 상태 파일을 지웁니다. 그 밖의 파일은 그대로 둡니다."""
+        removed = 0
+        for name in os.listdir(self.root_path):
+            path = os.path.join(self.root_path, name)
+            if name == self.STATE_FILE:
+                os.remove(path)
+            elif os.path.isdir(path) and name.startswith(('frequency_band=', 'export_date=')):
+                shutil.rmtree(path)
+                removed += 1
+        if removed:
+            print(f"기존 Parquet 파티션 {removed}개를 지우고 새로 씁니다.")
+
+    def _partition_labels(self, chunk: pd.DataFrame) -> pd.Series:
+        if self.partition_by == 'export_date':
+            return pd.Series(self.export_date, index=chunk.index)
+        frequency = pd.to_numeric(chunk['frequency'], errors='coerce')
+        lower = np.floor(frequency / self.band_width) * self.band_width
+        names = {lo: f"{lo:g}-{lo + self.band_width:g}" for lo in lower.dropna().unique()}
+        return lower.map(names).fillna('unknown')
+
+    @staticmethod
+    def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+        """없는 컬럼은 null로 채우고 schema의 순서와 타입으로 맞춥니다."""
+        columns = [table.column(f.name) if f.name in table.column_names else pa.nulls(table.num_rows, f.type) for f in schema]
+        return pa.Table.from_arrays(columns, schema=schema.remove_metadata()).cast(schema)
+
+    def _to_table(self, frame: pd.DataFrame) -> pa.Table:
+        table = pa.Table.from_pandas(frame, preserve_index=False).replace_schema_metadata(None)
+        if self.schema is None:
+            self.schema = table.schema
+            return table
+        # 청크마다 파라미터 키와 타입(전부 null, int/float)이 다를 수 있으므로 스키마를 합치고 넓은 타입으로 올립니다.
+        merged = pa.unify_schemas([self.schema, table.schema], promote_options='permissive')
+        if not merged.equals(self.schema):
+            self._evolve(merged)
+        return self._conform(table, self.schema)
+
+    def _evolve(self, schema: pa.Schema):
+        """
+        스키마가 바뀌면 열려 있는 part 파일을 닫고 이후 row group은 새 part 파일에 씁니다.
+        (Parquet 파일 하나는 스키마가 하나이므로, 파일 간 차이는 read_parquet_dataset에서 합칩니다.)
+        """
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+        self._file_tag = uuid.uuid4().hex[:12]
+        self.schema = schema
+        for label, tables in self._buffers.items():
+            self._buffers[label] = [self._conform(table, schema) for table in tables]
+
+    def write_chunk(self, chunk: pd.DataFrame) -> int:
+        frame = chunk.drop(columns=['is_valid'], errors='ignore').copy()
+        frame['created_at'] = pd.to_datetime(frame['created_at'], utc=True, format='ISO8601')
+        for col in OUTPUT_COLS + ['frequency']:
+            frame[col] = pd.to_numeric(frame[col], errors='coerce')
+        labels = self._partition_labels(frame)
+
+        for label, part in frame.groupby(labels, sort=False):
+            table = self._to_table(part)
+            self._buffers.setdefault(label, []).append(table)
+            self._buffered_rows[label] = self._buffered_rows.get(label, 0) + table.num_rows
+            if self._buffered_rows[label] >= self.row_group_size:
+                self._flush_partition(label)
+
+        numeric = frame[[col for col in INPUT_CANDIDATES + OUTPUT_COLS if col in frame.columns]]
+        values = numeric.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        values = values[~np.isnan(values).any(axis=1)]
+        if self.stats is None:
+            self.stats = (list(numeric.columns), RunningStats(values.shape[1]))
+        self.stats[1].update(values)
+
+        last = chunk.iloc[-1]
+        self.progress.advance(last['created_at'], last['id'])
+        self.added += len(frame)
+        return len(frame)
+
+    def _flush_partition(self, label: str):
+        tables = self._buffers.pop(label, [])
+        self._buffered_rows.pop(label, None)
+        if not tables:
+            return
+        writer = self._writers.get(label)
+        if writer is None:
+            directory = os.path.join(self.root_path, f"{self.partition_by}={label}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{self._file_tag}.parquet")
+            writer = pq.ParquetWriter(path, self.schema, compression=self.compression)
+            self._writers[label] = writer
+        writer.write_table(pa.concat_tables(tables), row_group_size=self.row_group_size)
+
+    def close(self) -> dict | None:
+        if self._closed:
+            return None
+        self._closed = True
+        for label in list(self._buffers):
+            self._flush_partition(label)
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+        # 모든 part 파일을 닫은 뒤에 워터마크를 기록해야 중단 시 누락이 생기지 않습니다.
+        if self.watermark is not None:
+            with open(os.path.join(self.root_path, self.STATE_FILE), 'w') as f:
+                json.dump(self.progress.state(), f)
+
+        if self.stats is None or self.stats[1].count == 0:
+            return None
+        cols, running = self.stats
+        print(f"'{self.root_path}' Parquet 데이터셋에 {self.added}개 행을 새로 기록했습니다.")
+        return {col: {'min': running.min[i], 'max': running.max[i], 'mean': running.mean[i], 'std': running.std[i]}
+                for i, col in enumerate(cols)}
+
+
+def read_parquet_dataset(root_path: str, columns: list | None = None, frequency_band: str | None = None, expression=None) -> pd.DataFrame:
+    """
+    파티션된 Parquet 데이터셋에서 필요한 컬럼/파티션만 읽습니다. expression에 pyarrow.dataset 필터를 추가로 줄 수 있습니다.
+    예: read_parquet_dataset(path, ['radius', 'period', 'phase'], frequency_band='10-15')
+    """
+    dataset = ds.dataset(root_path, format='parquet', partitioning='hive')
+    # part 파일마다 스키마가 다를 수 있으므로(나중에 추가된 파라미터 컬럼, int → float) 전체 파일의 스키마를 합칩니다.
+    schema = pa.unify_schemas([dataset.schema] + [pq.read_schema(path) for path in dataset.files], promote_options='permissive')
+    if not schema.equals(dataset.schema):
+        dataset = ds.dataset(root_path, format='parquet', partitioning='hive', schema=schema)
+    if frequency_band is not None:
+        band_filter = ds.field('frequency_band') == frequency_band
+        expression = band_filter if expression is None else expression & band_filter
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+WRITERS: dict[str, type[DatasetWriter]] = {
+    'hdf5': HDF5Writer,
+    'parquet': ParquetWriter,
+}
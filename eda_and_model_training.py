@@ -1,119 +1,171 @@
 
 import os
+import json
+import argparse
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.neural_network import MLPRegressor
 from sklearn.metrics import mean_squared_error
 import numpy as np
-from supabase import create_client, Client
-
-# Manual .env file parsing function
-def get_env_vars(env_path='.env'):
-    env_vars = {}
-    if os.path.exists(env_path):
-        with open(env_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    if '=' in line:
-                        key, value = line.split('=', 1)
-                        env_vars[key] = value
-    return env_vars
+from data_access import RESULTS_TABLE, DatasetCache, get_supabase_client, load_dataset
+from streaming_eda import (DEFAULT_CHUNK_ROWS, DEFAULT_DENSITY_BINS, DEFAULT_HIST_BINS, DEFAULT_SAMPLE_SIZE, EDAOptions,
+                           parse_pairs, run_streaming_eda)
+from surrogate import SurrogateRegressor, angular_error
+
+# EDA가 읽는 캐시 항목 (load_data_from_supabase와 같은 키를 공유합니다)
+EDA_COLUMNS = "transmission, phase, frequency, parameters"
+EDA_FILTERS = {'is_valid': 'true'}
 
 def load_data_from_supabase():
     """
-    Supabase의 meta_atom_dataset 테이블에서 데이터를 불러옵니다.
+    Supabase의 meta_atom_dataset 테이블에서 유효한(is_valid) 데이터를 불러옵니다.
+    로컬 캐시(data_access)를 거치므로 반복 실행 시 새로 추가된 행만 내려받습니다.
     """
-    env_vars = get_env_vars(env_path=os.path.join(os.getcwd(), '.env'))
-    supabase_url = env_vars.get("SUPABASE_URL")
-    supabase_key = env_vars.get("SUPABASE_KEY")
-
-    if not supabase_url or not supabase_key:
+    try:
+        df = load_dataset(columns=EDA_COLUMNS, filters=EDA_FILTERS)
+    except EnvironmentError:
         print("Supabase URL 또는 Key가 .env 파일에 설정되지 않았습니다.")
         return None
 
-    supabase: Client = create_client(supabase_url, supabase_key)
-    response = supabase.table("meta_atom_dataset").select("transmission", "phase", "frequency", "parameters").execute()
-    
-    if response.data:
-        df = pd.DataFrame(response.data)
-        # parameters 컬럼의 내용을 각각의 컬럼으로 펼치기
-        parameters_df = df['parameters'].apply(pd.Series)
-        df = pd.concat([df.drop(['parameters'], axis=1), parameters_df], axis=1)
-        return df
+    if not df.empty:
+        # parameters 컬럼은 캐시에 저장될 때 이미 각각의 컬럼으로 펼쳐져 있습니다.
+        return df.drop(columns=['id', 'created_at'], errors='ignore')
     else:
         print("데이터를 불러오지 못했습니다.")
         return None
 
-def main():
+
+
+def resolve_source(source: str | None, offline: bool = False):
     """
-    데이터 분석 및 모델 학습을 수행하는 메인 함수
+    EDA 입력을 정합니다. source가 없으면 로컬 캐시를 (offline이 아니면 증분 동기화한 뒤) 파트 파일 목록으로 반환합니다.
+    익스포트한 HDF5 파일이나 Parquet 디렉터리를 지정하면 그대로 사용합니다.
     """
-    df = load_data_from_supabase()
+    if source:
+        return source
+    cache = DatasetCache()
+    key = cache.cache_key(RESULTS_TABLE, EDA_COLUMNS, EDA_FILTERS)
+    if not offline:
+        try:
+            key = cache.sync(get_supabase_client(), RESULTS_TABLE, EDA_COLUMNS, EDA_FILTERS)
+        except EnvironmentError:
+            print("Supabase URL 또는 Key가 .env 파일에 설정되지 않았습니다. 로컬 캐시만 사용합니다.")
+    paths = cache.part_paths(key)
+    if not paths:
+        print("데이터를 불러오지 못했습니다.")
+        return None
+    return paths
 
-    if df is None:
-        return
 
-    print("### 데이터 샘플 ###")
-    print(df.head())
-    print()
+def shade(counts: np.ndarray) -> np.ma.MaskedArray:
+    """
+    집계된 카운트를 히스토그램 평활화(eq_hist)로 [0, 1] 색상 값으로 바꿉니다. (datashader 방식)
+    빈 칸은 마스킹하여 배경으로 남기고, 밀도가 크게 차이 나도 희소한 구간이 보이도록 순위 기준으로 칠합니다.
+    """
+    filled = counts > 0
+    shaded = np.zeros(counts.shape)
+    if filled.any():
+        levels = np.unique(counts[filled])
+        shaded[filled] = (np.searchsorted(levels, counts[filled]) + 1) / len(levels)
+    return np.ma.masked_where(~filled, shaded)
 
-    # 1. 탐색적 데이터 분석 (EDA)
-    print("### 1. 탐색적 데이터 분석 (EDA) ###")
-    
-    # 히트맵 생성
+
+def plot_correlation(summary, path: str):
+    corr = pd.DataFrame(summary.covariance.correlation(), index=summary.columns, columns=summary.columns)
     plt.figure(figsize=(10, 8))
-    sns.heatmap(df.corr(), annot=True, cmap='viridis', fmt='.2f')
-    plt.title('Feature Correlation Heatmap')
-    plt.savefig('heatmap.png')
+    sns.heatmap(corr, annot=True, cmap='viridis', fmt='.2f', vmin=-1, vmax=1)
+    plt.title(f'Feature Correlation Heatmap (n={summary.rows:,})')
+    plt.savefig(path)
+    plt.close()
+
+
+def plot_density(grid, x: str, y: str, path: str):
+    """2차원 카운트 격자를 한 장의 이미지로 그립니다. 점을 하나씩 그리지 않으므로 행 수와 무관하게 빠릅니다."""
+    x_edges, y_edges = grid.edges(0), grid.edges(1)
+    plt.figure(figsize=(10, 6))
+    plt.imshow(shade(grid.counts).T, origin='lower', aspect='auto', cmap='viridis', interpolation='nearest',
+               extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]))
+    plt.colorbar(label='Density (eq_hist rank)')
+    plt.title(f'{y} vs. {x} (n={grid.total:,})')
+    plt.xlabel(x)
+    plt.ylabel(y)
+    plt.savefig(path)
+    plt.close()
+
+
+def plot_histogram(summary, column: str, path: str):
+    grid = summary.histograms[column]
+    p5, p50, p95 = summary.quantiles[column].quantiles([0.05, 0.5, 0.95])
+    plt.figure(figsize=(10, 6))
+    plt.stairs(grid.counts, grid.edges(0), fill=True)
+    for value, label in ((p5, 'p5'), (p50, 'median'), (p95, 'p95')):
+        plt.axvline(value, color='tab:red', linestyle='--', linewidth=1, label=f'{label} = {value:.3g}')
+    plt.title(f'{column.capitalize()} Distribution')
+    plt.xlabel(column.capitalize())
+    plt.ylabel('Frequency')
+    plt.legend()
+    plt.savefig(path)
+    plt.close()
+
+
+def run_eda_report(summary, output_dir: str = '.'):
+    """스트리밍 요약으로 히트맵, 밀도 이미지, 분포 히스토그램, 불균형 체크, 요약 JSON을 만듭니다."""
+    os.makedirs(output_dir, exist_ok=True)
+    stats = summary.column_stats()
+
+    print("### 1. 탐색적 데이터 분석 (EDA) ###")
+    print(pd.DataFrame({col: {k: v for k, v in s.items() if k != 'quantiles'} for col, s in stats.items()}).T)
+    with open(os.path.join(output_dir, 'eda_summary.json'), 'w') as f:
+        json.dump(summary.to_dict(), f, ensure_ascii=False, indent=2)
+    print(f"- 컬럼별 통계, 분위수, 상관계수를 '{os.path.join(output_dir, 'eda_summary.json')}' 파일로 저장했습니다.")
+
+    plot_correlation(summary, os.path.join(output_dir, 'heatmap.png'))
     print("- 특징(feature) 간의 상관관계 히트맵을 'heatmap.png' 파일로 저장했습니다.")
 
-    # 반지름(r1)과 위상(phase)의 관계
-    if 'r1' in df.columns:
-        plt.figure(figsize=(10, 6))
-        sns.scatterplot(data=df, x='r1', y='phase')
-        plt.title('Phase vs. Radius (r1)')
-        plt.xlabel('Radius (r1)')
-        plt.ylabel('Phase')
-        plt.grid(True)
-        plt.savefig('phase_vs_radius.png')
-        print("- 반지름(r1)과 위상(phase)의 관계를 'phase_vs_radius.png' 파일로 저장했습니다.")
+    for (x, y), grid in summary.densities.items():
+        if grid.empty:
+            continue
+        # 반지름(r1)과 위상(phase)의 관계는 기존 파일 이름을 유지합니다.
+        name = 'phase_vs_radius.png' if (x, y) == ('r1', 'phase') else f'density_{y}_vs_{x}.png'
+        plot_density(grid, x, y, os.path.join(output_dir, name))
+        print(f"- {x}와 {y}의 2차원 밀도를 '{name}' 파일로 저장했습니다.")
     print()
 
-    # 2. 데이터 불균형 체크
     print("### 2. 데이터 불균형 체크 ###")
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df['phase'], bins=30, kde=True)
-    plt.title('Phase Distribution')
-    plt.xlabel('Phase')
-    plt.ylabel('Frequency')
-    plt.savefig('phase_distribution.png')
+    if 'phase' not in summary.histograms or summary.histograms['phase'].empty:
+        print("- 위상(phase) 데이터가 없습니다.")
+        print()
+        return
+    plot_histogram(summary, 'phase', os.path.join(output_dir, 'phase_distribution.png'))
     print("- 위상(phase) 데이터 분포 히스토그램을 'phase_distribution.png' 파일로 저장했습니다.")
-    
-    # 데이터 쏠림 현상 분석
-    phase_min = df['phase'].min()
-    phase_max = df['phase'].max()
-    if df[(df['phase'] < phase_min + (phase_max - phase_min) * 0.1) | (df['phase'] > phase_max - (phase_max - phase_min) * 0.1)].shape[0] > df.shape[0] * 0.5:
+
+    # 데이터 쏠림 현상 분석 (양 끝 10% 구간에 절반 이상이 몰려 있는지 히스토그램 카운트로 판단)
+    phase_min, phase_max = stats['phase']['min'], stats['phase']['max']
+    margin = (phase_max - phase_min) * 0.1
+    if summary.histograms['phase'].fraction_outside(phase_min + margin, phase_max - margin) > 0.5:
         print("- 제안: 위상 데이터가 특정 구간에 편중되어 있을 수 있습니다. 모델 성능 향상을 위해 SMOTE (Synthetic Minority Over-sampling Technique) 같은 오버샘플링 기법을 고려해볼 수 있습니다.")
     else:
         print("- 위상 데이터 분포가 비교적 균일합니다.")
     print()
 
-    # 3. 학습 가시성 테스트 (간단한 MLP 모델)
+
+def run_learnability_test(df: pd.DataFrame, output_dir: str = '.'):
+    """균등 표본으로 간단한 MLP 대리 모델을 학습해 데이터에 학습 가능한 패턴이 있는지 확인합니다."""
     print("### 3. 학습 가시성 테스트 ###")
-    
+    print(f"- 전체 데이터에서 균등 추출한 {len(df):,}개 행으로 학습합니다.")
+
     # Feature와 Target 설정
-    # 예시: 반지름(r1, r2)과 간격(l1)으로 위상(phase) 예측
+    # 예시: 반지름(r1, r2)과 간격(l1)으로 투과율(transmission)과 위상(phase)을 함께 예측
     features = [col for col in ['r1', 'r2', 'l1', 'frequency'] if col in df.columns]
     if not features:
         print("- 모델 학습에 필요한 feature (r1, r2, l1, frequency)가 데이터에 없습니다.")
         return
 
+    df = df.dropna(subset=features + ['transmission', 'phase'])
     X = df[features]
-    y = df['phase']
+    y = df[['transmission', 'phase']]
 
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
@@ -122,8 +174,8 @@ def main():
     X_train_scaled = scaler.fit_transform(X_train)
     X_test_scaled = scaler.transform(X_test)
 
-    # MLP 모델 생성 및 학습
-    mlp = MLPRegressor(hidden_layer_sizes=(64, 32), max_iter=500, random_state=42, early_stopping=True)
+    # 다중 출력 MLP 대리 모델 생성 및 학습 (위상은 sin/cos 헤드로 학습)
+    mlp = SurrogateRegressor(hidden_layer_sizes=(64, 32), angle_outputs=(1,), epochs=500, random_state=42)
     mlp.fit(X_train_scaled, y_train)
 
     # 학습 곡선 (Loss Curve)
@@ -133,17 +185,55 @@ def main():
     plt.xlabel('Epochs')
     plt.ylabel('Loss (MSE)')
     plt.grid(True)
-    plt.savefig('learning_curve.png')
+    plt.savefig(os.path.join(output_dir, 'learning_curve.png'))
+    plt.close()
     print("- MLP 모델의 학습 곡선(Learning Curve)을 'learning_curve.png' 파일로 저장했습니다.")
 
     # 예측 및 평가
     y_pred = mlp.predict(X_test_scaled)
-    mse = mean_squared_error(y_test, y_pred)
-    print(f"- 테스트 데이터에 대한 최종 예측 오차 (MSE): {mse:.4f}")
+    mse = mean_squared_error(y_test['transmission'], y_pred[:, 0])
+    phase_mse = np.mean(angular_error(y_test['phase'], y_pred[:, 1]) ** 2)
+    print(f"- 테스트 데이터에 대한 최종 예측 오차 (MSE): transmission {mse:.4f}, phase {phase_mse:.4f}")
     if len(mlp.loss_curve_) > 1 and mlp.loss_curve_[0] > mlp.loss_curve_[-1]:
         print("- 확인: 모델의 예측 오차(Loss)가 학습을 통해 성공적으로 감소했습니다. 데이터에 학습 가능한 패턴이 존재합니다.")
     else:
         print("- 경고: 모델의 예측 오차가 충분히 감소하지 않았습니다. 데이터, 모델 구조, 또는 하이퍼파라미터를 재검토해야 합니다.")
 
+
+def main():
+    """
+    데이터 분석 및 모델 학습을 수행하는 메인 함수.
+    데이터 전체를 메모리에 올리지 않고, 청크 단위 한 번의 스캔(프로세스 병렬)으로 병합 가능한 스케치를 만들어 보고서를 그립니다.
+    """
+    parser = argparse.ArgumentParser(description="메타 원자 데이터셋 EDA 보고서와 학습 가시성 테스트")
+    parser.add_argument('--source', default=None, help="익스포트한 HDF5 파일 또는 Parquet 파일/디렉터리 (기본값: 로컬 캐시)")
+    parser.add_argument('--offline', action='store_true', help="Supabase와 동기화하지 않고 로컬 캐시만 사용")
+    parser.add_argument('--output-dir', default='.', help="이미지와 요약 JSON을 저장할 디렉터리")
+    parser.add_argument('--workers', type=int, default=None, help="청크를 처리할 프로세스 수 (기본값: CPU 코어 수)")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help="청크 하나의 최대 행 수")
+    parser.add_argument('--bins', type=int, default=DEFAULT_HIST_BINS, help="히스토그램 최대 구간 수")
+    parser.add_argument('--density-bins', type=int, default=DEFAULT_DENSITY_BINS, help="2차원 밀도 이미지의 축당 최대 구간 수")
+    parser.add_argument('--pair', action='append', help="2차원 밀도를 그릴 컬럼 쌍 (예: r1:phase, 여러 번 지정 가능, 기본값: 파라미터 × 출력)")
+    parser.add_argument('--sample-size', type=int, default=DEFAULT_SAMPLE_SIZE, help="학습 가시성 테스트에 쓸 균등 표본 크기")
+    parser.add_argument('--skip-training', action='store_true', help="학습 가시성 테스트를 건너뜁니다")
+    args = parser.parse_args()
+
+    source = resolve_source(args.source, offline=args.offline)
+    if source is None:
+        return
+
+    sample_size = 0 if args.skip_training else args.sample_size
+    options = EDAOptions(pairs=parse_pairs(args.pair), hist_bins=args.bins, density_bins=args.density_bins, sample_size=sample_size)
+    summary = run_streaming_eda(source, workers=args.workers, chunk_rows=args.chunk_rows, options=options)
+    if summary.rows == 0:
+        print("데이터를 불러오지 못했습니다.")
+        return
+    print(f"### 데이터 요약: {summary.rows:,}개 행, 컬럼 {summary.columns} ###")
+    print()
+
+    run_eda_report(summary, args.output_dir)
+    if not args.skip_training:
+        run_learnability_test(pd.DataFrame(summary.sample.rows, columns=summary.columns), args.output_dir)
+
 if __name__ == "__main__":
     main()
@@ -1,41 +1,50 @@
 
 import os
+import argparse
 import h5py
 import numpy as np
 import pandas as pd
-from dotenv import load_dotenv
-from supabase import create_client, Client
-
-def get_supabase_client() -> Client:
-    """환경 변수에서 Supabase 접속 정보를 읽어 클라이언트를 생성합니다."""
-    load_dotenv()
-    url = os.environ.get("SUPABASE_URL")
-    key = os.environ.get("SUPABASE_KEY")
-    if not url or not key:
-        raise EnvironmentError("SUPABASE_URL and SUPABASE_KEY 환경 변수를 설정해야 합니다.")
-    return create_client(url, key)
-
-def fetch_valid_data(client: Client) -> pd.DataFrame:
-    """Supabase에서 유효한 데이터를 조회하여 Pandas DataFrame으로 변환합니다."""
+from supabase import Client
+from data_access import DEFAULT_PAGE_SIZE, DatasetCache, IncrementalWatermark, flatten_records, get_supabase_client, iter_table_pages
+from dataset_writers import WRITERS, DatasetWriter, HDF5Writer, RunningStats, append_to_hdf5
+from spectral_records import FREQUENCY_SWEEP_KEY, SPECTRAL_ARRAYS, iter_spectral_pages, records_to_arrays
+
+# 익스포트에 사용하는 컬럼
+EXPORT_COLUMNS = 'id, job_id, created_at, transmission, phase, frequency, parameters'
+
+
+def iter_valid_data_chunks(client: Client, page_size: int = DEFAULT_PAGE_SIZE, columns: str = EXPORT_COLUMNS, after: tuple | None = None,
+                           progress: IncrementalWatermark | None = None):
+    """
+    유효한 데이터를 (created_at, id) 키셋 페이지네이션으로 조회하여 청크 단위 DataFrame으로 반환합니다.
+    after=(created_at, id)를 주면 그 이후의 행만 조회합니다. progress를 주면 겹침 구간부터 다시 읽고 이미 받은 행을 거릅니다.
+    """
+    if progress is not None:
+        after = progress.start()
+    for records in iter_table_pages(client, 'meta_atom_dataset', columns, {'is_valid': 'true'}, page_size, after=after):
+        if progress is not None:
+            records = progress.accept(records)
+            if not records:
+                continue
+        yield flatten_records(records)
+
+
+def fetch_valid_data(client: Client, page_size: int = DEFAULT_PAGE_SIZE, refresh_cache: bool = False) -> pd.DataFrame:
+    """
+    Supabase에서 유효한 데이터를 조회하여 Pandas DataFrame으로 변환합니다.
+    로컬 캐시(data_access.DatasetCache)를 거치므로 이전 실행 이후 추가된 행만 내려받습니다.
+    """
     print("Supabase에서 유효한 데이터를 조회합니다...")
-    response = client.table('meta_atom_dataset').select(
-        'transmission, phase, frequency, parameters, is_valid'
-    ).eq('is_valid', 'true').execute()
+    cache = DatasetCache()
+    key = cache.sync(client, 'meta_atom_dataset', EXPORT_COLUMNS, {'is_valid': 'true'}, refresh=refresh_cache, page_size=page_size)
+    df = cache.read(key)
+    cache.evict(keep={key})
 
-    if not response.data:
+    if df.empty:
         print("조회된 데이터가 없습니다.")
         return pd.DataFrame()
 
-    print(f"총 {len(response.data)}개의 유효한 데이터를 조회했습니다.")
-    
-    df = pd.DataFrame(response.data)
-
-    # 'parameters' 컬럼의 JSON을 별도의 컬럼으로 확장
-    parameters_df = df['parameters'].apply(pd.Series)
-    
-    # 원래 DataFrame과 병합
-    df = pd.concat([df.drop('parameters', axis=1), parameters_df], axis=1)
-    
+    print(f"총 {len(df)}개의 유효한 데이터를 조회했습니다.")
     return df
 
 def normalize_data(df: pd.DataFrame):
@@ -79,8 +88,12 @@ def normalize_data(df: pd.DataFrame):
     return normalized_df, input_cols, output_cols, stats
 
 
-def save_to_hdf5(df: pd.DataFrame, input_cols: list, output_cols: list, filename="meta_atom_dataset.h5"):
-    """정규화된 데이터를 HDF5 파일로 저장합니다."""
+def save_to_hdf5(df: pd.DataFrame, input_cols: list, output_cols: list, filename="meta_atom_dataset.h5", mode='w'):
+    """
+    정규화된 데이터를 HDF5 파일로 저장합니다. mode='a'이면 기존 데이터셋 뒤에 이어 씁니다.
+    스트리밍 익스포트(HDF5Writer)와 같은 구성으로 원본 값('inputs_raw'/'outputs_raw')과 통계('stats' 그룹)도 함께 저장하여
+    streaming_eda가 원래 단위로 읽을 수 있게 합니다.
+    """
     print(f"HDF5 파일({filename}) 저장을 시작합니다...")
     
     # 정규화된 컬럼명
@@ -90,28 +103,112 @@ def save_to_hdf5(df: pd.DataFrame, input_cols: list, output_cols: list, filename
     inputs_normalized = df[norm_input_cols].values.astype(np.float32)
     outputs_normalized = df[norm_output_cols].values.astype(np.float32)
 
-    with h5py.File(filename, 'w') as f:
-        f.create_dataset('inputs', data=inputs_normalized)
-        f.create_dataset('outputs', data=outputs_normalized)
+    with h5py.File(filename, mode) as f:
+        append_to_hdf5(f, 'inputs', inputs_normalized)
+        append_to_hdf5(f, 'outputs', outputs_normalized)
+        for raw_name, group_name, cols in (('inputs_raw', 'stats/inputs', input_cols), ('outputs_raw', 'stats/outputs', output_cols)):
+            values = df[cols].to_numpy(dtype=np.float64)
+            append_to_hdf5(f, raw_name, values.astype(np.float32))
+            running = RunningStats.load(f[group_name]) if group_name in f else RunningStats(len(cols))
+            running.update(values)
+            running.save(f.require_group(group_name), cols)
+        f.attrs['input_cols'] = input_cols
+        f.attrs['output_cols'] = output_cols
     
     print(f"'{filename}' 파일에 데이터 저장을 완료했습니다.")
 
 
+def export_streaming(client: Client, filename="meta_atom_dataset.h5", page_size: int = DEFAULT_PAGE_SIZE, append: bool = False, normalize: bool | None = None, writer: DatasetWriter | None = None):
+    """
+    데이터를 청크 단위로 조회하여 writer(기본값: HDF5Writer)로 바로 기록하는 스트리밍 익스포트.
+    writer의 워터마크 이후 행만 조회하므로 append 모드에서는 새로 추가된 행만 내려받습니다.
+    메모리 사용량은 테이블 크기와 무관하게 청크 하나 분량으로 일정합니다.
+    """
+    if writer is None:
+        writer = HDF5Writer(filename, append=append, normalize=normalize)
+    print(f"스트리밍 익스포트를 시작합니다 (페이지 크기: {page_size}).")
+
+    added = 0
+    try:
+        for chunk in iter_valid_data_chunks(client, page_size, progress=writer.progress):
+            added += writer.write_chunk(chunk)
+            print(f"- {added}개 행 기록 완료")
+    finally:
+        # 중단되더라도 기록된 청크까지의 워터마크를 남깁니다.
+        stats = writer.close()
+
+    if stats is None:
+        print("조회된 데이터가 없습니다.")
+        return None
+    input_cols = [col for col in stats if col not in ('transmission', 'phase')]
+    return stats, input_cols, ['transmission', 'phase']
+
+
+def _spectral_parameter_names(records: list[dict]) -> list[str]:
+    """스펙트럼 레코드의 parameters에서 숫자형 파라미터 이름을 정렬된 순서로 고릅니다. (frequency_sweep 제외)"""
+    names = set()
+    for record in records:
+        names.update(key for key, value in record['parameters'].items()
+                     if key != FREQUENCY_SWEEP_KEY and isinstance(value, (int, float)) and not isinstance(value, bool))
+    return sorted(names)
+
+
+def export_spectra_hdf5(client: Client, filename: str = "meta_atom_spectra.h5", parameter_names: list[str] | None = None, page_size: int = DEFAULT_PAGE_SIZE) -> int:
+    """
+    스펙트럼을 페이지 단위로 조회하여 주파수 점 수(F)별 그룹('n_points_<F>')의 (N, F) 데이터셋
+    (frequency, transmission, phase, s21_re, ...)과 (N, P) 'parameters' 데이터셋에 바로 이어 씁니다. 기록한 형상 수를 반환합니다.
+    그룹 안의 모든 데이터셋은 같은 행 순서(i번째 행 = i번째 형상)를 갖도록, 일부 레코드에만 없는 S-파라미터는 NaN으로 채웁니다.
+    끝까지 기록한 뒤에 파일을 바꾸므로 중간에 실패해도 반쯤 쓰인 파일이 남지 않습니다.
+    """
+    print(f"스펙트럼 익스포트를 시작합니다 (페이지 크기: {page_size}).")
+    written = 0
+    present: dict[str, set] = {}  # 그룹별로 값이 한 번이라도 있었던 배열 컬럼
+    tmp_filename = filename + '.tmp'
+    try:
+        with h5py.File(tmp_filename, 'w') as f:
+            for records in iter_spectral_pages(client, page_size):
+                if parameter_names is None:
+                    parameter_names = _spectral_parameter_names(records)
+                    f.attrs['parameter_names'] = parameter_names
+                by_points: dict[int, list] = {}
+                for record in records:
+                    by_points.setdefault(int(record['n_points']), []).append(record)
+                for n_points, group_records in by_points.items():
+                    group = f.require_group(f"n_points_{n_points}")
+                    group.attrs['n_points'] = n_points
+                    for name, values in records_to_arrays(group_records, parameter_names, fill_missing=True).items():
+                        append_to_hdf5(group, name, values)
+                    present.setdefault(group.name, set()).update(
+                        name for record in group_records for name in SPECTRAL_ARRAYS if record.get(name) is not None)
+                written += len(records)
+                print(f"- 스펙트럼 {written}개 기록 완료")
+            # 어느 레코드에도 없던 S-파라미터(예: s11)는 전부 NaN이므로 지웁니다.
+            for group_name, names in present.items():
+                for name in SPECTRAL_ARRAYS:
+                    if name not in names and name in f[group_name]:
+                        del f[group_name][name]
+            f.attrs['n_points'] = sorted(f[group_name].attrs['n_points'] for group_name in present)
+        os.replace(tmp_filename, filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+    if written == 0:
+        print("조회된 스펙트럼이 없습니다.")
+    return written
+
+
 def print_summary_report(df: pd.DataFrame, stats: dict, input_cols: list, output_cols: list):
     """데이터셋의 통계 요약 리포트를 출력합니다."""
-    print("
---- 데이터셋 통계 요약 리포트 ---")
+    print("\n--- 데이터셋 통계 요약 리포트 ---")
     print(f"총 데이터 개수: {len(df)}")
     
     display_cols = input_cols + output_cols
     summary = df[display_cols].describe().transpose()
     
-    print("
-[원본 데이터 통계]")
+    print("\n[원본 데이터 통계]")
     print(summary[['count', 'mean', 'std', 'min', 'max']])
     
-    print("
-[정규화 정보 (Min/Max)]")
+    print("\n[정규화 정보 (Min/Max)]")
     for col, values in stats.items():
         if col in display_cols:
             print(f"- {col}: min={values['min']:.4f}, max={values['max']:.4f}")
@@ -119,27 +216,69 @@ def print_summary_report(df: pd.DataFrame, stats: dict, input_cols: list, output
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="meta_atom_dataset을 HDF5/Parquet 파일로 익스포트합니다.")
+    parser.add_argument('--stream', action='store_true', help="청크 단위 스트리밍 익스포트 (메모리 사용량 일정)")
+    parser.add_argument('--append', action='store_true', help="기존 파일의 워터마크 이후 데이터만 이어 쓰기 (--stream 포함)")
+    parser.add_argument('--renormalize', action='store_true', help="--append 시 정규화된 inputs/outputs 사본도 전체 통계로 다시 쓰기 (기본값: 기존 사본 유지, 원본 *_raw만 갱신)")
+    parser.add_argument('--format', choices=sorted(WRITERS), default='hdf5', help="출력 포맷 (parquet은 스트리밍 전용)")
+    parser.add_argument('--partition-by', choices=['frequency_band', 'export_date'], default='frequency_band', help="Parquet 파티션 기준")
+    parser.add_argument('--band-width', type=float, default=5.0, help="frequency_band 파티션의 주파수 구간 폭")
+    parser.add_argument('--compression', default='zstd', help="Parquet 압축 코덱 (zstd, snappy, gzip, none 등)")
+    parser.add_argument('--row-group-size', type=int, default=128 * 1024, help="Parquet row group 행 수")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help="한 번에 조회할 행 수")
+    parser.add_argument('--refresh-cache', action='store_true', help="로컬 캐시를 무시하고 전체를 다시 내려받기 (일괄 익스포트)")
+    parser.add_argument('--spectral', action='store_true', help="meta_atom_spectra의 스펙트럼을 (N, F) HDF5 데이터셋으로 익스포트")
+    parser.add_argument('--output', default=None, help="출력 경로 (기본값: meta_atom_dataset.h5 / meta_atom_dataset_parquet / meta_atom_spectra.h5)")
+    args = parser.parse_args()
+    if args.output is None:
+        if args.spectral:
+            args.output = "meta_atom_spectra.h5"
+        else:
+            args.output = "meta_atom_dataset_parquet" if args.format == 'parquet' else "meta_atom_dataset.h5"
+
     try:
         supabase_client = get_supabase_client()
-        raw_df = fetch_valid_data(supabase_client)
-
-        if not raw_df.empty:
-            normalized_df, inputs, outputs, norm_stats = normalize_data(raw_df)
-            save_to_hdf5(normalized_df, inputs, outputs)
-            print_summary_report(normalized_df, norm_stats, inputs, outputs)
-            
-            print("
-작업이 성공적으로 완료되었습니다.")
-            print("생성된 파일: export_dataset.py, requirements.txt, meta_atom_dataset.h5")
-            print("
-[다음 단계]")
-            print("1. Python 가상환경을 생성하고 활성화하세요: python -m venv .venv && source .venv/bin/activate")
-            print("2. pip install -r requirements.txt 명령어로 라이브러리를 설치하세요.")
-            print("3. .env 파일을 프로젝트 루트에 생성하고 Supabase 접속 정보를 추가하세요.")
-            print("   SUPABASE_URL=YOUR_SUPABASE_URL")
-            print("   SUPABASE_KEY=YOUR_SUPABASE_KEY")
-            print("4. python export_dataset.py 스크립트를 실행하여 HDF5 파일을 생성하세요.")
+        if args.spectral:
+            if export_spectra_hdf5(supabase_client, args.output, page_size=args.page_size):
+                print(f"\n'{args.output}' 파일에 스펙트럼 저장을 완료했습니다.")
+        elif args.format == 'parquet' or args.stream or args.append:
+            dataset_writer = None
+            if args.format == 'parquet':
+                dataset_writer = WRITERS['parquet'](
+                    args.output,
+                    partition_by=args.partition_by,
+                    band_width=args.band_width,
+                    compression=None if args.compression == 'none' else args.compression,
+                    row_group_size=args.row_group_size,
+                    append=args.append,
+                )
+            result = export_streaming(
+                supabase_client, args.output, args.page_size,
+                append=args.append, normalize=True if args.renormalize else None, writer=dataset_writer,
+            )
+            if result is not None:
+                norm_stats, inputs, outputs = result
+                print("\n[정규화 정보 (Min/Max, Mean/Std)]")
+                for col, values in norm_stats.items():
+                    print(f"- {col}: min={values['min']:.4f}, max={values['max']:.4f}, mean={values['mean']:.4f}, std={values['std']:.4f}")
+                print("\n작업이 성공적으로 완료되었습니다.")
+        else:
+            raw_df = fetch_valid_data(supabase_client, args.page_size, args.refresh_cache)
+
+            if not raw_df.empty:
+                normalized_df, inputs, outputs, norm_stats = normalize_data(raw_df)
+                save_to_hdf5(normalized_df, inputs, outputs, args.output)
+                print_summary_report(normalized_df, norm_stats, inputs, outputs)
+
+                print("\n작업이 성공적으로 완료되었습니다.")
+                print("생성된 파일: export_dataset.py, requirements.txt, meta_atom_dataset.h5")
+                print("\n[다음 단계]")
+                print("1. Python 가상환경을 생성하고 활성화하세요: python -m venv .venv && source .venv/bin/activate")
+                print("2. pip install -r requirements.txt 명령어로 라이브러리를 설치하세요.")
+                print("3. .env 파일을 프로젝트 루트에 생성하고 Supabase 접속 정보를 추가하세요.")
+                print("   SUPABASE_URL=YOUR_SUPABASE_URL")
+                print("   SUPABASE_KEY=YOUR_SUPABASE_KEY")
+                print("4. python export_dataset.py 스크립트를 실행하여 HDF5 파일을 생성하세요.")
 
     except (EnvironmentError, ValueError, Exception) as e:
-        print(f"
-오류가 발생했습니다: {e}")
+        print(f"\n오류가 발생했습니다: {e}")
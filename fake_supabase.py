@@ -0,0 +1,384 @@
+import re
+import time
+import uuid
+import random
+import asyncio
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from job_queue import InMemoryJobQueue
+
+# data_access.iter_table_pages가 보내는 (created_at, id) 키셋 조건
+_KEYSET_PATTERN = re.compile(r'created_at\.gt\."([^"]+)",and\(created_at\.eq\."([^"]+)",id\.gt\.([^)]+)\)')
+_EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass
+class FakeResponse:
+    """postgrest APIResponse에서 워커/익스포트 코드가 쓰는 부분(data, count)만 흉내 냅니다."""
+    data: list | int | bool | None
+    count: int | None = None
+
+
+def _sort_key(value):
+    return '' if value is None else value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _equals(value, target) -> bool:
+    # PostgREST 필터 값은 문자열로 전달되므로 eq('is_valid', 'true')도 True와 같게 취급
+    return value == target or str(value).lower() == str(target).lower()
+
+
+def _project(row: dict, columns: list[str] | None) -> dict:
+    if columns is None:
+        return dict(row)
+    return {col: row.get(col) for col in columns}
+
+
+class _DictTable:
+    """행을 id → dict로 보관하는 테이블. 조회는 전체 스캔이므로 작은 테이블(작업 큐, 신규 결과)에 사용합니다."""
+
+    def __init__(self, rows: dict | None = None):
+        self.rows: dict = {} if rows is None else rows
+        self._created = 0
+        # upsert on_conflict 컬럼별 값 → 행 (처음 쓰일 때 만들고 삽입마다 갱신)
+        self._indexes: dict[str, dict] = {}
+
+    def _stamp(self, row: dict) -> dict:
+        row = dict(row)
+        row.setdefault('id', str(uuid.uuid4()))
+        # 삽입 순서와 (created_at, id) 순서가 같도록 단조 증가하는 시각을 부여
+        self._created += 1
+        row.setdefault('created_at', (_EPOCH + timedelta(microseconds=self._created)).isoformat(timespec='microseconds'))
+        return row
+
+    def insert(self, rows: list[dict]) -> list[dict]:
+        inserted = [self._stamp(row) for row in rows]
+        for row in inserted:
+            self.rows[row['id']] = row
+        self._update_indexes(inserted)
+        return inserted
+
+    def _update_indexes(self, rows: list[dict]):
+        for column, index in self._indexes.items():
+            index.update((row[column], row) for row in rows if row.get(column) is not None)
+
+    def upsert(self, rows: list[dict], on_conflict: str | None, ignore_duplicates: bool) -> list[dict]:
+        if not on_conflict:
+            return self.insert(rows)
+        if on_conflict not in self._indexes:
+            self._indexes[on_conflict] = {row[on_conflict]: row for row in self.rows.values() if row.get(on_conflict) is not None}
+        existing = self._indexes[on_conflict]
+        written = []
+        for row in rows:
+            current = existing.get(row.get(on_conflict))
+            if current is None:
+                current = self.insert([row])[0]
+                written.append(current)
+            elif not ignore_duplicates:
+                current.update(row)
+                written.append(current)
+        return written
+
+    def select(self, filters: list, orders: list, limit: int | None) -> tuple[list[dict], int]:
+        matched = [row for row in self.rows.values() if all(f(row) for f in filters)]
+        for col, desc in reversed(orders):
+            matched.sort(key=lambda row: _sort_key(row.get(col)), reverse=desc)
+        return (matched[:limit] if limit is not None else matched), len(matched)
+
+    def update(self, payload: dict, filters: list) -> list[dict]:
+        matched = [row for row in self.rows.values() if all(f(row) for f in filters)]
+        for row in matched:
+            row.update(payload)
+        return matched
+
+
+class _JobsTable(_DictTable):
+    """simulation_jobs. 행은 InMemoryJobQueue와 공유하므로 RPC(claim 등)와 테이블 조회가 같은 상태를 봅니다."""
+
+    def __init__(self, queue: InMemoryJobQueue):
+        super().__init__(queue.jobs)
+        self.queue = queue
+
+    def insert(self, rows: list[dict]) -> list[dict]:
+        inserted = [self.queue.add_job(self._stamp(row)) for row in rows]
+        self._update_indexes([self.rows[row['id']] for row in inserted])
+        return inserted
+
+
+class SyntheticDataset:
+    """
+    n_rows개의 meta_atom_dataset 행을 저장하지 않고, 요청된 페이지만 인덱스로부터 결정적으로 생성하는 읽기 전용 테이블.
+    (created_at, id) 키셋 페이지 조회 비용이 페이지 크기에만 비례하므로 10^7행 규모의 익스포트도 메모리 없이 재현합니다.
+    """
+
+    def __init__(self, n_rows: int, parameter_names: list[str], seed: int = 0):
+        self.n_rows = n_rows
+        self.parameter_names = list(parameter_names)
+        self.seed = seed
+
+    @staticmethod
+    def row_id(index: int) -> str:
+        return f"00000000-0000-0000-0000-{index:012d}"
+
+    def _unit(self, indices: np.ndarray, column: int) -> np.ndarray:
+        """(인덱스, 열)마다 고정된 [0, 1) 값 (splitmix64 해시)."""
+        x = indices.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) + np.uint64((self.seed * 1000003 + column) & 0xFFFFFFFF)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+        return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+    def columns(self, start: int, stop: int) -> dict[str, np.ndarray]:
+        """[start, stop) 구간 행의 값을 열 단위 배열로 생성합니다. (벤치마크 데이터프레임 생성에도 사용)"""
+        indices = np.arange(start, stop)
+        frequency = 1 + 19 * self._unit(indices, 0)
+        values = {
+            'frequency': frequency,
+            'transmission': (0.1 + 0.89 * self._unit(indices, 1)) / (1 + (frequency / 10) ** 2),
+            'phase': -180 + 360 * self._unit(indices, 2),
+        }
+        for k, name in enumerate(self.parameter_names):
+            values[name] = 50 + 450 * self._unit(indices, 3 + k)
+        return values
+
+    def select(self, filters: list, orders: list, limit: int | None, after_index: int = -1) -> tuple[list[dict], int]:
+        start = after_index + 1
+        stop = self.n_rows if limit is None else min(self.n_rows, start + limit)
+        if start >= stop:
+            return [], self.n_rows
+        values = self.columns(start, stop)
+        rows = []
+        for offset, index in enumerate(range(start, stop)):
+            rows.append({
+                'id': self.row_id(index),
+                'created_at': (_EPOCH + timedelta(microseconds=index)).isoformat(timespec='microseconds'),
+                'job_id': None,
+                'transmission': float(values['transmission'][offset]),
+                'phase': float(values['phase'][offset]),
+                'frequency': float(values['frequency'][offset]),
+                'parameters': {name: float(values[name][offset]) for name in self.parameter_names},
+                'param_hash': None,
+                'is_valid': True,
+            })
+        return [row for row in rows if all(f(row) for f in filters)], self.n_rows
+
+    def insert(self, rows: list[dict]) -> list[dict]:
+        raise NotImplementedError("SyntheticDataset은 읽기 전용입니다.")
+
+    upsert = update = insert
+
+
+class FakeQuery:
+    """supabase-py 쿼리 빌더 중 이 저장소가 쓰는 메서드(select/insert/upsert/update/eq/in_/or_/order/limit)만 구현합니다."""
+
+    def __init__(self, client: 'FakeSupabase', table: str):
+        self.client = client
+        self.table_name = table
+        self.op = 'select'
+        self.columns: list[str] | None = None
+        self.payload = None
+        self.on_conflict = None
+        self.ignore_duplicates = False
+        self.want_count = False
+        self.filters: list = []
+        self.orders: list[tuple[str, bool]] = []
+        self.limit_rows: int | None = None
+        self.keyset: tuple[str, str] | None = None
+
+    def select(self, columns: str = '*', count: str | None = None):
+        self.op = 'select'
+        names = [col.strip() for col in columns.split(',') if col.strip()]
+        self.columns = None if '*' in names else names
+        self.want_count = count is not None
+        return self
+
+    def insert(self, rows):
+        self.op, self.payload = 'insert', rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: str | None = None, ignore_duplicates: bool = False):
+        self.op, self.payload = 'upsert', rows if isinstance(rows, list) else [rows]
+        self.on_conflict, self.ignore_duplicates = on_conflict, ignore_duplicates
+        return self
+
+    def update(self, payload: dict):
+        self.op, self.payload = 'update', payload
+        return self
+
+    def eq(self, column: str, value):
+        self.filters.append(lambda row: _equals(row.get(column), value))
+        return self
+
+    def in_(self, column: str, values):
+        allowed = {str(value) for value in values}
+        self.filters.append(lambda row: str(row.get(column)) in allowed)
+        return self
+
+    def or_(self, expression: str):
+        match = _KEYSET_PATTERN.fullmatch(expression)
+        if match is None:
+            raise NotImplementedError(f"지원하지 않는 or_ 조건입니다: {expression}")
+        created_at, _, last_id = match.groups()
+        self.keyset = (created_at, last_id)
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, n: int):
+        self.limit_rows = n
+        return self
+
+    def _run(self) -> FakeResponse:
+        table = self.client.get_table(self.table_name)
+        with self.client.lock:
+            if self.op == 'insert':
+                return FakeResponse([dict(row) for row in table.insert(self.payload)])
+            if self.op == 'upsert':
+                return FakeResponse([dict(row) for row in table.upsert(self.payload, self.on_conflict, self.ignore_duplicates)])
+            if self.op == 'update':
+                return FakeResponse([dict(row) for row in table.update(self.payload, self.filters)])
+            if isinstance(table, SyntheticDataset):
+                after = int(self.keyset[1].rsplit('-', 1)[1]) if self.keyset else -1
+                rows, count = table.select(self.filters, self.orders, self.limit_rows, after)
+            else:
+                filters = self.filters
+                if self.keyset:
+                    created_at, last_id = self.keyset
+                    filters = filters + [lambda row: (_sort_key(row.get('created_at')), str(row.get('id'))) > (created_at, last_id)]
+                rows, count = table.select(filters, self.orders, self.limit_rows)
+            return FakeResponse([_project(row, self.columns) for row in rows], count if self.want_count else None)
+
+    def execute(self) -> FakeResponse:
+        self.client.record(self.table_name, self.op, len(self.payload) if isinstance(self.payload, list) else 1)
+        return self._run()
+
+
+class FakeRpc:
+    def __init__(self, client: 'FakeSupabase', name: str, params: dict):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def _run(self) -> FakeResponse:
+        queue, p = self.client.queue, self.params
+        if self.name == 'claim_simulation_jobs':
+            return FakeResponse(queue.claim(p['p_worker_id'], p['p_batch_size'], p.get('p_lease_seconds', 300)))
+        if self.name == 'heartbeat_simulation_jobs':
+            return FakeResponse(queue.heartbeat(p['p_worker_id'], p['p_job_ids'], p.get('p_lease_seconds', 300)))
+        if self.name == 'reap_expired_simulation_jobs':
+            return FakeResponse(queue.reap_expired())
+        if self.name == 'fail_simulation_jobs':
+            return FakeResponse(queue.fail(p['p_worker_id'], p['p_job_ids'], p['p_error_message'], p.get('p_retryable', True)))
+        if self.name == 'checkpoint_simulation_job':
+            return FakeResponse(queue.checkpoint(p['p_worker_id'], p['p_job_id'], p['p_progress'], p['p_checkpoint'], p.get('p_lease_seconds', 300)))
+        if self.name == 'set_simulation_job_costs':
+            updated = 0
+            with queue._lock:
+                for job_id, cost in zip(p['p_job_ids'], p['p_costs']):
+                    job = queue.jobs.get(job_id)
+                    if job is not None and job['status'] == 'pending':
+                        job['estimated_cost'] = cost
+                        updated += 1
+            return FakeResponse(updated)
+        raise NotImplementedError(f"지원하지 않는 RPC입니다: {self.name}")
+
+    def execute(self) -> FakeResponse:
+        self.client.record('rpc', self.name, 1)
+        return self._run()
+
+
+class FakeSupabase:
+    """
+    벤치마크/오프라인 실행용 인메모리 Supabase 클라이언트.
+    simulation_jobs는 InMemoryJobQueue로, 나머지 테이블은 dict 또는 SyntheticDataset으로 보관하며,
+    요청마다 latency + U(0, jitter)초의 지연과 행당 per_row_latency초를 주입해 네트워크 왕복을 흉내 냅니다.
+    스레드 안전하며, 요청 수는 requests 카운터에 (테이블, 연산)별로 집계됩니다.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, per_row_latency: float = 0.0, seed: int = 0,
+                 queue: InMemoryJobQueue | None = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.per_row_latency = per_row_latency
+        self.queue = queue or InMemoryJobQueue()
+        self.tables: dict = {'simulation_jobs': _JobsTable(self.queue)}
+        self.lock = threading.RLock()
+        self.requests: Counter = Counter()
+        self._rng = random.Random(seed)
+
+    def get_table(self, name: str):
+        with self.lock:
+            if name not in self.tables:
+                self.tables[name] = _DictTable()
+            return self.tables[name]
+
+    def add_synthetic_table(self, name: str, n_rows: int, parameter_names: list[str], seed: int = 0) -> SyntheticDataset:
+        dataset = SyntheticDataset(n_rows, parameter_names, seed)
+        self.tables[name] = dataset
+        return dataset
+
+    def delay(self, n_rows: int = 1) -> float:
+        with self.lock:
+            jitter = self._rng.uniform(0, self.jitter) if self.jitter else 0.0
+        return self.latency + jitter + self.per_row_latency * n_rows
+
+    def record(self, table: str, op: str, n_rows: int = 1):
+        with self.lock:
+            self.requests[f"{table}.{op}"] += 1
+        delay = self.delay(n_rows)
+        if delay > 0:
+            time.sleep(delay)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: dict | None = None) -> FakeRpc:
+        return FakeRpc(self, name, params or {})
+
+    def as_async(self) -> 'AsyncFakeSupabase':
+        """같은 상태를 공유하는 asyncio 버전 (async_worker.AsyncWorker용)."""
+        return AsyncFakeSupabase(self)
+
+
+class _AsyncCall:
+    """동기 쿼리/RPC를 감싸 execute()를 코루틴으로 만들고, 지연은 asyncio.sleep으로 주입합니다."""
+
+    def __init__(self, call, client: FakeSupabase):
+        self._call = call
+        self._client = client
+
+    def __getattr__(self, name):
+        method = getattr(self._call, name)
+
+        def builder(*args, **kwargs):
+            method(*args, **kwargs)
+            return self
+        return builder
+
+    async def execute(self) -> FakeResponse:
+        payload = getattr(self._call, 'payload', None)
+        n_rows = len(payload) if isinstance(payload, list) else 1
+        table = getattr(self._call, 'table_name', 'rpc')
+        op = getattr(self._call, 'op', None) or self._call.name
+        with self._client.lock:
+            self._client.requests[f"{table}.{op}"] += 1
+        delay = self._client.delay(n_rows)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._call._run()
+
+
+class AsyncFakeSupabase:
+    def __init__(self, client: FakeSupabase):
+        self.sync = client
+
+    def table(self, name: str) -> _AsyncCall:
+        return _AsyncCall(self.sync.table(name), self.sync)
+
+    def rpc(self, name: str, params: dict | None = None) -> _AsyncCall:
+        return _AsyncCall(self.sync.rpc(name, params), self.sync)
@@ -1,54 +1,68 @@
 
 import os
+import argparse
+from dataclasses import dataclass
 import numpy as np
 import pandas as pd
 from supabase import create_client, Client
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.neural_network import MLPRegressor
 from dotenv import load_dotenv
 import logging
+from data_access import load_dataset
+from acquisition import acquire_batch, fit_bootstrap_ensemble
+from job_scheduling import ACTIVE_LEARNING_PRIORITY, DEFAULT_PRIORITY, RUNTIME_MODEL_PATH, RuntimeModel, annotate_jobs
+from result_cache import dedupe_new_jobs, parameter_hash
+from surrogate import SurrogateRegressor, angular_error
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def load_data_from_supabase() -> pd.DataFrame | None:
+# --- 파이프라인 설정 ---
+PARAMETER_FEATURES = ['r1', 'r2', 'l1', 'frequency']
+TARGET_VARIABLE = 'phase'
+N_BINS_FOR_SPARSITY_CHECK = 5  # 파라미터 공간을 나눌 구간 수
+SPARSITY_THRESHOLD = 2         # 셀 당 데이터 개수 임계값
+N_NEW_JOBS_TO_GENERATE = 100   # 생성할 신규 작업 수
+N_ENSEMBLE_MEMBERS = 5         # 불확실성 추정용 부트스트랩 앙상블 크기
+ACQUISITION_WEIGHTS = (0.5, 0.3, 0.2)  # (불확실성, 희소도, 고오차 근접도) 가중치
+DIVERSITY = 0.5                # 배치 선택 시 다양성 비중 (0: 점수만, 1: 거리만)
+N_CANDIDATES = 1_000_000       # 희소 구간에서 뽑을 후보 수 (대량 후보는 불확실성으로 먼저 걸러냄)
+N_SCORED_CANDIDATES = 100_000  # 희소도/다양성까지 계산할 후보 수
+SURROGATE_CHECKPOINT = os.getenv("SURROGATE_CHECKPOINT", "checkpoints/surrogate_phase.pt")  # warm start용 체크포인트
+# ---------------------
+
+def load_data_from_supabase(max_age: float = 0) -> pd.DataFrame | None:
     """
-    Supabase의 meta_atom_dataset 테이블에서 데이터를 로드하고 전처리합니다.
+    Supabase의 meta_atom_dataset 테이블에서 물리적 정합성 검증을 통과한(is_valid) 데이터를 로드하고 전처리합니다.
+    로컬 캐시(data_access)를 거치므로 이전 실행 이후 추가된 행만 내려받습니다.
     """
-    load_dotenv()
-    supabase_url = os.getenv("SUPABASE_URL")
-    supabase_key = os.getenv("SUPABASE_KEY")
-
-    if not supabase_url or not supabase_key:
+    try:
+        df = load_dataset(columns="transmission, phase, frequency, parameters", filters={'is_valid': 'true'}, max_age=max_age)
+    except EnvironmentError:
         logging.error("Supabase URL 또는 Key가 .env 파일에 설정되지 않았습니다.")
         return None
-
-    try:
-        supabase: Client = create_client(supabase_url, supabase_key)
-        response = supabase.table("meta_atom_dataset").select("transmission, phase, frequency, parameters").execute()
-        
-        if response.data:
-            logging.info(f"{len(response.data)}개의 데이터를 Supabase에서 로드했습니다.")
-            df = pd.DataFrame(response.data)
-            parameters_df = df['parameters'].apply(pd.Series)
-            df = pd.concat([df.drop(['parameters'], axis=1), parameters_df], axis=1)
-            # 데이터 타입이 object일 경우 numeric으로 변환
-            for col in parameters_df.columns:
-                if df[col].dtype == 'object':
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            df.dropna(inplace=True) # 변환 실패한 행 제거
-            return df
-        else:
-            logging.warning("데이터를 불러오지 못했습니다.")
-            return None
     except Exception as e:
         logging.error(f"Supabase 데이터 로드 중 오류 발생: {e}")
         return None
 
-def train_model(df: pd.DataFrame, features: list, target: str) -> tuple[MLPRegressor, StandardScaler] | None:
+    if df.empty:
+        logging.warning("데이터를 불러오지 못했습니다.")
+        return None
+
+    logging.info(f"{len(df)}개의 데이터를 로드했습니다.")
+    df = df.drop(columns=['id', 'created_at'], errors='ignore')
+    # 데이터 타입이 object일 경우 numeric으로 변환
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    df.dropna(inplace=True) # 변환 실패한 행 제거
+    return df
+
+def train_model(df: pd.DataFrame, features: list, target: str, checkpoint: str | None = None) -> tuple[SurrogateRegressor, StandardScaler] | None:
     """
-    주어진 데이터로 MLP 회귀 모델을 학습시킵니다.
+    주어진 데이터로 PyTorch 대리 모델(surrogate)을 미니배치 학습시킵니다.
+    checkpoint가 있으면 이전 주기의 모델에서 이어서 학습하고, 학습이 끝나면 같은 경로에 저장합니다.
     """
     if not all(feature in df.columns for feature in features):
         logging.error(f"데이터에 필요한 모든 특징(features)이 없습니다. 필요: {features}")
@@ -63,64 +77,114 @@ def train_model(df: pd.DataFrame, features: list, target: str) -> tuple[MLPRegre
     scaler = StandardScaler()
     X_train_scaled = scaler.fit_transform(X_train)
 
-    mlp = MLPRegressor(hidden_layer_sizes=(64, 32), max_iter=500, random_state=42, early_stopping=True, n_iter_no_change=15)
-    mlp.fit(X_train_scaled, y_train)
+    # 위상은 (sin, cos)으로 학습하여 ±180° 경계의 랩어라운드를 피합니다.
+    model = SurrogateRegressor(
+        angle_outputs=(0,) if target == 'phase' else (),
+        patience=15,
+        checkpoint=checkpoint,
+        random_state=42,
+    )
+    model.fit(X_train_scaled, y_train)
+    if checkpoint:
+        # 예측 서비스(prediction_service.py)가 원래 단위의 입력을 받을 수 있도록 scaler도 함께 저장
+        model.save(metadata={'features': list(features), 'outputs': [target], 'input_scaler': scaler})
+
+    logging.info(f"모델 학습 완료. 최종 Loss (MSE): {model.loss_curve_[-1]:.4f}")
+    return model, scaler
 
-    logging.info(f"모델 학습 완료. 최종 Loss (MSE): {mlp.loss_:.4f}")
-    return mlp, scaler
+def _cell_keys(cells: np.ndarray) -> np.ndarray:
+    """(N, D) 정수 셀 좌표를 정렬/비교 가능한 1차원 키 배열로 변환합니다. (행 단위 바이트 뷰)"""
+    cells = np.ascontiguousarray(cells, dtype=np.int64)
+    return cells.view(np.dtype((np.void, cells.dtype.itemsize * cells.shape[1]))).ravel()
 
-def find_sparse_regions(df: pd.DataFrame, parameters: list, n_bins: int = 5, threshold: int = 1) -> list[dict]:
+
+def find_sparse_regions(df: pd.DataFrame, parameters: list, n_bins: int = 5, threshold: int = 1, max_candidates: int = 100_000, seed: int | None = None) -> np.ndarray:
     """
-    파라미터 공간에서 데이터가 희소한 구간을 찾아 중심점을 반환합니다.
+    파라미터 공간에서 데이터가 희소한 구간을 찾아 중심점을 (M, D) 배열로 반환합니다. (열 순서는 parameters와 동일)
     (1)번 요구사항: 데이터 희소 구간 탐색
+
+    각 샘플을 정수 셀 좌표로 변환한 뒤 점유된 셀만 해시(정렬된 키)로 집계하므로,
+    메모리 사용량은 n_bins**D가 아니라 샘플 수에 비례합니다.
+    전체 셀 수가 max_candidates 이하이면 모든 셀을 검사하고(기존 histogramdd와 동일한 결과),
+    그보다 크면 점유 셀 중 희소한 셀 + 무작위로 뽑은 max_candidates개의 셀만 검사합니다.
     """
     logging.info(f"'{parameters}' 파라미터 공간에서 희소 구간 탐색을 시작합니다 (구간 당 데이터 < {threshold}개).")
-    
-    data = df[parameters].values
-    H, edges = np.histogramdd(data, bins=n_bins)
 
-    sparse_bin_indices = np.argwhere(H < threshold)
-    
-    if len(sparse_bin_indices) == 0:
+    data = df[parameters].to_numpy(dtype=np.float64)
+    n_dims = data.shape[1]
+    lower, upper = data.min(axis=0), data.max(axis=0)
+    # histogramdd와 같은 규칙: 범위가 0인 축은 ±0.5로 넓힘
+    flat = upper == lower
+    lower, upper = np.where(flat, lower - 0.5, lower), np.where(flat, upper + 0.5, upper)
+    width = (upper - lower) / n_bins
+
+    cells = np.clip(np.floor((data - lower) / width), 0, n_bins - 1).astype(np.int64)
+    occupied_keys, counts = np.unique(_cell_keys(cells), return_counts=True)
+
+    total_cells = n_bins ** n_dims
+    if total_cells <= max_candidates:
+        candidates = np.indices((n_bins,) * n_dims).reshape(n_dims, -1).T
+    else:
+        rng = np.random.default_rng(seed)
+        sampled = rng.integers(0, n_bins, size=(max_candidates, n_dims))
+        # 이미 점유된 셀 중 임계값 미만인 셀도 후보에 포함
+        occupied_cells = np.unique(cells, axis=0)
+        candidates = np.unique(np.vstack([occupied_cells, sampled]), axis=0)
+        logging.info(f"전체 셀 {total_cells}개 중 {len(candidates)}개의 후보 셀을 검사합니다.")
+
+    candidate_keys = _cell_keys(candidates)
+    positions = np.searchsorted(occupied_keys, candidate_keys)
+    positions_clipped = np.minimum(positions, len(occupied_keys) - 1)
+    found = (positions < len(occupied_keys)) & (occupied_keys[positions_clipped] == candidate_keys)
+    candidate_counts = np.where(found, counts[positions_clipped], 0)
+
+    sparse_cells = candidates[candidate_counts < threshold]
+    if len(sparse_cells) == 0:
         logging.info("데이터가 희소한 구간을 찾지 못했습니다.")
-        return []
-
-    midpoints = []
-    for indices in sparse_bin_indices:
-        midpoint = {}
-        for i, (param_name, index) in enumerate(zip(parameters, indices)):
-            midpoint[param_name] = (edges[i][index] + edges[i][index + 1]) / 2
-        midpoints.append(midpoint)
-        
+        return np.empty((0, n_dims))
+
+    midpoints = lower + (sparse_cells + 0.5) * width
     logging.info(f"총 {len(midpoints)}개의 희소 구간을 찾았습니다.")
     return midpoints
 
-def generate_and_insert_jobs(sparse_midpoints: list[dict], n_jobs: int, supabase_client: Client):
+def generate_and_insert_jobs(sparse_midpoints: np.ndarray, parameters: list, n_jobs: int, supabase_client: Client,
+                             priority: int = DEFAULT_PRIORITY) -> int:
     """
-    희소 구간의 중심점으로 새로운 시뮬레이션 작업을 생성하여 DB에 삽입합니다.
+    희소 구간의 중심점으로 새로운 시뮬레이션 작업을 생성하여 DB에 삽입하고, 삽입한 작업 수를 반환합니다.
     (2)번 요구사항: 신규 시뮬레이션 작업 100개 생성 및 삽입
+    작업에는 priority와 런타임 모델(있으면)의 예상 비용(estimated_cost)을 함께 기록합니다.
     """
-    if not sparse_midpoints:
+    if len(sparse_midpoints) == 0:
         logging.info("새로운 작업을 생성할 희소 구간이 없습니다.")
-        return
+        return 0
 
     n_to_generate = min(n_jobs, len(sparse_midpoints))
-    # 희소 구간 리스트에서 무작위로 선택하여 다양성 확보
-    selected_indices = np.random.choice(len(sparse_midpoints), n_to_generate, replace=False)
-    
-    new_jobs = [{"parameters": sparse_midpoints[i], "status": "pending"} for i in selected_indices]
+    # 후보가 n_jobs보다 많으면 (획득 단계를 거치지 않은 경우) 무작위로 선택하여 다양성 확보
+    if len(sparse_midpoints) > n_jobs:
+        selected_indices = np.random.choice(len(sparse_midpoints), n_to_generate, replace=False)
+    else:
+        selected_indices = np.arange(n_to_generate)
     
-    logging.info(f"{len(new_jobs)}개의 신규 시뮬레이션 작업을 생성합니다.")
+    candidate_parameters = [dict(zip(parameters, sparse_midpoints[i].tolist())) for i in selected_indices]
 
     try:
+        # 이미 결과가 있거나 대기 중인 파라미터는 다시 만들지 않음 (param_hash 기준)
+        new_jobs = dedupe_new_jobs(supabase_client, candidate_parameters)
+        if not new_jobs:
+            logging.info("모든 후보가 이미 계산되었거나 대기 중입니다. 새로운 작업을 생성하지 않습니다.")
+            return 0
+        logging.info(f"{len(new_jobs)}개의 신규 시뮬레이션 작업을 생성합니다.")
+        annotate_jobs(new_jobs, RuntimeModel.load(RUNTIME_MODEL_PATH), priority)
         supabase_client.table("simulation_jobs").insert(new_jobs).execute()
         logging.info("성공적으로 신규 작업들을 'simulation_jobs' 테이블에 삽입했습니다.")
+        return len(new_jobs)
     except Exception as e:
         logging.error(f"신규 작업 삽입 중 오류 발생: {e}")
+        return 0
 
-def report_high_error_parameters(model: MLPRegressor, scaler: StandardScaler, df: pd.DataFrame, features: list, target: str, top_percent: int = 10):
+def report_high_error_parameters(model: SurrogateRegressor, scaler: StandardScaler, df: pd.DataFrame, features: list, target: str, top_percent: int = 10) -> pd.DataFrame:
     """
-    모델의 예측 오차가 가장 큰 상위 N% 데이터의 파라미터 범위를 리포트합니다.
+    모델의 예측 오차가 가장 큰 상위 N% 데이터의 파라미터 범위를 리포트하고, 해당 데이터를 반환합니다.
     (3)번 요구사항: 오차 상위 10% 파라미터 범위 리포트
     """
     logging.info(f"모델 예측 오차 상위 {top_percent}%의 파라미터 범위 분석을 시작합니다.")
@@ -131,7 +195,7 @@ def report_high_error_parameters(model: MLPRegressor, scaler: StandardScaler, df
     X_scaled = scaler.transform(X)
     y_pred = model.predict(X_scaled)
     
-    df['error'] = np.abs(y_true - y_pred)
+    df['error'] = angular_error(y_true, y_pred) if target == 'phase' else np.abs(y_true - y_pred)
     
     error_threshold = df['error'].quantile(1 - (top_percent / 100))
     
@@ -139,77 +203,173 @@ def report_high_error_parameters(model: MLPRegressor, scaler: StandardScaler, df
     
     if high_error_df.empty:
         logging.warning("오차 상위 데이터가 없습니다. 오차 임계값을 확인하세요.")
-        return
+        return high_error_df
 
     logging.info(f"총 {len(high_error_df)}개의 오차 상위 데이터를 분석했습니다.")
     
     print("\n--- AI 모델 예측 오차 상위 10% 파라미터 범위 리포트 ---")
     print(high_error_df[features].describe())
     print("----------------------------------------------------\n")
+    return high_error_df
 
 
-def main():
+@dataclass
+class AcquisitionModel:
+    """한 번의 학습 주기 결과. 다음 재학습 전까지 여러 번의 작업 획득에 재사용됩니다."""
+    model: SurrogateRegressor
+    scaler: StandardScaler
+    members: list                  # 불확실성 추정용 부트스트랩 앙상블
+    data_points: np.ndarray        # 학습에 쓴 샘플의 파라미터 (원래 단위, 희소도 계산용)
+    high_error_points: np.ndarray  # 오차 상위 샘플의 파라미터 (원래 단위)
+
+
+def fit_acquisition_model(df: pd.DataFrame, features: list = PARAMETER_FEATURES, target: str = TARGET_VARIABLE,
+                          checkpoint: str | None = SURROGATE_CHECKPOINT, n_members: int = N_ENSEMBLE_MEMBERS) -> AcquisitionModel | None:
+    """대리 모델 학습(체크포인트에서 warm start), 오차 상위 리포트, 부트스트랩 앙상블 학습을 한 번에 수행합니다."""
+    trained = train_model(df, features=features, target=target, checkpoint=checkpoint)
+    if trained is None:
+        return None
+    model, scaler = trained
+
+    # 오차 상위 파라미터 리포트 (요구사항 3) - 고오차 영역은 획득 점수에 사용됩니다.
+    high_error_df = report_high_error_parameters(model, scaler, df, features=features, target=target, top_percent=10)
+
+    X_scaled = scaler.transform(df[features])
+    members = fit_bootstrap_ensemble(model, X_scaled, df[target].to_numpy(), n_members=n_members)
+    return AcquisitionModel(
+        model=model,
+        scaler=scaler,
+        members=members,
+        data_points=df[features].to_numpy(),
+        high_error_points=high_error_df[features].to_numpy(),
+    )
+
+
+def select_new_points(acquisition_model: AcquisitionModel, df: pd.DataFrame, n_jobs: int, features: list = PARAMETER_FEATURES,
+                      queued_points: np.ndarray | None = None, exclude_hashes: set | None = None) -> np.ndarray:
     """
-    (4)번 요구사항: 정보 획득 효율 극대화를 위한 자동화 파이프라인
+    희소 구간 후보 중 시뮬레이션할 n_jobs개의 파라미터 점(원래 단위)을 고릅니다.
+    queued_points(이미 큐에 넣었지만 아직 결과가 없는 점)는 기존 샘플처럼 취급하여 같은 영역을 다시 고르지 않습니다.
+    exclude_hashes(이미 등록된 작업의 param_hash)에 해당하는 후보는 획득 전에 제외하므로,
+    삽입 단계의 중복 제거로 작업 수가 n_jobs보다 모자라지 않습니다.
     """
-    # --- 파이프라인 설정 ---
-    PARAMETER_FEATURES = [col for col in ['r1', 'r2', 'l1', 'frequency']]
-    TARGET_VARIABLE = 'phase'
-    N_BINS_FOR_SPARSITY_CHECK = 5  # 파라미터 공간을 나눌 구간 수
-    SPARSITY_THRESHOLD = 2         # 셀 당 데이터 개수 임계값
-    N_NEW_JOBS_TO_GENERATE = 100   # 생성할 신규 작업 수
-    # ---------------------
+    # 희소 구간 분석 (요구사항 1) - 후보 점 생성
+    sparse_midpoints = find_sparse_regions(
+        df,
+        parameters=features,
+        n_bins=N_BINS_FOR_SPARSITY_CHECK,
+        threshold=SPARSITY_THRESHOLD,
+        max_candidates=N_CANDIDATES
+    )
+    if exclude_hashes and len(sparse_midpoints):
+        keep = np.array([parameter_hash(dict(zip(features, point))) not in exclude_hashes for point in sparse_midpoints.tolist()])
+        if not keep.all():
+            logging.info(f"이미 등록된 작업과 같은 후보 {int((~keep).sum())}개를 제외합니다.")
+            sparse_midpoints = sparse_midpoints[keep]
+    if len(sparse_midpoints) == 0:
+        return sparse_midpoints
 
+    # 배치 획득: 불확실성 + 희소도 + 고오차 근접도 점수와 다양성(greedy k-center)으로 후보 선택
+    data = acquisition_model.data_points
+    if queued_points is not None and len(queued_points):
+        data = np.vstack([data, queued_points])
+    selected, _ = acquire_batch(
+        acquisition_model.members,
+        acquisition_model.scaler,
+        sparse_midpoints,
+        data,
+        acquisition_model.high_error_points,
+        n_jobs,
+        weights=ACQUISITION_WEIGHTS,
+        diversity=DIVERSITY,
+        max_scored=N_SCORED_CANDIDATES,
+    )
+    return sparse_midpoints[selected]
+
+
+def run_once(priority: int = DEFAULT_PRIORITY):
+    """
+    (4)번 요구사항: 정보 획득 효율 극대화를 위한 자동화 파이프라인 (1회 실행)
+    데이터 로드 → 학습 → 희소 구간/배치 획득 → 신규 작업 삽입을 순서대로 한 번 수행합니다.
+    """
     logging.info("정보 획득 자동화 파이프라인을 시작합니다.")
-    
+
     # 1. 데이터 로드
     df = load_data_from_supabase()
     if df is None or df.empty:
         logging.error("데이터가 없어 파이프라인을 중단합니다.")
         return
-    
+
     # PARAMETER_FEATURES가 df의 컬럼에 있는지 확인
     valid_parameter_features = [f for f in PARAMETER_FEATURES if f in df.columns]
     if len(valid_parameter_features) != len(PARAMETER_FEATURES):
         logging.error(f"데이터에 필요한 파라미터 컬럼이 부족합니다. 필요: {PARAMETER_FEATURES}, 사용 가능: {valid_parameter_features}")
         return
 
-    # 2. 모델 학습
-    model, scaler = train_model(df, features=valid_parameter_features, target=TARGET_VARIABLE)
-    if model is None:
+    # 2. 모델 학습 + 3. 오차 상위 리포트
+    acquisition_model = fit_acquisition_model(df)
+    if acquisition_model is None:
         logging.error("모델 학습에 실패하여 파이프라인을 중단합니다.")
         return
 
-    # 3. 희소 구간 분석 (요구사항 1)
-    sparse_midpoints = find_sparse_regions(
-        df, 
-        parameters=valid_parameter_features, 
-        n_bins=N_BINS_FOR_SPARSITY_CHECK,
-        threshold=SPARSITY_THRESHOLD
-    )
+    # 4. 희소 구간 분석 + 5. 배치 획득
+    selected_points = select_new_points(acquisition_model, df, N_NEW_JOBS_TO_GENERATE)
 
-    # 4. 신규 작업 생성 및 삽입 (요구사항 2)
+    # 6. 신규 작업 생성 및 삽입 (요구사항 2)
     load_dotenv()
     supabase_url = os.getenv("SUPABASE_URL")
     supabase_key = os.getenv("SUPABASE_KEY")
     if supabase_url and supabase_key:
         supabase_client = create_client(supabase_url, supabase_key)
-        generate_and_insert_jobs(sparse_midpoints, N_NEW_JOBS_TO_GENERATE, supabase_client)
+        generate_and_insert_jobs(selected_points, PARAMETER_FEATURES, N_NEW_JOBS_TO_GENERATE, supabase_client, priority)
     else:
         logging.error("Supabase 클라이언트를 초기화할 수 없어 신규 작업을 생성하지 못했습니다.")
 
-    # 5. 오차 상위 파라미터 리포트 (요구사항 3)
-    report_high_error_parameters(
-        model, 
-        scaler, 
-        df, 
-        features=valid_parameter_features, 
-        target=TARGET_VARIABLE, 
-        top_percent=10
-    )
-
     logging.info("정보 획득 자동화 파이프라인 실행이 완료되었습니다.")
 
 
+def main():
+    """
+    기본값은 기존처럼 파이프라인을 한 번만 실행합니다.
+    --loop를 주면 연속 능동 학습 루프(active_learning.ActiveLearningLoop)로 실행하여,
+    워커가 계산하는 동안 큐 깊이를 유지하도록 작업을 보충하고 새 결과가 쌓이면 백그라운드에서 재학습합니다.
+    """
+    parser = argparse.ArgumentParser(description="대리 모델 기반 능동 학습으로 신규 시뮬레이션 작업을 생성합니다.")
+    parser.add_argument('--loop', action='store_true', help="종료할 때까지 큐 깊이를 유지하며 작업 보충과 재학습을 반복")
+    parser.add_argument('--target-depth', type=int, default=500, help="--loop: 유지할 대기/실행 중 작업 수 (기본값: 500)")
+    parser.add_argument('--retrain-every', type=int, default=200, help="--loop: 이 개수만큼 새 결과가 쌓이면 재학습 (기본값: 200)")
+    parser.add_argument('--batch-size', type=int, default=N_NEW_JOBS_TO_GENERATE, help="--loop: 한 번에 획득할 최대 작업 수")
+    parser.add_argument('--poll-interval', type=float, default=30.0, help="--loop: 큐 깊이/결과 수 확인 주기 (초, 기본값: 30)")
+    parser.add_argument('--priority', type=int, default=DEFAULT_PRIORITY,
+                        help=f"생성할 작업의 우선순위 등급 (큰 값부터 점유, 예: 능동 학습 작업을 먼저 계산하려면 {ACTIVE_LEARNING_PRIORITY})")
+    args = parser.parse_args()
+
+    if not args.loop:
+        run_once(args.priority)
+        return
+
+    from active_learning import ActiveLearningLoop
+    load_dotenv()
+    supabase_url = os.getenv("SUPABASE_URL")
+    supabase_key = os.getenv("SUPABASE_KEY")
+    if not supabase_url or not supabase_key:
+        logging.error("Supabase URL 또는 Key가 .env 파일에 설정되지 않았습니다.")
+        return
+    loop = ActiveLearningLoop(
+        create_client(supabase_url, supabase_key),
+        target_queue_depth=args.target_depth,
+        retrain_every=args.retrain_every,
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval,
+        priority=args.priority,
+    )
+    try:
+        loop.run()
+    except KeyboardInterrupt:
+        logging.info("능동 학습 루프를 종료합니다.")
+    finally:
+        loop.close()
+
+
 if __name__ == "__main__":
     main()
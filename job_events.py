@@ -0,0 +1,98 @@
+import select
+import logging
+import threading
+
+# supabase/migrations/20261017_job_notify.sql 의 pg_notify 채널
+NOTIFY_CHANNEL = 'simulation_jobs_pending'
+
+
+class AdaptiveBackoff:
+    """
+    큐가 비어 있을 때의 폴링 간격. 빈 조회가 이어질수록 min_interval에서 max_interval까지 factor배씩 늘리고,
+    작업을 찾으면 다시 min_interval로 돌아갑니다. 새 작업은 빨리 발견하면서 유휴 상태의 조회 부하는 줄입니다.
+    """
+
+    def __init__(self, min_interval: float = 0.5, max_interval: float = 15.0, factor: float = 2.0):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.factor = factor
+        self._current = min_interval
+
+    def next_delay(self) -> float:
+        delay = self._current
+        self._current = min(self._current * self.factor, self.max_interval)
+        return delay
+
+    def reset(self):
+        self._current = self.min_interval
+
+
+def _connect(dsn: str):
+    """psycopg(3) 또는 psycopg2로 autocommit 연결을 만듭니다. 둘 다 없으면 ImportError."""
+    try:
+        import psycopg
+        return psycopg.connect(dsn, autocommit=True), 3
+    except ImportError:
+        import psycopg2
+        conn = psycopg2.connect(dsn)
+        conn.autocommit = True
+        return conn, 2
+
+
+class JobNotificationListener(threading.Thread):
+    """
+    Postgres LISTEN/NOTIFY로 새 'pending' 작업 알림을 받아 on_notify 콜백을 호출하는 백그라운드 스레드.
+    연결이 끊기면 지수 백오프로 다시 연결하며, 그동안 워커는 폴링(AdaptiveBackoff)으로 동작합니다.
+    SUPABASE_DB_URL(직접 연결 문자열)과 psycopg 또는 psycopg2가 필요합니다.
+    """
+
+    def __init__(self, dsn: str, on_notify, channel: str = NOTIFY_CHANNEL, poll_timeout: float = 1.0):
+        super().__init__(name="job-notify-listener", daemon=True)
+        self.dsn = dsn
+        self.on_notify = on_notify
+        self.channel = channel
+        self.poll_timeout = poll_timeout
+        self.connected = threading.Event()
+        self._stopped = threading.Event()
+
+    def _listen(self):
+        conn, version = _connect(self.dsn)
+        try:
+            conn.cursor().execute(f"LISTEN {self.channel}")
+            self.connected.set()
+            logging.info(f"'{self.channel}' 채널 알림을 수신합니다. (LISTEN/NOTIFY)")
+            while not self._stopped.is_set():
+                if version == 3:
+                    received = any(True for _ in conn.notifies(timeout=self.poll_timeout, stop_after=1))
+                else:
+                    received = False
+                    if select.select([conn], [], [], self.poll_timeout) != ([], [], []):
+                        conn.poll()
+                        received = bool(conn.notifies)
+                        conn.notifies.clear()
+                if received:
+                    self.on_notify()
+        finally:
+            self.connected.clear()
+            conn.close()
+
+    def run(self):
+        delay = 1.0
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except ImportError:
+                logging.warning("psycopg/psycopg2가 설치되어 있지 않아 LISTEN/NOTIFY를 사용할 수 없습니다. 폴링으로 동작합니다.")
+                return
+            except Exception as e:
+                logging.error(f"작업 알림 수신 연결 오류: {e}. {delay:.0f}초 후 다시 연결합니다.")
+                # 재연결하는 동안 놓친 알림이 있을 수 있으므로 한 번 깨웁니다.
+                self.on_notify()
+                if self._stopped.wait(delay):
+                    return
+                delay = min(delay * 2, 60.0)
+            else:
+                delay = 1.0
+
+    def stop(self):
+        self._stopped.set()
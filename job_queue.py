@@ -0,0 +1,298 @@
+import os
+import socket
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+# 재시도 대기 시간 = RETRY_BASE_DELAY_SECONDS * 2^(시도 횟수 - 1)
+RETRY_BASE_DELAY_SECONDS = 30
+
+
+class LeaseLostError(RuntimeError):
+    """체크포인트 저장 시 리스를 잃은 것이 확인됨 (다른 워커가 회수해 이어서 계산 중)."""
+
+
+def retry_delay_seconds(attempts: int, base_delay: float = RETRY_BASE_DELAY_SECONDS) -> float:
+    return base_delay * 2 ** max(attempts - 1, 0)
+
+
+def make_worker_id() -> str:
+    """호스트 이름과 PID로 워커 식별자를 만듭니다."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class JobQueue(ABC):
+    """
+    simulation_jobs 작업 큐의 점유/하트비트/회수 연산 인터페이스.
+    여러 워커 호스트가 하나의 큐를 공유해도 같은 작업을 중복 점유하지 않아야 합니다.
+    """
+
+    @abstractmethod
+    def claim(self, worker_id: str, batch_size: int, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> list[dict]:
+        """
+        'pending' 작업을 최대 batch_size개까지 원자적으로 점유하고 'running'으로 전환합니다.
+        우선순위(priority)가 높은 작업부터, 같은 우선순위에서는 예상 비용(estimated_cost)이 큰 작업부터 점유합니다.
+        """
+
+    @abstractmethod
+    def heartbeat(self, worker_id: str, job_ids: list, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> int:
+        """worker_id가 점유 중인 작업들의 리스를 연장하고, 연장된 작업 수를 반환합니다."""
+
+    @abstractmethod
+    def reap_expired(self) -> int:
+        """
+        리스가 만료된 'running' 작업을 재시도 대기('pending' + next_attempt_at)로 되돌리고, 회수한 작업 수를 반환합니다.
+        시도 횟수(attempts)가 max_attempts에 도달한 작업은 'dead_letter'로 전환합니다.
+        """
+
+    @abstractmethod
+    def fail(self, worker_id: str, job_ids: list, error_message: str, retryable: bool = True) -> int:
+        """
+        작업 실패를 기록합니다. 재시도 가능하면 지수 백오프 후 다시 'pending'(횟수 초과 시 'dead_letter'),
+        재시도할 수 없는 오류(예: 잘못된 파라미터)는 바로 'failed'로 전환합니다.
+        worker_id가 점유 중인('running') 작업만 바꾸므로, 리스를 잃어 다른 워커가 다시 점유한 작업은 그대로 둡니다.
+        """
+
+    @abstractmethod
+    def checkpoint(self, worker_id: str, job_id, progress: float, state: dict, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+        """진행률과 솔버 중간 상태를 저장하고 리스를 연장합니다. 리스를 잃었으면 False를 반환합니다."""
+
+
+class SupabaseJobQueue(JobQueue):
+    """supabase/migrations/20261017_job_leases.sql (이후 20261017_job_retries.sql, 20261018_job_costs.sql에서 갱신)의 RPC 함수를 호출하는 구현체."""
+
+    def __init__(self, client: Client):
+        self.client = client
+
+    def claim(self, worker_id: str, batch_size: int, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> list[dict]:
+        if batch_size <= 0:
+            return []
+        response = self.client.rpc("claim_simulation_jobs", {
+            "p_worker_id": worker_id,
+            "p_batch_size": batch_size,
+            "p_lease_seconds": lease_seconds,
+        }).execute()
+        return response.data or []
+
+    def heartbeat(self, worker_id: str, job_ids: list, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> int:
+        if not job_ids:
+            return 0
+        response = self.client.rpc("heartbeat_simulation_jobs", {
+            "p_worker_id": worker_id,
+            "p_job_ids": list(job_ids),
+            "p_lease_seconds": lease_seconds,
+        }).execute()
+        return int(response.data or 0)
+
+    def reap_expired(self) -> int:
+        response = self.client.rpc("reap_expired_simulation_jobs", {
+            "p_base_delay_seconds": RETRY_BASE_DELAY_SECONDS,
+        }).execute()
+        return int(response.data or 0)
+
+    def fail(self, worker_id: str, job_ids: list, error_message: str, retryable: bool = True) -> int:
+        if not job_ids:
+            return 0
+        response = self.client.rpc("fail_simulation_jobs", {
+            "p_job_ids": list(job_ids),
+            "p_worker_id": worker_id,
+            "p_error_message": error_message,
+            "p_retryable": retryable,
+            "p_base_delay_seconds": RETRY_BASE_DELAY_SECONDS,
+        }).execute()
+        return int(response.data or 0)
+
+    def checkpoint(self, worker_id: str, job_id, progress: float, state: dict, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+        response = self.client.rpc("checkpoint_simulation_job", {
+            "p_job_id": job_id,
+            "p_worker_id": worker_id,
+            "p_progress": progress,
+            "p_checkpoint": state,
+            "p_lease_seconds": lease_seconds,
+        }).execute()
+        return bool(response.data)
+
+
+class InMemoryJobQueue(JobQueue):
+    """
+    오프라인 테스트용 인메모리 구현체.
+    하나의 락으로 점유를 직렬화하여 SKIP LOCKED RPC와 동일한 의미(중복 점유 없음)를 보장합니다.
+    """
+
+    def __init__(self, jobs: list[dict] | None = None, clock=None):
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self._lock = threading.Lock()
+        self.jobs: dict = {}
+        for job in jobs or []:
+            self.add_job(job)
+
+    def add_job(self, job: dict) -> dict:
+        with self._lock:
+            row = {
+                "status": "pending",
+                "progress": 0,
+                "error_message": None,
+                "worker_id": None,
+                "lease_expires_at": None,
+                "heartbeat_at": None,
+                "attempts": 0,
+                "max_attempts": DEFAULT_MAX_ATTEMPTS,
+                "next_attempt_at": None,
+                "checkpoint": None,
+                "priority": 0,
+                "estimated_cost": None,
+                "created_at": self._clock(),
+                **job,
+            }
+            self.jobs[row["id"]] = row
+            return dict(row)
+
+    def claim(self, worker_id: str, batch_size: int, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> list[dict]:
+        if batch_size <= 0:
+            return []
+        with self._lock:
+            now = self._clock()
+            # claim_simulation_jobs RPC와 같은 순서: 우선순위 → 예상 비용(큰 것부터, 없으면 마지막) → 생성 시각
+            pending = sorted(
+                (
+                    job for job in self.jobs.values()
+                    if job["status"] == "pending" and (job["next_attempt_at"] is None or job["next_attempt_at"] <= now)
+                ),
+                key=lambda job: (-job["priority"], job["estimated_cost"] is None, -(job["estimated_cost"] or 0), job["created_at"]),
+            )[:batch_size]
+            for job in pending:
+                job.update({
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "attempts": job["attempts"] + 1,
+                    "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                    "heartbeat_at": now,
+                })
+            return [dict(job) for job in pending]
+
+    def heartbeat(self, worker_id: str, job_ids: list, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> int:
+        with self._lock:
+            now = self._clock()
+            extended = 0
+            for job_id in job_ids:
+                job = self.jobs.get(job_id)
+                if job and job["status"] == "running" and job["worker_id"] == worker_id:
+                    job["lease_expires_at"] = now + timedelta(seconds=lease_seconds)
+                    job["heartbeat_at"] = now
+                    extended += 1
+            return extended
+
+    def reap_expired(self) -> int:
+        with self._lock:
+            now = self._clock()
+            reaped = 0
+            for job in self.jobs.values():
+                if job["status"] == "running" and job["lease_expires_at"] is not None and job["lease_expires_at"] < now:
+                    exhausted = job["attempts"] >= job["max_attempts"]
+                    self._schedule_retry(job, now, "dead_letter" if exhausted else "pending")
+                    if exhausted:
+                        job["error_message"] = f"lease expired after {job['attempts']} attempts"
+                    reaped += 1
+            return reaped
+
+    @staticmethod
+    def _schedule_retry(job: dict, now, status: str):
+        job.update({
+            "status": status,
+            "worker_id": None,
+            "lease_expires_at": None,
+            "next_attempt_at": now + timedelta(seconds=retry_delay_seconds(job["attempts"])),
+        })
+
+    def fail(self, worker_id: str, job_ids: list, error_message: str, retryable: bool = True) -> int:
+        with self._lock:
+            now = self._clock()
+            failed = 0
+            for job_id in job_ids:
+                job = self.jobs.get(job_id)
+                if job is None or job["status"] != "running" or job["worker_id"] != worker_id:
+                    continue
+                if not retryable:
+                    status = "failed"
+                else:
+                    status = "dead_letter" if job["attempts"] >= job["max_attempts"] else "pending"
+                self._schedule_retry(job, now, status)
+                job["error_message"] = error_message
+                failed += 1
+            return failed
+
+    def checkpoint(self, worker_id: str, job_id, progress: float, state: dict, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+        with self._lock:
+            now = self._clock()
+            job = self.jobs.get(job_id)
+            if not job or job["status"] != "running" or job["worker_id"] != worker_id:
+                return False
+            job.update({
+                "progress": progress,
+                "checkpoint": state,
+                "checkpoint_at": now,
+                "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                "heartbeat_at": now,
+            })
+            return True
+
+    def complete(self, job_id, status: str = "completed", error_message: str | None = None):
+        """워커의 상태 업데이트(process_job)를 흉내 냅니다."""
+        with self._lock:
+            job = self.jobs[job_id]
+            job.update({"status": status, "lease_expires_at": None, "error_message": error_message})
+            if status == "completed":
+                job["progress"] = 100
+                job["checkpoint"] = None
+
+
+class LeaseHeartbeat(threading.Thread):
+    """
+    실행 중인 작업들의 리스를 주기적으로 연장하는 백그라운드 스레드.
+    get_job_ids는 현재 점유 중인 작업 ID 목록을 반환하는 콜백입니다.
+    """
+
+    def __init__(self, queue: JobQueue, worker_id: str, get_job_ids, lease_seconds: int = DEFAULT_LEASE_SECONDS, interval: float | None = None):
+        super().__init__(name="lease-heartbeat", daemon=True)
+        self.queue = queue
+        self.worker_id = worker_id
+        self.get_job_ids = get_job_ids
+        self.lease_seconds = lease_seconds
+        # 리스가 만료되기 전에 최소 두 번은 연장을 시도하도록 간격을 잡습니다.
+        self.interval = interval if interval is not None else lease_seconds / 3
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            job_ids = list(self.get_job_ids())
+            if not job_ids:
+                continue
+            try:
+                extended = self.queue.heartbeat(self.worker_id, job_ids, self.lease_seconds)
+                if extended < len(job_ids):
+                    logging.warning(f"하트비트: {len(job_ids)}개 중 {extended}개의 리스만 연장되었습니다. 일부 작업이 회수되었을 수 있습니다.")
+            except Exception as e:
+                logging.error(f"리스 하트비트 전송 중 오류 발생: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+if __name__ == "__main__":
+    # 단독 실행 시 만료된 리스를 한 번 회수합니다. (cron 등에서 주기적으로 실행 가능)
+    load_dotenv()
+    supabase_url = os.environ.get("SUPABASE_URL")
+    supabase_key = os.environ.get("SUPABASE_KEY")
+    if not supabase_url or not supabase_key:
+        logging.error("Supabase URL 또는 Key가 .env 파일에 설정되지 않았습니다.")
+    else:
+        reaped = SupabaseJobQueue(create_client(supabase_url, supabase_key)).reap_expired()
+        logging.info(f"리스가 만료된 작업 {reaped}개를 'pending' 큐로 되돌렸습니다.")
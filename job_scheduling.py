@@ -0,0 +1,243 @@
+import os
+import json
+import heapq
+import logging
+import argparse
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from supabase import Client
+from data_access import DEFAULT_PAGE_SIZE, RESULTS_TABLE, get_supabase_client, iter_table_pages, load_dataset
+from spectral_records import SPECTRA_TABLE
+
+# 런타임 예측 모델 저장 위치 (워커, seed_jobs, 능동 학습이 공유)
+RUNTIME_MODEL_PATH = os.environ.get("RUNTIME_MODEL_PATH", ".cache/runtime_model.json")
+# simulation_jobs.priority 등급 (큰 값부터 점유)
+DEFAULT_PRIORITY = 0
+ACTIVE_LEARNING_PRIORITY = 10
+# 예상 비용을 알 수 없는 작업의 기본 비용 (모든 작업이 같으면 기존과 같은 균등 분할)
+DEFAULT_COST = 1.0
+
+
+def parameter_frame(parameters_list: list[dict]) -> pd.DataFrame:
+    """parameters JSON 목록을 컬럼으로 펼칩니다. 중첩 객체는 점 표기 컬럼이 됩니다. (예: frequency_sweep.points)"""
+    return pd.json_normalize(parameters_list) if parameters_list else pd.DataFrame()
+
+
+def _expand_nested(frame: pd.DataFrame) -> pd.DataFrame:
+    """캐시에서 읽은 DataFrame의 객체(dict) 컬럼을 parameter_frame과 같은 점 표기 컬럼으로 펼칩니다."""
+    nested = [col for col in frame.columns if frame[col].dtype == object and frame[col].map(lambda v: isinstance(v, dict)).any()]
+    for col in nested:
+        expanded = pd.json_normalize([v if isinstance(v, dict) else {} for v in frame[col]]).add_prefix(f'{col}.')
+        frame = pd.concat([frame.drop(columns=[col]).reset_index(drop=True), expanded], axis=1)
+    return frame
+
+
+@dataclass
+class RuntimeModel:
+    """
+    log(계산 시간)을 표준화한 파라미터의 2차 다항식(제곱, 교차항 포함)으로 회귀하는 경량 런타임 예측 모델.
+    ridge 닫힌 해로 학습하고 JSON으로 저장하므로 워커가 torch/sklearn 없이 불러 쓸 수 있습니다.
+    학습에 없던 파라미터나 누락 값은 평균으로 취급하고, 예측은 학습 범위 밖으로 크게 외삽하지 않도록 자릅니다.
+    """
+    features: list[str]
+    mean: np.ndarray
+    scale: np.ndarray
+    coef: np.ndarray
+    intercept: float
+    log_range: tuple[float, float]
+    n_samples: int = 0
+
+    @staticmethod
+    def _expand(z: np.ndarray) -> np.ndarray:
+        i, j = np.triu_indices(z.shape[1])
+        return np.hstack([z, z[:, i] * z[:, j]])
+
+    @staticmethod
+    def _matrix(frame: pd.DataFrame, features: list[str]) -> np.ndarray:
+        columns = [pd.to_numeric(frame[col], errors='coerce').to_numpy(dtype=np.float64) if col in frame.columns else np.full(len(frame), np.nan)
+                   for col in features]
+        return np.column_stack(columns) if columns else np.empty((len(frame), 0))
+
+    def _design(self, frame: pd.DataFrame) -> np.ndarray:
+        z = (self._matrix(frame, self.features) - self.mean) / self.scale
+        return self._expand(np.nan_to_num(z, nan=0.0, posinf=0.0, neginf=0.0))
+
+    @classmethod
+    def fit(cls, parameters: pd.DataFrame, runtimes, alpha: float = 1.0, min_coverage: float = 0.5) -> 'RuntimeModel':
+        """펼쳐진 파라미터와 실제 계산 시간(초)으로 학습합니다. 값이 min_coverage 비율 이상 있는 숫자 컬럼만 씁니다."""
+        runtimes = np.asarray(runtimes, dtype=np.float64)
+        keep = np.isfinite(runtimes) & (runtimes > 0)
+        parameters, runtimes = parameters.loc[keep].reset_index(drop=True), runtimes[keep]
+        if len(runtimes) == 0:
+            raise ValueError("학습할 계산 시간 기록이 없습니다.")
+
+        # 값이 충분하고 상수가 아닌 숫자 컬럼만 입력으로 사용
+        candidates = [col for col in parameters.columns if pd.to_numeric(parameters[col], errors='coerce').notna().mean() >= min_coverage]
+        X = cls._matrix(parameters, candidates)
+        varying = np.nanstd(X, axis=0) > 0
+        features, X = [col for col, v in zip(candidates, varying) if v], X[:, varying]
+        mean, scale = np.nanmean(X, axis=0), np.nanstd(X, axis=0)
+
+        y = np.log(runtimes)
+        A = cls._expand(np.nan_to_num((X - mean) / scale))
+        A_mean, y_mean = A.mean(axis=0), y.mean()
+        Ac = A - A_mean
+        coef = np.linalg.solve(Ac.T @ Ac + alpha * np.eye(A.shape[1]), Ac.T @ (y - y_mean)) if A.shape[1] else np.empty(0)
+        return cls(features, mean, scale, coef, float(y_mean - A_mean @ coef), (float(y.min()), float(y.max())), len(y))
+
+    def predict(self, parameters: pd.DataFrame) -> np.ndarray:
+        """펼쳐진 파라미터 (N,)행의 예상 계산 시간(초)."""
+        log_runtime = self.intercept + self._design(parameters) @ self.coef
+        low, high = self.log_range
+        return np.exp(np.clip(log_runtime, low - 1.0, high + 1.0))
+
+    def predict_parameters(self, parameters_list: list[dict]) -> np.ndarray:
+        return self.predict(parameter_frame(parameters_list)) if parameters_list else np.zeros(0)
+
+    def save(self, path: str = RUNTIME_MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        state = {
+            'features': self.features,
+            'mean': self.mean.tolist(),
+            'scale': self.scale.tolist(),
+            'coef': self.coef.tolist(),
+            'intercept': self.intercept,
+            'log_range': list(self.log_range),
+            'n_samples': self.n_samples,
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = RUNTIME_MODEL_PATH) -> 'RuntimeModel | None':
+        """저장된 모델을 불러옵니다. 파일이 없거나 읽을 수 없으면 None (균등 비용으로 스케줄링)."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                state = json.load(f)
+            return cls(state['features'], np.asarray(state['mean']), np.asarray(state['scale']), np.asarray(state['coef']),
+                       state['intercept'], tuple(state['log_range']), state.get('n_samples', 0))
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"런타임 모델 '{path}'을(를) 읽을 수 없습니다: {e}. 균등 비용으로 스케줄링합니다.")
+            return None
+
+
+def annotate_jobs(jobs: list[dict], model: RuntimeModel | None = None, priority: int = DEFAULT_PRIORITY) -> list[dict]:
+    """삽입할 simulation_jobs 행에 priority와 estimated_cost(모델이 없으면 NULL)를 채웁니다."""
+    costs = model.predict_parameters([job['parameters'] for job in jobs]) if model is not None else [None] * len(jobs)
+    for job, cost in zip(jobs, costs):
+        job['priority'] = priority
+        job['estimated_cost'] = None if cost is None else float(cost)
+    return jobs
+
+
+def job_costs(jobs: list[dict], model: RuntimeModel | None = None) -> np.ndarray:
+    """
+    작업별 예상 비용. DB의 estimated_cost를 우선 쓰고, 없으면 모델로 추정하며,
+    그래도 없으면 알려진 비용의 중앙값(또는 DEFAULT_COST)으로 채웁니다.
+    """
+    costs = np.array([job.get('estimated_cost') for job in jobs], dtype=np.float64)
+    missing = ~np.isfinite(costs)
+    if missing.any() and model is not None:
+        costs[missing] = model.predict_parameters([jobs[i]['parameters'] for i in np.flatnonzero(missing)])
+        missing = ~np.isfinite(costs)
+    if missing.any():
+        costs[missing] = np.median(costs[~missing]) if (~missing).any() else DEFAULT_COST
+    return costs
+
+
+def pack_batches(jobs: list[dict], n_bins: int, max_batch_size: int, costs: np.ndarray) -> list[list[dict]]:
+    """
+    LPT(longest processing time first) 빈 패킹. 비용이 큰 작업부터 현재 합계가 가장 작은 배치에 배정하여
+    배치별 총 비용을 고르게 맞추고, 총 비용이 큰 배치부터 반환합니다. (먼저 투입할수록 마지막 배치의 꼬리 지연이 줄어듦)
+    배치 수는 n_bins(빈 슬롯 수)이되 배치당 max_batch_size개를 넘지 않도록 필요하면 늘립니다.
+    """
+    if not jobs:
+        return []
+    max_batch_size = max(1, max_batch_size)
+    n_bins = max(min(n_bins, len(jobs)), -(-len(jobs) // max_batch_size), 1)
+    bins: list[list[int]] = [[] for _ in range(n_bins)]
+    totals = np.zeros(n_bins)
+    heap = [(0.0, b) for b in range(n_bins)]
+    for i in np.argsort(-np.asarray(costs), kind='stable'):
+        load, b = heapq.heappop(heap)
+        bins[b].append(i)
+        totals[b] = load + costs[i]
+        if len(bins[b]) < max_batch_size:
+            heapq.heappush(heap, (totals[b], b))
+    return [[jobs[i] for i in bins[b]] for b in np.argsort(-totals, kind='stable') if bins[b]]
+
+
+def split_runtime(elapsed: float, costs: np.ndarray) -> np.ndarray:
+    """배치 하나의 계산 시간을 작업별 예상 비용 비율로 나눕니다. (배치 계산 엔진은 작업별 시간을 따로 잴 수 없음)"""
+    costs = np.asarray(costs, dtype=np.float64)
+    total = costs.sum()
+    return elapsed * (costs / total if total > 0 else np.full(len(costs), 1 / max(len(costs), 1)))
+
+
+def load_runtime_samples(client: Client | None = None, refresh: bool = False) -> tuple[pd.DataFrame, np.ndarray]:
+    """결과 테이블(스칼라, 스펙트럼)에서 runtime_seconds가 기록된 행의 (펼쳐진 파라미터, 계산 시간)을 모읍니다."""
+    frames = []
+    for table in (RESULTS_TABLE, SPECTRA_TABLE):
+        try:
+            frame = load_dataset(columns='parameters, runtime_seconds', client=client, refresh=refresh, table=table)
+        except Exception as e:
+            logging.warning(f"{table}의 계산 시간 기록을 읽을 수 없습니다: {e}")
+            continue
+        if frame.empty or 'runtime_seconds' not in frame.columns:
+            continue
+        frames.append(_expand_nested(frame.drop(columns=['id', 'created_at'], errors='ignore')))
+    if not frames:
+        return pd.DataFrame(), np.zeros(0)
+    frame = pd.concat(frames, ignore_index=True)
+    runtimes = pd.to_numeric(frame['runtime_seconds'], errors='coerce')
+    frame = frame[runtimes > 0].reset_index(drop=True)
+    return frame.drop(columns=['runtime_seconds']), runtimes[runtimes > 0].to_numpy(dtype=np.float64)
+
+
+def update_pending_costs(client: Client, model: RuntimeModel, page_size: int = DEFAULT_PAGE_SIZE) -> int:
+    """대기 중인 작업의 estimated_cost를 새 모델로 다시 추정하여 페이지마다 RPC 한 번으로 갱신합니다."""
+    updated = 0
+    for records in iter_table_pages(client, 'simulation_jobs', 'id, parameters', {'status': 'pending'}, page_size):
+        costs = model.predict_parameters([record['parameters'] for record in records])
+        response = client.rpc('set_simulation_job_costs', {
+            'p_job_ids': [record['id'] for record in records],
+            'p_costs': costs.astype(np.float32).tolist(),
+        }).execute()
+        updated += int(response.data or 0)
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기록된 계산 시간으로 런타임 예측 모델을 학습하고 대기 작업의 예상 비용을 갱신합니다.")
+    parser.add_argument('--output', default=RUNTIME_MODEL_PATH, help="모델 저장 경로")
+    parser.add_argument('--alpha', type=float, default=1.0, help="ridge 정규화 강도")
+    parser.add_argument('--min-samples', type=int, default=50, help="학습에 필요한 최소 기록 수")
+    parser.add_argument('--refresh-cache', action='store_true', help="로컬 캐시를 무시하고 전체를 다시 내려받기")
+    parser.add_argument('--no-update', action='store_true', help="대기 중인 작업의 estimated_cost를 갱신하지 않음")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help="한 번에 갱신할 작업 수")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    client = get_supabase_client()
+    parameters, runtimes = load_runtime_samples(client, refresh=args.refresh_cache)
+    if len(runtimes) < args.min_samples:
+        logging.warning(f"계산 시간 기록이 {len(runtimes)}개뿐이라 학습하지 않습니다. (필요: {args.min_samples}개)")
+        return
+
+    model = RuntimeModel.fit(parameters, runtimes, alpha=args.alpha)
+    residual = np.log(model.predict(parameters)) - np.log(runtimes)
+    logging.info(f"런타임 모델 학습 완료: 기록 {model.n_samples}개, 입력 {model.features}, "
+                 f"log 잔차 RMS {np.sqrt(np.mean(residual ** 2)):.3f}")
+    model.save(args.output)
+    logging.info(f"모델을 '{args.output}'에 저장했습니다.")
+    if not args.no_update:
+        logging.info(f"대기 중인 작업 {update_pending_costs(client, model, args.page_size)}개의 예상 비용을 갱신했습니다.")
+
+
+if __name__ == "__main__":
+    main()
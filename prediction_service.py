@@ -0,0 +1,179 @@
+import json
+import logging
+import argparse
+import threading
+import numpy as np
+import torch
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from surrogate import SurrogateRegressor
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# 한 번의 순전파에 넣을 후보 수 (중간 활성값 메모리 ≈ batch_size * 은닉층 폭 * 4 bytes)
+DEFAULT_BATCH_SIZE = 65536
+
+
+class PredictionService:
+    """
+    학습된 대리 모델을 한 번만 불러 두고 대량의 후보 배열을 평가하는 예측 서비스.
+
+    - 입력 scaler(StandardScaler)와 모델 내부 정규화를 하나의 affine 변환(x * scale + offset)으로 합쳐 둡니다.
+    - 후보를 batch_size개씩 나눠, 워커별로 미리 할당한 입력 버퍼와 호출자가 넘긴(또는 한 번만 할당한) 출력 배열에 바로 씁니다.
+    - n_workers > 1이면 스레드 풀로 배치를 나눠 처리합니다. (torch 연산은 GIL을 놓으므로 모델 하나를 공유)
+    """
+
+    def __init__(self, model: SurrogateRegressor, input_scaler=None, batch_size: int = DEFAULT_BATCH_SIZE, n_workers: int = 1,
+                 feature_names: list | None = None, output_names: list | None = None):
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.n_workers = max(1, n_workers)
+        self.feature_names = feature_names
+        self.output_names = output_names
+        self.n_inputs = model.n_features_in_
+        self.n_outputs = model.n_outputs_
+        model.net_.eval()
+
+        # ((x - m1) / s1 - m2) / s2 = x * scale + offset
+        scale = 1 / model.x_std_.astype(np.float64)
+        offset = -model.x_mean_.astype(np.float64) * scale
+        if input_scaler is not None:
+            scaler_scale = np.where(input_scaler.scale_ == 0, 1, input_scaler.scale_)
+            offset = offset - input_scaler.mean_ / scaler_scale * scale
+            scale = scale / scaler_scale
+        self._scale = scale.astype(np.float32)
+        self._offset = offset.astype(np.float32)
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(self.n_workers, thread_name_prefix='predict') if self.n_workers > 1 else None
+        if self.n_workers > 1:
+            # 스레드마다 연산 내부 병렬화까지 쓰면 코어를 과하게 점유하므로 나눠서 사용
+            torch.set_num_threads(max(1, torch.get_num_threads() // self.n_workers))
+
+    @classmethod
+    def load(cls, checkpoint: str, **kwargs) -> 'PredictionService':
+        """체크포인트(및 함께 저장된 입력 scaler, 컬럼 이름)로 서비스를 만듭니다."""
+        model = SurrogateRegressor.load(checkpoint)
+        metadata = model.metadata_
+        logging.info(f"대리 모델 '{checkpoint}'을(를) 불러왔습니다. (입력 {model.n_features_in_}개, 출력 {model.n_outputs_}개)")
+        return cls(model, input_scaler=metadata.get('input_scaler'), feature_names=metadata.get('features'), output_names=metadata.get('outputs'), **kwargs)
+
+    def _buffer(self) -> np.ndarray:
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = np.empty((self.batch_size, self.n_inputs), dtype=np.float32)
+        return buffer
+
+    def _predict_range(self, candidates: np.ndarray, out: np.ndarray, start: int, stop: int):
+        buffer = self._buffer()[:stop - start]
+        np.multiply(candidates[start:stop], self._scale, out=buffer, casting='unsafe')
+        np.add(buffer, self._offset, out=buffer)
+        with torch.inference_mode():
+            encoded = self.model.net_(torch.from_numpy(buffer)).numpy()
+        out[start:stop] = self.model._decode_outputs(encoded)
+
+    def predict(self, candidates: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """원래 단위의 후보 (N, D) 배열을 평가하여 (N, 출력 수) float32 배열을 반환합니다."""
+        candidates = np.asarray(candidates)
+        if candidates.ndim != 2 or candidates.shape[1] != self.n_inputs:
+            raise ValueError(f"후보 배열의 형태가 잘못되었습니다: {candidates.shape} (필요: (N, {self.n_inputs}))")
+        if out is None:
+            out = np.empty((len(candidates), self.n_outputs), dtype=np.float32)
+        ranges = [(start, min(start + self.batch_size, len(candidates))) for start in range(0, len(candidates), self.batch_size)]
+        if self._pool is None or len(ranges) == 1:
+            for start, stop in ranges:
+                self._predict_range(candidates, out, start, stop)
+        else:
+            # 결과를 기다리며 예외가 있으면 다시 발생시킵니다.
+            for future in [self._pool.submit(self._predict_range, candidates, out, start, stop) for start, stop in ranges]:
+                future.result()
+        return out
+
+    def predict_records(self, records: list[dict]) -> np.ndarray:
+        """{파라미터 이름: 값} 딕셔너리 목록을 평가합니다. (feature_names 순서로 배열화)"""
+        if not self.feature_names:
+            raise ValueError("체크포인트에 입력 컬럼 이름(features)이 없어 딕셔너리 입력을 처리할 수 없습니다.")
+        return self.predict(np.array([[record[name] for name in self.feature_names] for record in records], dtype=np.float64))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+class _PredictionHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health  → 모델 정보
+    POST /predict → {"candidates": [[...], ...]} 또는 {"records": [{"r1": ..}, ...]} 를 받아
+                    {"outputs": [...], "predictions": [[...], ...]} 반환
+    """
+
+    service: PredictionService
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != '/health':
+            self._send_json(404, {'error': 'not found'})
+            return
+        self._send_json(200, {
+            'status': 'ok',
+            'features': self.service.feature_names,
+            'outputs': self.service.output_names,
+            'n_inputs': self.service.n_inputs,
+            'n_outputs': self.service.n_outputs,
+        })
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            if 'records' in request:
+                predictions = self.service.predict_records(request['records'])
+            else:
+                predictions = self.service.predict(np.asarray(request['candidates'], dtype=np.float64))
+        except (KeyError, TypeError, ValueError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        self._send_json(200, {'outputs': self.service.output_names, 'predictions': predictions.tolist()})
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} - {format % args}")
+
+
+def serve(service: PredictionService, host: str = '127.0.0.1', port: int = 8765):
+    """Training Bridge 대시보드용 로컬 HTTP 엔드포인트를 실행합니다. (Ctrl+C로 종료)"""
+    handler = type('PredictionHandler', (_PredictionHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    logging.info(f"예측 서비스가 http://{host}:{port} 에서 실행 중입니다. (POST /predict, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("예측 서비스를 종료합니다.")
+    finally:
+        server.server_close()
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="학습된 대리 모델로 후보 파라미터를 평가하는 로컬 예측 서비스")
+    parser.add_argument('--checkpoint', default='checkpoints/surrogate_phase.pt', help="대리 모델 체크포인트 경로")
+    parser.add_argument('--host', default='127.0.0.1', help="바인딩할 주소 (기본값: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="포트 (기본값: 8765)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="한 번의 순전파에 넣을 후보 수")
+    parser.add_argument('--workers', type=int, default=1, help="예측 스레드 수")
+    args = parser.parse_args()
+
+    service = PredictionService.load(args.checkpoint, batch_size=args.batch_size, n_workers=args.workers)
+    serve(service, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
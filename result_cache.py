@@ -0,0 +1,131 @@
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+from supabase import Client
+
+# 파라미터 값을 비교할 때 사용할 유효 자릿수 (이보다 작은 차이는 같은 형상으로 취급)
+DEFAULT_SIGNIFICANT_DIGITS = 8
+# 로컬 결과 캐시(SQLite) 경로
+DEFAULT_LOCAL_CACHE_PATH = os.environ.get("META_ATOM_RESULT_CACHE", ".cache/results.sqlite")
+# in_ 필터 하나에 넣을 해시 수 (URL 길이 제한)
+LOOKUP_CHUNK_SIZE = 100
+
+
+def canonicalize_parameters(parameters: dict, significant_digits: int = DEFAULT_SIGNIFICANT_DIGITS) -> str:
+    """키 순서와 부동소수점 표현 차이를 없앤 정규화 JSON 문자열을 반환합니다. (실수는 유효 자릿수로 양자화)"""
+    normalized = {}
+    for key, value in parameters.items():
+        if isinstance(value, float) or (isinstance(value, int) and not isinstance(value, bool)):
+            value = float(f"{float(value):.{significant_digits}g}")
+        normalized[str(key)] = value
+    return json.dumps(normalized, sort_keys=True, separators=(',', ':'))
+
+
+def parameter_hash(parameters: dict, significant_digits: int = DEFAULT_SIGNIFICANT_DIGITS) -> str:
+    """정규화한 parameters의 SHA-256 해시 (meta_atom_dataset.param_hash)."""
+    return hashlib.sha256(canonicalize_parameters(parameters, significant_digits).encode()).hexdigest()
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class LocalResultCache:
+    """param_hash → 결과 행(JSON)을 보관하는 로컬 SQLite 캐시. 원격 조회 없이 같은 형상의 재시뮬레이션을 막습니다."""
+
+    def __init__(self, path: str = DEFAULT_LOCAL_CACHE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # 워커 프로세스마다 연결을 따로 열며, 여러 프로세스가 동시에 쓸 수 있도록 WAL 모드를 사용합니다.
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS results (param_hash TEXT PRIMARY KEY, result TEXT NOT NULL)")
+        self.conn.commit()
+
+    def get_many(self, hashes: list[str]) -> dict[str, dict]:
+        found = {}
+        for chunk in _chunks(list(hashes), 500):
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(f"SELECT param_hash, result FROM results WHERE param_hash IN ({placeholders})", chunk)
+            found.update({param_hash: json.loads(result) for param_hash, result in rows})
+        return found
+
+    def put_many(self, results: dict[str, dict]):
+        if not results:
+            return
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO results (param_hash, result) VALUES (?, ?)",
+            [(param_hash, json.dumps(result)) for param_hash, result in results.items()],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class ResultCache:
+    """
+    2단계 결과 캐시: 로컬 SQLite(선택) → Supabase meta_atom_dataset.param_hash 순서로 조회합니다.
+    원격에서 찾은 결과는 로컬 캐시에도 채워 둡니다.
+    """
+
+    RESULT_COLUMNS = 'param_hash, transmission, phase, frequency'
+
+    def __init__(self, client: Client | None, local: LocalResultCache | None = None):
+        self.client = client
+        self.local = local
+
+    def lookup(self, hashes: list[str]) -> dict[str, dict]:
+        """이미 계산된 결과가 있는 해시만 골라 {param_hash: 결과 행}으로 반환합니다."""
+        hashes = list(dict.fromkeys(hashes))
+        found = self.local.get_many(hashes) if self.local else {}
+        missing = [h for h in hashes if h not in found]
+        if missing and self.client is not None:
+            remote = {}
+            for chunk in _chunks(missing, LOOKUP_CHUNK_SIZE):
+                response = self.client.table('meta_atom_dataset').select(self.RESULT_COLUMNS).in_('param_hash', chunk).execute()
+                remote.update({row['param_hash']: row for row in response.data or []})
+            if remote and self.local:
+                self.local.put_many(remote)
+            found.update(remote)
+        return found
+
+    def store(self, results: dict[str, dict]):
+        """새로 계산한 결과를 로컬 캐시에 기록합니다. (원격 기록은 ResultWriter가 담당)"""
+        if self.local:
+            self.local.put_many(results)
+
+
+def find_existing_hashes(client: Client, hashes: list[str]) -> set:
+    """이미 결과가 있거나(meta_atom_dataset) 작업이 등록된(simulation_jobs) 해시 집합을 반환합니다."""
+    existing = set()
+    hashes = list(dict.fromkeys(hashes))
+    for table in ('meta_atom_dataset', 'simulation_jobs'):
+        for chunk in _chunks(hashes, LOOKUP_CHUNK_SIZE):
+            response = client.table(table).select('param_hash').in_('param_hash', chunk).execute()
+            existing.update(row['param_hash'] for row in response.data or [])
+    return existing
+
+
+def dedupe_new_jobs(client: Client | None, parameters_list: list[dict]) -> list[dict]:
+    """
+    parameters 목록에서 중복(목록 내부 중복, 이미 결과가 있거나 등록된 작업)을 제거하고
+    param_hash가 포함된 simulation_jobs 삽입용 행 목록을 반환합니다.
+    """
+    jobs = {}
+    for parameters in parameters_list:
+        jobs.setdefault(parameter_hash(parameters), parameters)
+    existing = find_existing_hashes(client, list(jobs)) if client is not None else set()
+    skipped = len(parameters_list) - len(jobs) + len(existing & jobs.keys())
+    if skipped:
+        logging.info(f"중복되거나 이미 계산된 파라미터 {skipped}개를 건너뜁니다.")
+    return [
+        {"parameters": parameters, "param_hash": param_hash, "status": "pending"}
+        for param_hash, parameters in jobs.items()
+        if param_hash not in existing
+    ]
@@ -0,0 +1,191 @@
+import logging
+import threading
+import time
+from postgrest.exceptions import APIError
+from supabase import Client
+from data_access import RESULTS_TABLE
+from job_queue import SupabaseJobQueue
+from validity import annotate_validity
+from worker_metrics import get_registry
+
+# 일시적인 오류로 결과 기록이 이 횟수만큼 연속 실패한 작업은 버퍼에서 빼고 실패로 기록합니다. (버퍼가 끝없이 커지지 않도록)
+DEFAULT_FLUSH_MAX_ATTEMPTS = 10
+# 다시 보내도 같은 결과가 나오는 PostgreSQL 오류 클래스 (22: 잘못된 데이터, 23: 제약 조건 위반, 42: 스키마/권한 오류)
+PERMANENT_SQLSTATE_CLASSES = ('22', '23', '42')
+
+
+def group_rows_by_table(rows: list[tuple[str, dict]]) -> dict[str, list[dict]]:
+    """버퍼의 (테이블, 행) 목록을 테이블별 행 목록으로 묶습니다."""
+    grouped: dict[str, list[dict]] = {}
+    for table, row in rows:
+        grouped.setdefault(table, []).append(row)
+    return grouped
+
+
+def is_permanent_write_error(e: Exception) -> bool:
+    """PostgREST가 재시도해도 성공할 수 없는 오류(SQLSTATE 22/23/42, 요청 오류 PGRST1xx)를 돌려주었는지 판단합니다."""
+    if not isinstance(e, APIError):
+        return False
+    code = str(e.code or '')
+    return code[:2] in PERMANENT_SQLSTATE_CLASSES or code.startswith('PGRST1')
+
+
+def triage_failed_rows(rows: list, job_ids: list, attempts: dict, error: Exception, max_attempts: int) -> tuple[list, list, list]:
+    """
+    기록에 실패한 행을 (다시 시도할 행, 그 작업 id, 포기할 작업 id)로 나눕니다.
+    재시도할 수 없는 오류이거나 max_attempts번 연속 실패한 작업은 포기하며, attempts(작업별 실패 횟수)를 함께 갱신합니다.
+    """
+    permanent = is_permanent_write_error(error)
+    retry_rows, retry_ids, give_up = [], [], []
+    for row, job_id in zip(rows, job_ids):
+        failures = attempts.get(job_id, 0) + 1
+        if permanent or failures >= max_attempts:
+            attempts.pop(job_id, None)
+            give_up.append(job_id)
+        else:
+            attempts[job_id] = failures
+            retry_rows.append(row)
+            retry_ids.append(job_id)
+    return retry_rows, retry_ids, give_up
+
+
+def validate_rows(grouped: dict[str, list[dict]], metrics):
+    """
+    결과 테이블별 행 묶음을 한 번에 검증하여 is_valid, validity_flags를 채웁니다. (validity.annotate_validity)
+    검증 중 오류가 나면 해당 테이블의 행은 기본값(is_valid = TRUE)으로 기록되며, 백필(python validity.py)로 다시 검사할 수 있습니다.
+    """
+    with metrics.span('validate'):
+        for table, table_rows in grouped.items():
+            try:
+                invalid = annotate_validity(table_rows, table)
+            except Exception as e:
+                logging.error(f"{table} 결과 {len(table_rows)}건 검증 중 오류 발생: {e}")
+                continue
+            if invalid:
+                metrics.inc('rows_invalid', invalid)
+                logging.warning(f"{table} 결과 {len(table_rows)}건 중 {invalid}건이 물리적 정합성 검증을 통과하지 못했습니다. (is_valid = FALSE)")
+
+
+class ResultWriter:
+    """
+    시뮬레이션 결과를 모아 두었다가 한 번에 기록하는 write-behind 버퍼.
+    max_rows개가 쌓이거나 가장 오래된 결과가 max_delay_ms를 넘기면
+    결과 테이블별(meta_atom_dataset, meta_atom_spectra) 일괄 upsert 1회 + simulation_jobs 일괄 update 1회로 내보냅니다.
+    같은 param_hash의 결과가 이미 있으면 새 행은 무시됩니다. (캐시 적중, 중복 작업이 동시에 계산된 경우)
+    validate이면 기록 직전에 묶음 단위로 물리적 정합성을 검사하여 is_valid를 함께 기록합니다.
+    작업 완료 처리는 worker_id가 점유 중인('running') 작업에만 적용되어, 리스를 잃은 뒤 늦게 끝난 결과가
+    다른 워커가 다시 점유한 작업을 'completed'로 바꾸지 않습니다. (결과 행 자체는 param_hash로 중복 없이 기록)
+    기록에 실패한 행은 버퍼로 되돌려 다시 시도하되, 재시도할 수 없는 오류(제약 조건 위반 등)이거나 max_attempts번 실패한 작업은
+    버퍼에서 빼고 fail_simulation_jobs로 실패를 기록합니다. 묶음이 재시도할 수 없는 오류로 실패하면 한 건씩 다시 기록하여
+    원인이 된 행의 작업만 실패로 처리합니다.
+    """
+
+    def __init__(self, client: Client, worker_id: str, max_rows: int = 50, max_delay_ms: int = 500, validate: bool = True,
+                 max_attempts: int = DEFAULT_FLUSH_MAX_ATTEMPTS):
+        self.client = client
+        self.queue = SupabaseJobQueue(client)
+        self.worker_id = worker_id
+        self.validate = validate
+        self.max_rows = max(1, max_rows)
+        self.max_delay = max(1, max_delay_ms) / 1000
+        self.max_attempts = max(1, max_attempts)
+        self._rows: list[tuple[str, dict]] = []  # (결과 테이블, 행)
+        self._job_ids: list = []
+        self._attempts: dict = {}  # 작업 id -> 연속 기록 실패 횟수 (flush 안에서만 사용)
+        self._oldest: float | None = None
+        self._lock = threading.Lock()
+        # flush 호출이 동시에 두 번 DB로 나가지 않도록 직렬화
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="result-writer", daemon=True)
+        self._flusher.start()
+
+    def add(self, job_id, dataset_row: dict, table: str = RESULTS_TABLE):
+        """완료된 작업 하나의 결과 행을 버퍼에 추가합니다."""
+        with self._lock:
+            self._rows.append((table, dataset_row))
+            self._job_ids.append(job_id)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            should_flush = len(self._rows) >= self.max_rows
+        if should_flush:
+            self.flush()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def flush(self) -> int:
+        """버퍼에 쌓인 결과를 기록하고, 기록한 행 수를 반환합니다. 실패한 행은 버퍼로 되돌리거나 작업 실패로 기록합니다."""
+        with self._flush_lock:
+            with self._lock:
+                rows, job_ids = self._rows, self._job_ids
+                self._rows, self._job_ids, self._oldest = [], [], None
+            if not rows:
+                return 0
+
+            metrics = get_registry()
+            if self.validate:
+                validate_rows(group_rows_by_table(rows), metrics)
+            written = self._write_batch(rows, job_ids, metrics)
+            if written:
+                logging.info(f"결과 {written}건을 일괄 저장하고 작업 상태를 'completed'로 업데이트했습니다.")
+            return written
+
+    def _write_batch(self, rows: list[tuple[str, dict]], job_ids: list, metrics, isolate: bool = True) -> int:
+        try:
+            # 1. 결과를 먼저 기록한 뒤 2. 작업 상태를 일괄 갱신해야 'completed'인 작업은 항상 결과가 존재합니다.
+            with metrics.span('insert'):
+                for table, table_rows in group_rows_by_table(rows).items():
+                    self.client.table(table).upsert(table_rows, on_conflict="param_hash", ignore_duplicates=True).execute()
+            with metrics.span('status_update'):
+                self.client.table("simulation_jobs").update({
+                    "status": "completed",
+                    "progress": 100,
+                    "lease_expires_at": None,
+                    "checkpoint": None
+                }).in_("id", job_ids).eq("worker_id", self.worker_id).eq("status", "running").execute()
+        except Exception as e:
+            metrics.inc('flush_errors')
+            if isolate and len(rows) > 1 and is_permanent_write_error(e):
+                logging.warning(f"결과 {len(rows)}건 일괄 기록이 재시도할 수 없는 오류로 실패했습니다: {e}. 원인이 된 행을 찾기 위해 한 건씩 다시 기록합니다.")
+                return sum(self._write_batch([row], [job_id], metrics, isolate=False) for row, job_id in zip(rows, job_ids))
+            self._handle_failure(rows, job_ids, e, metrics)
+            return 0
+
+        for job_id in job_ids:
+            self._attempts.pop(job_id, None)
+        metrics.inc('jobs_completed', len(rows))
+        return len(rows)
+
+    def _handle_failure(self, rows: list[tuple[str, dict]], job_ids: list, error: Exception, metrics):
+        """실패한 행 중 다시 시도할 행은 버퍼 앞에 되돌리고, 포기한 작업은 실패로 기록합니다."""
+        retry_rows, retry_ids, give_up = triage_failed_rows(rows, job_ids, self._attempts, error, self.max_attempts)
+        if retry_rows:
+            logging.error(f"결과 {len(retry_rows)}건 일괄 기록 중 오류 발생: {error}. 다음 flush에서 재시도합니다.")
+            with self._lock:
+                self._rows[:0] = retry_rows
+                self._job_ids[:0] = retry_ids
+                self._oldest = time.monotonic()
+        if give_up:
+            retryable = not is_permanent_write_error(error)
+            logging.error(f"작업 {len(give_up)}건의 결과를 기록하지 못해 버퍼에서 제외하고 실패로 기록합니다. "
+                          f"({'재시도 횟수 초과' if retryable else '재시도할 수 없는 오류'}: {error})")
+            try:
+                self.queue.fail(self.worker_id, give_up, f"result write failed: {error}", retryable=retryable)
+            except Exception as fail_e:
+                # 실패 기록도 안 되면 리스가 만료된 뒤 reap_expired가 작업을 다시 대기열로 돌려보냅니다.
+                logging.error(f"Job {give_up}의 실패 상태를 업데이트하는 중에도 오류 발생: {fail_e}")
+            metrics.inc('jobs_failed', len(give_up))
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.max_delay / 2):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.max_delay
+            if due:
+                self.flush()
+
+    def close(self):
+        """백그라운드 flush를 멈추고 남은 결과를 모두 기록합니다."""
+        self._closed.set()
+        self.flush()
@@ -0,0 +1,177 @@
+import json
+import time
+import logging
+import argparse
+import warnings
+import numpy as np
+from scipy.stats import qmc
+from supabase import Client
+from data_access import get_supabase_client, iter_table_pages
+from job_scheduling import DEFAULT_PRIORITY, RUNTIME_MODEL_PATH, RuntimeModel, annotate_jobs
+from result_cache import parameter_hash
+from spectral_records import FREQUENCY_SWEEP_KEY, frequency_grid
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def load_parameter_space(path: str) -> list[dict]:
+    """
+    파라미터 공간 명세(JSON)를 읽습니다. 예: parameter_space.json
+      {"name": "radius", "low": 50, "high": 250}            연속 파라미터
+      {"name": "frequency", "low": 0.5, "high": 20, "log": true}  로그 스케일
+      {"name": "material", "choices": ["TiO2", "Si", "GaN"]}     이산 파라미터
+    """
+    with open(path) as f:
+        space = json.load(f)
+    space = space.get('parameters', space) if isinstance(space, dict) else space
+    for spec in space:
+        if 'choices' in spec:
+            if not spec['choices']:
+                raise ValueError(f"파라미터 '{spec['name']}'의 choices가 비어 있습니다.")
+        elif not spec['low'] < spec['high']:
+            raise ValueError(f"파라미터 '{spec['name']}'의 범위가 잘못되었습니다: low={spec['low']}, high={spec['high']}")
+        elif spec.get('log') and spec['low'] <= 0:
+            raise ValueError(f"로그 스케일 파라미터 '{spec['name']}'의 low는 0보다 커야 합니다.")
+    return space
+
+
+def iter_unit_design(method: str, n_points: int, n_dims: int, seed: int | None, chunk_size: int):
+    """[0, 1)^D 단위 초입방체 위의 설계점을 chunk_size개씩 생성합니다."""
+    if method == 'lhs':
+        # LHS는 전체 점 집합 단위로 층화되므로 한 번에 생성한 뒤 나눠서 반환합니다.
+        design = qmc.LatinHypercube(d=n_dims, seed=seed).random(n_points)
+        for start in range(0, n_points, chunk_size):
+            yield design[start:start + chunk_size]
+        return
+
+    if method == 'sobol':
+        engine = qmc.Sobol(d=n_dims, scramble=True, seed=seed)
+    elif method == 'halton':
+        engine = qmc.Halton(d=n_dims, scramble=True, seed=seed)
+    else:
+        raise ValueError(f"지원하지 않는 샘플링 방식입니다: '{method}' (lhs, sobol, halton 중 선택)")
+
+    # Sobol/Halton은 수열이므로 이어서 뽑아도 저불일치(low-discrepancy) 성질이 유지됩니다.
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='.*balance properties of Sobol.*')
+        for start in range(0, n_points, chunk_size):
+            yield engine.random(min(chunk_size, n_points - start))
+
+
+def scale_design(unit: np.ndarray, space: list[dict]) -> list[dict]:
+    """단위 설계점을 명세의 범위/스케일/이산값으로 변환하여 parameters 딕셔너리 리스트로 반환합니다."""
+    columns = []
+    for i, spec in enumerate(space):
+        u = unit[:, i]
+        if 'choices' in spec:
+            index = np.minimum((u * len(spec['choices'])).astype(np.int64), len(spec['choices']) - 1)
+            columns.append(np.asarray(spec['choices'], dtype=object)[index])
+        elif spec.get('log'):
+            low, high = np.log(spec['low']), np.log(spec['high'])
+            columns.append(np.exp(low + u * (high - low)))
+        else:
+            columns.append(spec['low'] + u * (spec['high'] - spec['low']))
+
+    names = [spec['name'] for spec in space]
+    rows = zip(*(column.tolist() for column in columns))
+    return [dict(zip(names, row)) for row in rows]
+
+
+def load_existing_keys(client: Client) -> set:
+    """
+    simulation_jobs와 meta_atom_dataset에 이미 있는 파라미터의 param_hash 집합을 페이지 단위로 읽어 옵니다.
+    param_hash 컬럼이 비어 있는 기존 행은 parameters에서 해시를 계산합니다.
+    """
+    keys = set()
+    for table in ('simulation_jobs', 'meta_atom_dataset'):
+        for records in iter_table_pages(client, table, 'param_hash, parameters'):
+            keys.update(record.get('param_hash') or parameter_hash(record['parameters']) for record in records)
+    logging.info(f"기존 작업/결과 {len(keys)}개의 파라미터를 중복 검사용으로 불러왔습니다.")
+    return keys
+
+
+def insert_with_retry(client: Client, jobs: list[dict], max_retries: int = 5, backoff: float = 1.0):
+    """작업 묶음 하나를 삽입합니다. 실패하면 지수 백오프로 max_retries번까지 재시도합니다."""
+    for attempt in range(max_retries + 1):
+        try:
+            client.table('simulation_jobs').insert(jobs).execute()
+            return
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = backoff * 2 ** attempt
+            logging.warning(f"작업 {len(jobs)}개 삽입 실패 ({attempt + 1}/{max_retries}): {e}. {delay:.1f}초 후 재시도합니다.")
+            time.sleep(delay)
+
+
+def seed_jobs(client: Client | None, space: list[dict], n_points: int, method: str = 'lhs', seed: int | None = None,
+              chunk_size: int = 1000, skip_existing: bool = True, dry_run: bool = False, frequency_sweep: dict | None = None,
+              priority: int = DEFAULT_PRIORITY) -> int:
+    """
+    파라미터 공간 설계점을 생성하여 simulation_jobs에 chunk_size개씩 삽입하고, 삽입한 작업 수를 반환합니다.
+    기존 작업/결과 및 이번 설계 안에서 중복되는 파라미터(param_hash 기준)는 건너뜁니다.
+    frequency_sweep({start, stop, points})을 주면 주파수 점마다가 아니라 형상마다 스펙트럼 작업 하나를 만듭니다.
+    런타임 모델(job_scheduling)이 있으면 작업마다 예상 비용(estimated_cost)을 함께 기록합니다.
+    """
+    seen = load_existing_keys(client) if skip_existing and client is not None else set()
+    runtime_model = RuntimeModel.load(RUNTIME_MODEL_PATH)
+    inserted, skipped = 0, 0
+    started = time.monotonic()
+
+    for unit in iter_unit_design(method, n_points, len(space), seed, chunk_size):
+        jobs = []
+        for parameters in scale_design(unit, space):
+            if frequency_sweep is not None:
+                parameters.pop('frequency', None)
+                parameters[FREQUENCY_SWEEP_KEY] = frequency_sweep
+            key = parameter_hash(parameters)
+            if key in seen:
+                skipped += 1
+                continue
+            seen.add(key)
+            jobs.append({"parameters": parameters, "param_hash": key, "status": "pending"})
+
+        annotate_jobs(jobs, runtime_model, priority)
+        if jobs and not dry_run:
+            insert_with_retry(client, jobs)
+        inserted += len(jobs)
+
+        elapsed = time.monotonic() - started
+        logging.info(f"진행률 {inserted + skipped}/{n_points} (삽입 {inserted}, 중복 건너뜀 {skipped}, {inserted / max(elapsed, 1e-9):.0f} jobs/s)")
+
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LHS / Sobol / Halton 설계로 초기 시뮬레이션 작업을 생성합니다.")
+    parser.add_argument('--spec', default='parameter_space.json', help="파라미터 공간 명세 JSON 파일")
+    parser.add_argument('-n', '--n-points', type=int, required=True, help="생성할 설계점 수")
+    parser.add_argument('--method', choices=['lhs', 'sobol', 'halton'], default='lhs', help="샘플링 방식 (기본값: lhs)")
+    parser.add_argument('--seed', type=int, default=None, help="난수 시드")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="한 번에 삽입할 작업 수")
+    parser.add_argument('--allow-duplicates', action='store_true', help="기존 작업과의 중복 검사를 건너뜀")
+    parser.add_argument('--frequency-sweep', default=None, metavar='START:STOP:POINTS', help="형상별 스펙트럼 작업 생성 (예: 1:20:200)")
+    parser.add_argument('--priority', type=int, default=DEFAULT_PRIORITY, help="작업 우선순위 등급 (큰 값부터 점유)")
+    parser.add_argument('--dry-run', action='store_true', help="DB에 삽입하지 않고 생성만 수행")
+    args = parser.parse_args()
+
+    frequency_sweep = None
+    if args.frequency_sweep:
+        start, stop, points = args.frequency_sweep.split(':')
+        frequency_sweep = {"start": float(start), "stop": float(stop), "points": int(points)}
+        frequency_grid({FREQUENCY_SWEEP_KEY: frequency_sweep})  # 잘못된 범위는 삽입 전에 ValueError
+
+    space = load_parameter_space(args.spec)
+    client = None if args.dry_run else get_supabase_client()
+    inserted = seed_jobs(
+        client, space, args.n_points,
+        method=args.method, seed=args.seed, chunk_size=args.chunk_size,
+        skip_existing=not args.allow_duplicates, dry_run=args.dry_run, frequency_sweep=frequency_sweep,
+        priority=args.priority,
+    )
+    logging.info(f"총 {inserted}개의 시뮬레이션 작업을 생성했습니다. ({args.method})")
+
+
+if __name__ == "__main__":
+    main()
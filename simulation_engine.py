@@ -0,0 +1,149 @@
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+import numpy as np
+
+
+@dataclass
+class SimulationResult:
+    """배치 시뮬레이션 결과. 모든 배열은 입력 배치와 같은 길이(N)를 가집니다."""
+    transmission: np.ndarray
+    phase: np.ndarray
+    frequency: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.transmission)
+
+
+@dataclass
+class SpectralResult:
+    """
+    형상별 주파수 스펙트럼 결과. frequency는 공통 주파수 격자(F,)이고 나머지 배열은 (N, F) 모양입니다.
+    S-파라미터는 복소수 배열이며, 엔진이 계산하지 않으면 None입니다.
+    """
+    frequency: np.ndarray
+    transmission: np.ndarray
+    phase: np.ndarray
+    s11: np.ndarray | None = None
+    s21: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.transmission)
+
+
+class SimulationEngine(ABC):
+    """
+    물리 시뮬레이션 엔진 인터페이스.
+    RCWA/FDTD 솔버는 형상 배열을 한 번에 계산할 때 훨씬 빠르므로,
+    작업 하나가 아니라 (N, P) 파라미터 배열 단위로 계산합니다.
+    """
+
+    # simulate_batch 입력 배열의 열 순서와 누락 시 기본값
+    parameter_names: tuple[str, ...] = ()
+    parameter_defaults: dict[str, float] = {}
+
+    def __init__(self, batch_size: int = 64):
+        self.batch_size = max(1, batch_size)
+
+    def params_to_array(self, parameters: dict) -> np.ndarray:
+        """작업의 parameters JSON 하나를 엔진 입력 행(P,)으로 변환합니다."""
+        return np.array(
+            [float(parameters.get(name, self.parameter_defaults.get(name, np.nan))) for name in self.parameter_names],
+            dtype=np.float64,
+        )
+
+    @abstractmethod
+    def simulate_batch(self, params_array: np.ndarray) -> SimulationResult:
+        """(N, P) 파라미터 배열을 받아 N개 형상의 물리 응답을 계산합니다."""
+
+    def simulate_spectrum(self, params_array: np.ndarray, frequencies: np.ndarray) -> SpectralResult:
+        """
+        (N, P) 파라미터 배열의 각 형상을 주파수 격자 frequencies(F,) 전체에서 계산합니다.
+        기본 구현은 'frequency' 열만 바꾼 (N*F, P) 배열을 simulate_batch 한 번으로 계산하고,
+        투과율(전력)과 위상(도)으로부터 S21 = sqrt(T)·exp(iφ)를 구합니다.
+        한 번의 계산으로 전체 스펙트럼을 얻는 주파수 영역 솔버는 이 메서드를 재정의하면 됩니다.
+        """
+        if 'frequency' not in self.parameter_names:
+            raise ValueError(f"{type(self).__name__}은(는) 'frequency' 파라미터가 없어 스펙트럼을 계산할 수 없습니다.")
+        params_array = np.atleast_2d(np.asarray(params_array, dtype=np.float64))
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        n, f = len(params_array), len(frequencies)
+
+        expanded = np.repeat(params_array, f, axis=0)
+        expanded[:, self.parameter_names.index('frequency')] = np.tile(frequencies, n)
+        result = self.simulate_batch(expanded)
+        transmission = result.transmission.reshape(n, f)
+        phase = result.phase.reshape(n, f)
+        s21 = np.sqrt(np.clip(transmission, 0, None)) * np.exp(1j * np.deg2rad(phase))
+        return SpectralResult(frequency=frequencies, transmission=transmission, phase=phase, s21=s21)
+
+    # FDTD처럼 오래 걸리는 솔버가 중간 상태를 저장하고 다른 워커에서 이어서 계산할 수 있으면 True
+    resumable: bool = False
+
+    def simulate_resumable(self, params: np.ndarray, state: dict | None, save_checkpoint) -> SimulationResult:
+        """
+        형상 하나(P,)를 계산합니다. state는 이전 시도가 남긴 체크포인트(없으면 None)입니다.
+        계산 도중 save_checkpoint(progress, state)를 호출하면 진행률(0~100)과 JSON으로 직렬화 가능한 중간 상태가 저장됩니다.
+        기본 구현은 체크포인트 없이 simulate_batch로 계산합니다.
+        """
+        return self.simulate_batch(params[None, :])
+
+
+class AnalyticEngine(SimulationEngine):
+    """
+    기존 worker.process_job의 주파수 의존 가상 모델을 벡터화한 참조 구현체.
+    delay_range는 실제 솔버의 배치당 계산 시간을 흉내 내기 위한 지연(초)이며, (0, 0)이면 지연이 없습니다.
+    """
+
+    parameter_names = ('frequency',)
+    parameter_defaults = {'frequency': 1.0}
+
+    def __init__(self, batch_size: int = 64, delay_range: tuple[float, float] = (1.0, 4.0), seed: int | None = None):
+        super().__init__(batch_size)
+        self.delay_range = delay_range
+        self.rng = np.random.default_rng(seed)
+
+    def simulate_batch(self, params_array: np.ndarray) -> SimulationResult:
+        params_array = np.atleast_2d(np.asarray(params_array, dtype=np.float64))
+        n = params_array.shape[0]
+
+        if self.delay_range[1] > 0:
+            time.sleep(self.rng.uniform(*self.delay_range))  # 배치 계산에 시간이 걸리는 것을 시뮬레이션
+
+        frequency = params_array[:, 0]
+        transmission = self.rng.uniform(0.1, 0.99, n) * (1 / (1 + (frequency / 10) ** 2))  # 주파수에 따른 가상 감쇠
+        phase = self.rng.uniform(-180, 180, n) * (1 - frequency / 20)  # 주파수에 따른 가상 위상 변이
+        return SimulationResult(transmission=transmission, phase=phase, frequency=frequency)
+
+
+class InstantEngine(AnalyticEngine):
+    """
+    벤치마크용 결정적 엔진. AnalyticEngine과 같은 주파수 의존 모델을 난수와 지연 없이 계산하므로
+    처리 순서나 워커 수와 무관하게 같은 입력에는 항상 같은 결과를 내고, 측정값에는 I/O와 오케스트레이션 비용만 남습니다.
+    """
+
+    def __init__(self, batch_size: int = 64):
+        super().__init__(batch_size, delay_range=(0.0, 0.0), seed=0)
+
+    def simulate_batch(self, params_array: np.ndarray) -> SimulationResult:
+        params_array = np.atleast_2d(np.asarray(params_array, dtype=np.float64))
+        frequency = params_array[:, 0]
+        transmission = 0.545 * (1 / (1 + (frequency / 10) ** 2))
+        phase = 90.0 * (1 - frequency / 20)
+        return SimulationResult(transmission=transmission, phase=phase, frequency=frequency)
+
+
+# 이름으로 선택 가능한 엔진 목록 (실제 RCWA/FDTD 엔진은 여기에 등록)
+ENGINES: dict[str, type[SimulationEngine]] = {
+    'analytic': AnalyticEngine,
+    'instant': InstantEngine,
+}
+
+
+def get_engine(name: str = 'analytic', **kwargs) -> SimulationEngine:
+    """등록된 이름으로 시뮬레이션 엔진 인스턴스를 생성합니다."""
+    try:
+        engine_cls = ENGINES[name]
+    except KeyError:
+        raise ValueError(f"알 수 없는 시뮬레이션 엔진입니다: '{name}'. 사용 가능: {sorted(ENGINES)}") from None
+    return engine_cls(**kwargs)
@@ -0,0 +1,98 @@
+import numpy as np
+from supabase import Client
+from data_access import DEFAULT_PAGE_SIZE, iter_table_pages
+from simulation_engine import SpectralResult
+
+# 스펙트럼 결과 테이블 (supabase/migrations/20261017_spectral_records.sql)
+SPECTRA_TABLE = 'meta_atom_spectra'
+# 작업 parameters에 {"frequency_sweep": {"start": 1, "stop": 20, "points": 200}}이 있으면 스펙트럼 작업
+FREQUENCY_SWEEP_KEY = 'frequency_sweep'
+MAX_SPECTRUM_POINTS = 4096
+# 행마다 저장되는 REAL[] 배열 컬럼 (S-파라미터는 실수부/허수부로 나눠 저장)
+SPECTRAL_ARRAYS = ('frequency', 'transmission', 'phase', 's11_re', 's11_im', 's21_re', 's21_im')
+SPECTRA_COLUMNS = 'id, job_id, created_at, parameters, n_points, ' + ', '.join(SPECTRAL_ARRAYS)
+
+
+def is_spectral_job(parameters: dict) -> bool:
+    return isinstance(parameters, dict) and FREQUENCY_SWEEP_KEY in parameters
+
+
+def frequency_grid(parameters: dict) -> np.ndarray:
+    """작업 parameters의 frequency_sweep(start, stop, points)을 선형 주파수 격자(F,)로 변환합니다."""
+    sweep = parameters[FREQUENCY_SWEEP_KEY]
+    if not isinstance(sweep, dict):
+        raise ValueError(f"{FREQUENCY_SWEEP_KEY}는 start, stop, points를 가진 객체여야 합니다.")
+    missing = [key for key in ('start', 'stop', 'points') if key not in sweep]
+    if missing:
+        raise ValueError(f"{FREQUENCY_SWEEP_KEY}에 {missing} 값이 없습니다.")
+    start, stop, points = float(sweep['start']), float(sweep['stop']), int(sweep['points'])
+    if not 1 <= points <= MAX_SPECTRUM_POINTS:
+        raise ValueError(f"주파수 점 수는 1~{MAX_SPECTRUM_POINTS} 사이여야 합니다: {points}")
+    if not np.isfinite([start, stop]).all() or stop < start:
+        raise ValueError(f"잘못된 주파수 범위입니다: {start} ~ {stop}")
+    return np.linspace(start, stop, points)
+
+
+def to_real_array(values: np.ndarray) -> list[float]:
+    """
+    배열을 Postgres REAL[]로 보낼 JSON 리스트로 변환합니다.
+    float32 유효숫자(7자리)로 반올림하므로 float64 repr보다 요청 본문이 훨씬 작습니다.
+    """
+    return np.char.mod('%.7g', np.asarray(values, dtype=np.float32)).astype(np.float64).tolist()
+
+
+def spectrum_row(job: dict, param_hash: str, result: SpectralResult, i: int) -> dict:
+    """스펙트럼 결과 i번째 형상을 meta_atom_spectra 행 하나로 변환합니다."""
+    row = {
+        "job_id": job['id'],
+        "parameters": job['parameters'],
+        "param_hash": param_hash,
+        "n_points": len(result.frequency),
+        "frequency": to_real_array(result.frequency),
+        "transmission": to_real_array(result.transmission[i]),
+        "phase": to_real_array(result.phase[i]),
+    }
+    for name in ('s11', 's21'):
+        values = getattr(result, name)
+        if values is not None:
+            row[f"{name}_re"] = to_real_array(values[i].real)
+            row[f"{name}_im"] = to_real_array(values[i].imag)
+    return row
+
+
+def records_to_arrays(records: list[dict], parameter_names: list[str] | None = None, fill_missing: bool = False) -> dict[str, np.ndarray]:
+    """
+    meta_atom_spectra 레코드를 (N, F) float32 배열 묶음으로 변환합니다. (torch.from_numpy로 바로 텐서화 가능)
+    parameter_names를 주면 parameters JSON을 그 순서의 (N, P) 배열로 함께 반환합니다.
+    모든 레코드의 주파수 점 수(F)가 같아야 하며, 값이 없는 S-파라미터 컬럼은 결과에서 빠집니다.
+    fill_missing이면 컬럼을 빼지 않고 값이 없는 레코드의 행만 NaN으로 채워, 페이지마다 같은 컬럼 구성을 유지합니다.
+    """
+    n_points = {record['n_points'] for record in records}
+    if len(n_points) > 1:
+        raise ValueError(f"주파수 점 수가 서로 다른 스펙트럼은 하나의 배열로 합칠 수 없습니다: {sorted(n_points)}")
+
+    arrays = {}
+    for name in SPECTRAL_ARRAYS:
+        values = [record.get(name) for record in records]
+        if any(value is None for value in values):
+            if not fill_missing:
+                continue
+            out = np.full((len(records), int(next(iter(n_points)))), np.nan, dtype=np.float32)
+            for i, value in enumerate(values):
+                if value is not None:
+                    out[i] = value
+            arrays[name] = out
+            continue
+        arrays[name] = np.asarray(values, dtype=np.float32).reshape(len(records), -1)
+    if parameter_names is not None:
+        arrays['parameters'] = np.array(
+            [[float(record['parameters'].get(name, np.nan)) for name in parameter_names] for record in records],
+            dtype=np.float32,
+        ).reshape(len(records), len(parameter_names))
+    return arrays
+
+
+def iter_spectral_pages(client: Client, page_size: int = DEFAULT_PAGE_SIZE, after: tuple | None = None, valid_only: bool = True):
+    """meta_atom_spectra를 (created_at, id) 키셋 페이지네이션으로 조회하여 페이지 단위 레코드 리스트를 반환합니다."""
+    filters = {'is_valid': 'true'} if valid_only else None
+    yield from iter_table_pages(client, SPECTRA_TABLE, SPECTRA_COLUMNS, filters, page_size, after=after)
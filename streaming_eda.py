@@ -0,0 +1,568 @@
+import os
+import glob
+import json
+import logging
+import argparse
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+import h5py
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 청크 하나에서 읽을 최대 행 수 (HDF5 블록 / Parquet row group 묶음)
+DEFAULT_CHUNK_ROWS = int(os.environ.get("EDA_CHUNK_ROWS", 262_144))
+# 1차원 히스토그램 / 2차원 밀도 격자의 축당 최대 구간 수
+DEFAULT_HIST_BINS = 256
+DEFAULT_DENSITY_BINS = 512
+# 분위수 스케치의 레벨별 용량 (클수록 정확, 메모리는 대략 k * log2(N / k))
+DEFAULT_QUANTILE_K = 2048
+# 학습 가시성 테스트용으로 유지할 균등 표본 크기
+DEFAULT_SAMPLE_SIZE = 200_000
+# 요약 보고서에 기록할 분위수
+REPORT_QUANTILES = (0.001, 0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99, 0.999)
+# 수치형이어도 분석 대상이 아닌 컬럼
+EXCLUDED_COLUMNS = ('id', 'job_id', 'created_at', 'param_hash', 'is_valid', 'validity_flags')
+# 출력 컬럼 (2차원 밀도 기본 쌍: 각 파라미터 × 출력)
+OUTPUT_COLUMNS = ('transmission', 'phase')
+
+
+def _safe_divide(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.divide(a, b, out=np.zeros(np.broadcast(a, b).shape), where=b > 0)
+
+
+class CovarianceSketch:
+    """
+    열 쌍별(pairwise-complete) 공분산을 한 번의 스캔으로 누적하는 스케치 (Chan 병합 공식).
+    (i, j) 원소는 두 열이 모두 유한한 행만으로 계산하므로, 설계마다 파라미터 컬럼이 달라 NaN이 섞여도 행을 통째로 버리지 않습니다.
+    """
+
+    def __init__(self, n_cols: int):
+        shape = (n_cols, n_cols)
+        self.n = np.zeros(shape)
+        self.mean_a = np.zeros(shape)   # (i, j) 쌍에서 열 i의 평균
+        self.mean_b = np.zeros(shape)   # (i, j) 쌍에서 열 j의 평균
+        self.m2_a = np.zeros(shape)
+        self.m2_b = np.zeros(shape)
+        self.cross = np.zeros(shape)
+        self.min = np.full(n_cols, np.inf)
+        self.max = np.full(n_cols, -np.inf)
+
+    def update(self, values: np.ndarray):
+        """(N, C) 배열 하나로 통계를 갱신합니다. NaN/inf는 결측으로 취급합니다."""
+        if len(values) == 0:
+            return
+        finite = np.isfinite(values)
+        mask = finite.astype(np.float64)
+        # 청크 평균으로 이동한 뒤 합을 구해야 큰 값에서 자릿수 손실이 적습니다.
+        counts = finite.sum(axis=0)
+        shift = _safe_divide(np.where(finite, values, 0.0).sum(axis=0), counts)
+        centered = np.where(finite, values - shift, 0.0)
+
+        other = CovarianceSketch(values.shape[1])
+        other.n = mask.T @ mask
+        sum_a = centered.T @ mask
+        sum_b = sum_a.T
+        other.mean_a = _safe_divide(sum_a, other.n)
+        other.mean_b = _safe_divide(sum_b, other.n)
+        other.m2_a = (centered ** 2).T @ mask - sum_a * other.mean_a
+        other.m2_b = other.m2_a.T.copy()
+        other.cross = centered.T @ centered - sum_a * other.mean_b
+        other.mean_a = np.where(other.n > 0, other.mean_a + shift[:, None], 0.0)
+        other.mean_b = np.where(other.n > 0, other.mean_b + shift[None, :], 0.0)
+        other.min = np.where(counts > 0, np.min(np.where(finite, values, np.inf), axis=0), np.inf)
+        other.max = np.where(counts > 0, np.max(np.where(finite, values, -np.inf), axis=0), -np.inf)
+        self.merge(other)
+
+    def merge(self, other: "CovarianceSketch"):
+        total = self.n + other.n
+        weight = _safe_divide(self.n * other.n, total)
+        delta_a = other.mean_a - self.mean_a
+        delta_b = other.mean_b - self.mean_b
+        self.mean_a = self.mean_a + _safe_divide(delta_a * other.n, total)
+        self.mean_b = self.mean_b + _safe_divide(delta_b * other.n, total)
+        self.m2_a = self.m2_a + other.m2_a + delta_a ** 2 * weight
+        self.m2_b = self.m2_b + other.m2_b + delta_b ** 2 * weight
+        self.cross = self.cross + other.cross + delta_a * delta_b * weight
+        self.n = total
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+
+    @property
+    def count(self) -> np.ndarray:
+        return np.diag(self.n).astype(np.int64)
+
+    @property
+    def mean(self) -> np.ndarray:
+        return np.diag(self.mean_a).copy()
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(_safe_divide(np.diag(self.m2_a), np.diag(self.n)))
+
+    def covariance(self) -> np.ndarray:
+        return np.where(self.n > 1, _safe_divide(self.cross, self.n - 1), np.nan)
+
+    def correlation(self) -> np.ndarray:
+        denom = np.sqrt(self.m2_a * self.m2_b)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.where(denom > 0, self.cross / denom, np.nan)
+        return np.clip(corr, -1.0, 1.0)
+
+
+class AdaptiveGrid:
+    """
+    범위를 미리 몰라도 되는 병합 가능한 고정 구간 카운트 (1차원 히스토그램, 2차원 밀도 격자).
+
+    축마다 구간 폭을 2의 거듭제곱으로 잡고 0에 정렬하므로, 서로 다른 청크에서 만든 격자도 폭을 두 배씩 키워(인접 구간 합치기)
+    같은 폭으로 맞춘 뒤 그대로 더할 수 있습니다. 데이터 범위가 넓어져 구간 수가 max_bins를 넘으면 같은 방식으로 폭을 키웁니다.
+    """
+
+    def __init__(self, ndim: int, max_bins: int = DEFAULT_HIST_BINS):
+        self.ndim = ndim
+        self.max_bins = max_bins
+        self.width = None                       # 축별 구간 폭 (2의 거듭제곱)
+        self.start = np.zeros(ndim, dtype=np.int64)  # 첫 구간의 전역 인덱스 (구간 = [i * width, (i + 1) * width))
+        self.counts = None
+        self.total = 0
+
+    @property
+    def empty(self) -> bool:
+        return self.counts is None
+
+    def _initial_width(self, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        scale = np.maximum(np.abs(low), np.abs(high))
+        span = np.maximum(high - low, np.maximum(scale * 1e-9, 1e-12))
+        return 2.0 ** np.ceil(np.log2(span / (self.max_bins - 2)))
+
+    def _coarsen(self, axis: int):
+        """axis 방향 구간 폭을 두 배로 키우고 인접 구간을 합칩니다."""
+        merged = (self.start[axis] + np.arange(self.counts.shape[axis])) // 2
+        boundaries = np.flatnonzero(np.diff(merged, prepend=merged[0] - 1))
+        self.counts = np.add.reduceat(self.counts, boundaries, axis=axis)
+        self.start[axis] = merged[0]
+        self.width[axis] *= 2
+
+    def _extend(self, low: np.ndarray, high: np.ndarray):
+        """전역 인덱스 [low, high] 범위를 덮도록 카운트 배열을 늘립니다."""
+        end = self.start + np.array(self.counts.shape) - 1
+        pad = [(int(self.start[a] - low[a]), int(high[a] - end[a])) for a in range(self.ndim)]
+        if any(before or after for before, after in pad):
+            self.counts = np.pad(self.counts, pad)
+            self.start = low.copy()
+
+    def _fit_range(self, range_fn):
+        """range_fn()이 돌려주는 전역 인덱스 범위가 max_bins에 들어올 때까지 폭을 키웁니다."""
+        while True:
+            low, high = range_fn()
+            too_wide = np.flatnonzero(high - low + 1 > self.max_bins)
+            if len(too_wide) == 0:
+                return low, high
+            for axis in too_wide:
+                self._coarsen(axis)
+
+    def update(self, values: np.ndarray):
+        """(N, ndim) 배열로 카운트를 갱신합니다. 한 축이라도 유한하지 않은 행은 제외합니다."""
+        values = np.asarray(values, dtype=np.float64).reshape(len(values), self.ndim)
+        values = values[np.isfinite(values).all(axis=1)]
+        if len(values) == 0:
+            return
+        if self.empty:
+            self.width = self._initial_width(values.min(axis=0), values.max(axis=0))
+            self.start = np.floor(values.min(axis=0) / self.width).astype(np.int64)
+            self.counts = np.zeros((1,) * self.ndim, dtype=np.int64)
+
+        def index_range():
+            index = np.floor(values / self.width).astype(np.int64)
+            end = self.start + np.array(self.counts.shape) - 1
+            return np.minimum(index.min(axis=0), self.start), np.maximum(index.max(axis=0), end)
+
+        low, high = self._fit_range(index_range)
+        self._extend(low, high)
+        index = np.floor(values / self.width).astype(np.int64) - self.start
+        flat = np.ravel_multi_index(tuple(index.T), self.counts.shape)
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+        self.total += len(values)
+
+    def merge(self, other: "AdaptiveGrid"):
+        if other.empty:
+            return
+        if self.empty:
+            self.width, self.start, self.counts = other.width.copy(), other.start.copy(), other.counts.copy()
+            self.total = other.total
+            return
+        other = other.copy()
+        for axis in range(self.ndim):
+            while self.width[axis] < other.width[axis]:
+                self._coarsen(axis)
+            while other.width[axis] < self.width[axis]:
+                other._coarsen(axis)
+
+        def union_range():
+            self_end = self.start + np.array(self.counts.shape) - 1
+            other_end = other.start + np.array(other.counts.shape) - 1
+            return np.minimum(self.start, other.start), np.maximum(self_end, other_end)
+
+        while True:
+            low, high = union_range()
+            too_wide = np.flatnonzero(high - low + 1 > self.max_bins)
+            if len(too_wide) == 0:
+                break
+            for axis in too_wide:
+                self._coarsen(axis)
+                other._coarsen(axis)
+        self._extend(low, high)
+        offset = other.start - self.start
+        target = tuple(slice(offset[a], offset[a] + other.counts.shape[a]) for a in range(self.ndim))
+        self.counts[target] += other.counts
+        self.total += other.total
+
+    def copy(self) -> "AdaptiveGrid":
+        grid = AdaptiveGrid(self.ndim, self.max_bins)
+        if not self.empty:
+            grid.width, grid.start, grid.counts = self.width.copy(), self.start.copy(), self.counts.copy()
+        grid.total = self.total
+        return grid
+
+    def edges(self, axis: int = 0) -> np.ndarray:
+        return (self.start[axis] + np.arange(self.counts.shape[axis] + 1)) * self.width[axis]
+
+    def fraction_outside(self, low: float, high: float) -> float:
+        """(1차원) 구간 중심이 [low, high] 밖에 있는 행의 비율."""
+        if self.empty or self.total == 0:
+            return 0.0
+        edges = self.edges(0)
+        centers = (edges[:-1] + edges[1:]) / 2
+        return float(self.counts[(centers < low) | (centers > high)].sum() / self.total)
+
+
+class QuantileSketch:
+    """
+    병합 가능한 분위수 스케치 (KLL 계열 compactor).
+    레벨 h의 항목은 가중치 2^h를 가지며, 레벨이 k개를 넘으면 정렬 후 한 칸씩 건너 뛰며 절반만 다음 레벨로 올립니다.
+    메모리는 대략 k * log2(N / k)개이고, 순위 오차는 k에 반비례합니다.
+    """
+
+    def __init__(self, k: int = DEFAULT_QUANTILE_K, seed=None):
+        self.k = k
+        self.levels: list[np.ndarray] = []
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self.k:
+                items = np.sort(items)
+                # 홀수 개이면 하나는 현재 레벨에 남겨야 총 가중치가 보존됩니다.
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(keep)]
+                promoted = paired[self.rng.integers(2)::2]
+                self.levels[h] = keep
+                if h + 1 == len(self.levels):
+                    self.levels.append(promoted)
+                else:
+                    self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        if not self.levels:
+            self.levels.append(values)
+        else:
+            self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        for h, items in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(items.copy())
+            else:
+                self.levels[h] = np.concatenate([self.levels[h], items])
+        self.count += other.count
+        self._compress()
+
+    def quantiles(self, qs) -> np.ndarray:
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items)
+        cdf = np.cumsum(weights[order])
+        positions = np.searchsorted(cdf, qs * cdf[-1], side='left')
+        return items[order][np.minimum(positions, len(items) - 1)]
+
+
+class BottomKSample:
+    """
+    균등 무작위 표본 (bottom-k). 행마다 난수 키를 붙이고 키가 가장 작은 k개만 남기므로,
+    청크별 표본을 병합해도 전체에서 뽑은 균등 표본과 같은 분포가 됩니다.
+    """
+
+    def __init__(self, n_cols: int, size: int = DEFAULT_SAMPLE_SIZE, seed=None):
+        self.size = size
+        self.keys = np.empty(0)
+        self.rows = np.empty((0, n_cols))
+        self.rng = np.random.default_rng(seed)
+
+    def _keep_smallest(self, keys: np.ndarray, rows: np.ndarray):
+        if len(keys) > self.size:
+            keep = np.argpartition(keys, self.size)[:self.size]
+            keys, rows = keys[keep], rows[keep]
+        self.keys, self.rows = keys, rows
+
+    def update(self, values: np.ndarray):
+        if self.size <= 0 or len(values) == 0:
+            return
+        keys = self.rng.random(len(values))
+        if len(values) > self.size:
+            keep = np.argpartition(keys, self.size)[:self.size]
+            keys, values = keys[keep], values[keep]
+        self._keep_smallest(np.concatenate([self.keys, keys]), np.concatenate([self.rows, values]))
+
+    def merge(self, other: "BottomKSample"):
+        self._keep_smallest(np.concatenate([self.keys, other.keys]), np.concatenate([self.rows, other.rows]))
+
+
+@dataclass
+class EDAOptions:
+    """한 번의 스캔에서 계산할 스케치 설정."""
+    pairs: list = field(default_factory=list)   # 2차원 밀도를 만들 (x, y) 컬럼 쌍
+    hist_bins: int = DEFAULT_HIST_BINS
+    density_bins: int = DEFAULT_DENSITY_BINS
+    quantile_k: int = DEFAULT_QUANTILE_K
+    sample_size: int = DEFAULT_SAMPLE_SIZE
+
+
+class EDASummary:
+    """컬럼 목록과 공분산/히스토그램/밀도/분위수/표본 스케치 묶음. 청크별 요약을 merge로 합칩니다."""
+
+    def __init__(self, columns: list, options: EDAOptions, seed=None):
+        self.columns = list(columns)
+        self.options = options
+        seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        seeds = seed.spawn(len(self.columns) + 1)
+        self.rows = 0
+        self.covariance = CovarianceSketch(len(self.columns))
+        self.histograms = {col: AdaptiveGrid(1, options.hist_bins) for col in self.columns}
+        self.densities = {tuple(pair): AdaptiveGrid(2, options.density_bins) for pair in options.pairs}
+        self.quantiles = {col: QuantileSketch(options.quantile_k, seed=s) for col, s in zip(self.columns, seeds)}
+        self.sample = BottomKSample(len(self.columns), options.sample_size, seed=seeds[-1])
+
+    def update(self, values: np.ndarray):
+        """columns 순서의 (N, C) 청크 하나를 반영합니다."""
+        self.rows += len(values)
+        self.covariance.update(values)
+        index = {col: i for i, col in enumerate(self.columns)}
+        for col, i in index.items():
+            self.histograms[col].update(values[:, i:i + 1])
+            self.quantiles[col].update(values[:, i])
+        for (x, y), grid in self.densities.items():
+            grid.update(values[:, [index[x], index[y]]])
+        self.sample.update(values)
+
+    def merge(self, other: "EDASummary"):
+        self.rows += other.rows
+        self.covariance.merge(other.covariance)
+        for col in self.columns:
+            self.histograms[col].merge(other.histograms[col])
+            self.quantiles[col].merge(other.quantiles[col])
+        for pair, grid in self.densities.items():
+            grid.merge(other.densities[pair])
+        self.sample.merge(other.sample)
+
+    def column_stats(self) -> dict:
+        cov = self.covariance
+        result = {}
+        for i, col in enumerate(self.columns):
+            qs = self.quantiles[col].quantiles(REPORT_QUANTILES)
+            result[col] = {
+                'count': int(cov.count[i]),
+                'missing': int(self.rows - cov.count[i]),
+                'mean': float(cov.mean[i]),
+                'std': float(cov.std[i]),
+                'min': float(cov.min[i]),
+                'max': float(cov.max[i]),
+                'quantiles': {f"p{q * 100:g}": float(v) for q, v in zip(REPORT_QUANTILES, qs)},
+            }
+        return result
+
+    def to_dict(self) -> dict:
+        corr = self.covariance.correlation()
+        return {
+            'rows': int(self.rows),
+            'columns': self.columns,
+            'stats': self.column_stats(),
+            'correlation': [[None if np.isnan(v) else float(v) for v in row] for row in corr],
+            'pair_counts': self.covariance.n.astype(np.int64).tolist(),
+        }
+
+
+# 청크 작업: ('hdf5', 경로, 시작 행, 끝 행) 또는 ('parquet', 경로, row group 인덱스 목록)
+def _is_hdf5(path: str) -> bool:
+    return path.endswith(('.h5', '.hdf5'))
+
+
+def _parquet_paths(source) -> list[str]:
+    if isinstance(source, (list, tuple)):
+        return sorted(source)
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, '**', '*.parquet'), recursive=True))
+    return [source]
+
+
+def _is_numeric(field_type: pa.DataType) -> bool:
+    return pa.types.is_integer(field_type) or pa.types.is_floating(field_type)
+
+
+def plan_chunks(source, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> tuple[list, list]:
+    """
+    익스포트한 HDF5 파일, Parquet 파일/디렉터리(하이브 파티션 포함) 또는 Parquet 경로 목록(로컬 캐시 파트)을
+    (수치형 컬럼 목록, 청크 작업 목록)으로 나눕니다. 데이터는 읽지 않고 메타데이터만 봅니다.
+    """
+    if isinstance(source, str) and _is_hdf5(source):
+        with h5py.File(source, 'r') as f:
+            columns = [str(c) for c in f.attrs['input_cols']] + [str(c) for c in f.attrs['output_cols']]
+            if 'inputs_raw' not in f or 'outputs_raw' not in f:
+                # 정규화된 inputs/outputs만 있고 min/max도 저장되지 않은 이전 형식은 원래 단위로 되돌릴 수 없습니다.
+                raise ValueError(f"'{source}'에 원본 데이터셋(inputs_raw/outputs_raw)이 없어 EDA를 할 수 없습니다. "
+                                 f"export_dataset.py로 다시 익스포트하세요.")
+            n_rows = f['inputs_raw'].shape[0]
+        tasks = [('hdf5', source, start, min(start + chunk_rows, n_rows)) for start in range(0, n_rows, chunk_rows)]
+        return columns, tasks
+
+    paths = _parquet_paths(source)
+    columns, tasks = [], []
+    for path in paths:
+        metadata = pq.ParquetFile(path).metadata
+        schema = metadata.schema.to_arrow_schema()
+        # 파트마다 파라미터 컬럼이 다를 수 있으므로 전체 파일의 수치형 컬럼 합집합을 씁니다.
+        for schema_field in schema:
+            name = schema_field.name
+            if _is_numeric(schema_field.type) and name not in EXCLUDED_COLUMNS and not name.startswith('__') and name not in columns:
+                columns.append(name)
+        # 작은 row group(캐시 파트)은 chunk_rows까지 묶어 한 작업으로 읽습니다.
+        group, group_rows = [], 0
+        for i in range(metadata.num_row_groups):
+            group.append(i)
+            group_rows += metadata.row_group(i).num_rows
+            if group_rows >= chunk_rows:
+                tasks.append(('parquet', path, tuple(group)))
+                group, group_rows = [], 0
+        if group:
+            tasks.append(('parquet', path, tuple(group)))
+    return columns, tasks
+
+
+def read_chunk(task: tuple, columns: list) -> np.ndarray:
+    """청크 작업 하나를 columns 순서의 (N, C) float64 배열로 읽습니다. 없는 컬럼은 NaN으로 채웁니다."""
+    kind, path = task[0], task[1]
+    if kind == 'hdf5':
+        start, stop = task[2], task[3]
+        with h5py.File(path, 'r') as f:
+            values = np.hstack([f['inputs_raw'][start:stop], f['outputs_raw'][start:stop]]).astype(np.float64)
+            file_columns = [str(c) for c in f.attrs['input_cols']] + [str(c) for c in f.attrs['output_cols']]
+        index = {col: i for i, col in enumerate(file_columns)}
+        out = np.full((len(values), len(columns)), np.nan)
+        for j, col in enumerate(columns):
+            if col in index:
+                out[:, j] = values[:, index[col]]
+        return out
+
+    parquet = pq.ParquetFile(path)
+    available = set(parquet.schema_arrow.names)
+    table = parquet.read_row_groups(list(task[2]), columns=[col for col in columns if col in available])
+    out = np.full((table.num_rows, len(columns)), np.nan)
+    for j, col in enumerate(columns):
+        if col in available:
+            out[:, j] = table.column(col).to_numpy(zero_copy_only=False).astype(np.float64)
+    return out
+
+
+def summarize_chunks(tasks: list, columns: list, options: EDAOptions, seed=None) -> EDASummary:
+    """청크 작업 묶음을 차례로 읽어 하나의 요약으로 누적합니다. (프로세스 풀에서 실행)"""
+    summary = EDASummary(columns, options, seed=seed)
+    for task in tasks:
+        summary.update(read_chunk(task, columns))
+    return summary
+
+
+def default_pairs(columns: list) -> list:
+    """파라미터(입력) 컬럼 × 출력 컬럼 쌍."""
+    outputs = [col for col in OUTPUT_COLUMNS if col in columns]
+    return [(x, y) for x in columns if x not in OUTPUT_COLUMNS for y in outputs]
+
+
+def run_streaming_eda(source, workers: int | None = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                      options: EDAOptions | None = None, seed: int = 42) -> EDASummary:
+    """
+    source를 청크 단위로 한 번만 읽어 EDA 요약을 만듭니다.
+    청크 작업을 workers개 프로세스에 나눠 각자 부분 요약을 만든 뒤 병합하므로, 메모리는 행 수가 아니라
+    (청크 크기 × 컬럼 수 + 스케치 크기) × workers에 비례합니다.
+    """
+    columns, tasks = plan_chunks(source, chunk_rows)
+    options = options or EDAOptions()
+    if not options.pairs:
+        options.pairs = default_pairs(columns)
+    options.pairs = [tuple(pair) for pair in options.pairs if pair[0] in columns and pair[1] in columns]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks) or 1))
+    logging.info(f"EDA: {len(columns)}개 컬럼, {len(tasks)}개 청크, {workers}개 프로세스")
+
+    # 작업마다 결과를 돌려보내면 스케치 직렬화 비용이 커지므로, 프로세스당 몇 개의 큰 묶음으로 나눕니다.
+    n_groups = min(len(tasks), workers * 4) or 1
+    groups = [tasks[i::n_groups] for i in range(n_groups)]
+    seeds = np.random.SeedSequence(seed).spawn(n_groups)
+
+    summary = EDASummary(columns, options, seed=seed)
+    if workers == 1:
+        for group, group_seed in zip(groups, seeds):
+            summary.merge(summarize_chunks(group, columns, options, group_seed))
+        return summary
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(summarize_chunks, group, columns, options, group_seed) for group, group_seed in zip(groups, seeds)]
+        for future in futures:
+            summary.merge(future.result())
+    return summary
+
+
+def parse_pairs(values: list | None) -> list:
+    """'x:y' 형식의 문자열 목록을 (x, y) 튜플 목록으로 바꿉니다."""
+    pairs = []
+    for value in values or []:
+        x, sep, y = value.partition(':')
+        if not sep or not x or not y:
+            raise ValueError(f"밀도 쌍은 'x:y' 형식이어야 합니다: {value}")
+        pairs.append((x, y))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="익스포트한 데이터셋(HDF5/Parquet)을 청크 단위로 한 번만 읽어 EDA 요약을 JSON으로 출력합니다.")
+    parser.add_argument('source', help="HDF5 파일, Parquet 파일 또는 디렉터리")
+    parser.add_argument('--workers', type=int, default=None, help="병렬 프로세스 수 (기본값: CPU 코어 수)")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--pair', action='append', help="2차원 밀도를 계산할 컬럼 쌍 (예: r1:phase, 여러 번 지정 가능)")
+    parser.add_argument('--output', default=None, help="요약 JSON 경로 (기본값: 표준 출력)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    summary = run_streaming_eda(args.source, workers=args.workers, chunk_rows=args.chunk_rows,
+                                options=EDAOptions(pairs=parse_pairs(args.pair), sample_size=0))
+    if summary.rows == 0:
+        raise SystemExit(f"'{args.source}'에서 읽은 행이 없습니다.")
+    report = json.dumps(summary.to_dict(), ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
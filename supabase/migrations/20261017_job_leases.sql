@@ -0,0 +1,78 @@
+-- simulation_jobs 테이블에 리스(lease) 기반 작업 점유 컬럼 추가
+ALTER TABLE simulation_jobs
+ADD COLUMN IF NOT EXISTS worker_id TEXT,
+ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE,
+ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP WITH TIME ZONE;
+
+COMMENT ON COLUMN simulation_jobs.worker_id IS '작업을 점유한 워커 식별자 (host-pid)';
+COMMENT ON COLUMN simulation_jobs.lease_expires_at IS '리스 만료 시각. 만료된 running 작업은 reaper가 pending으로 되돌림';
+COMMENT ON COLUMN simulation_jobs.heartbeat_at IS '워커가 마지막으로 하트비트를 보낸 시각';
+
+-- 대기 작업 조회 및 만료 리스 탐색 최적화 (부분 인덱스)
+CREATE INDEX IF NOT EXISTS idx_simulation_jobs_pending_created_at
+    ON simulation_jobs (created_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_simulation_jobs_running_lease
+    ON simulation_jobs (lease_expires_at) WHERE status = 'running';
+
+-- 1. 원자적 작업 점유: 'pending' 작업을 최대 p_batch_size개까지 잠그고 'running'으로 전환
+--    FOR UPDATE SKIP LOCKED 로 다른 워커가 점유 중인 행은 건너뛰므로 중복 점유가 발생하지 않음
+CREATE OR REPLACE FUNCTION claim_simulation_jobs(
+    p_worker_id TEXT,
+    p_batch_size INT,
+    p_lease_seconds INT DEFAULT 300
+)
+RETURNS SETOF simulation_jobs AS $$
+    UPDATE simulation_jobs AS j
+    SET status = 'running',
+        worker_id = p_worker_id,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        heartbeat_at = NOW()
+    WHERE j.id IN (
+        SELECT id
+        FROM simulation_jobs
+        WHERE status = 'pending'
+        ORDER BY created_at
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING j.*;
+$$ LANGUAGE sql VOLATILE;
+
+-- 2. 하트비트: 워커가 여전히 점유 중인 작업의 리스를 연장
+CREATE OR REPLACE FUNCTION heartbeat_simulation_jobs(
+    p_worker_id TEXT,
+    p_job_ids UUID[],
+    p_lease_seconds INT DEFAULT 300
+)
+RETURNS INT AS $$
+    WITH extended AS (
+        UPDATE simulation_jobs
+        SET lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+            heartbeat_at = NOW()
+        WHERE id = ANY(p_job_ids)
+          AND worker_id = p_worker_id
+          AND status = 'running'
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INT FROM extended;
+$$ LANGUAGE sql VOLATILE;
+
+-- 3. Reaper: 리스가 만료된 'running' 작업을 다시 'pending' 큐로 반환
+CREATE OR REPLACE FUNCTION reap_expired_simulation_jobs()
+RETURNS INT AS $$
+    WITH reaped AS (
+        UPDATE simulation_jobs
+        SET status = 'pending',
+            worker_id = NULL,
+            lease_expires_at = NULL
+        WHERE id IN (
+            SELECT id
+            FROM simulation_jobs
+            WHERE status = 'running'
+              AND lease_expires_at < NOW()
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INT FROM reaped;
+$$ LANGUAGE sql VOLATILE;
@@ -0,0 +1,27 @@
+-- 새 'pending' 작업이 생기면 LISTEN 중인 워커를 깨우는 알림 (job_events.JobNotificationListener)
+-- 행 단위가 아니라 문장(statement) 단위 트리거이므로 대량 삽입에도 알림은 한 번만 발생합니다.
+CREATE OR REPLACE FUNCTION notify_simulation_jobs_pending()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM new_rows WHERE status = 'pending') THEN
+        PERFORM pg_notify('simulation_jobs_pending', TG_OP);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 1. 신규 작업 삽입
+DROP TRIGGER IF EXISTS trg_simulation_jobs_notify_insert ON simulation_jobs;
+CREATE TRIGGER trg_simulation_jobs_notify_insert
+    AFTER INSERT ON simulation_jobs
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_simulation_jobs_pending();
+
+-- 2. 리스 회수 등으로 작업이 다시 'pending'이 된 경우
+DROP TRIGGER IF EXISTS trg_simulation_jobs_notify_update ON simulation_jobs;
+CREATE TRIGGER trg_simulation_jobs_notify_update
+    AFTER UPDATE ON simulation_jobs
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_simulation_jobs_pending();
@@ -0,0 +1,123 @@
+-- 재시도 정책과 진행 체크포인트 (20261017_job_leases.sql 이후 적용)
+ALTER TABLE simulation_jobs
+ADD COLUMN IF NOT EXISTS attempts INT NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS max_attempts INT NOT NULL DEFAULT 3,
+ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP WITH TIME ZONE,
+ADD COLUMN IF NOT EXISTS checkpoint JSONB,
+ADD COLUMN IF NOT EXISTS checkpoint_at TIMESTAMP WITH TIME ZONE;
+
+COMMENT ON COLUMN simulation_jobs.attempts IS '점유(실행 시도) 횟수';
+COMMENT ON COLUMN simulation_jobs.max_attempts IS '이 횟수를 모두 실패하면 dead_letter 상태로 전환';
+COMMENT ON COLUMN simulation_jobs.next_attempt_at IS '재시도 가능 시각 (지수 백오프). 이전에는 점유되지 않음';
+COMMENT ON COLUMN simulation_jobs.checkpoint IS '솔버 중간 상태. 다른 워커가 이어서 계산할 때 사용';
+COMMENT ON COLUMN simulation_jobs.checkpoint_at IS '마지막 체크포인트 저장 시각';
+
+CREATE INDEX IF NOT EXISTS idx_simulation_jobs_pending_next_attempt
+    ON simulation_jobs (next_attempt_at) WHERE status = 'pending';
+
+-- 1. 점유: 재시도 대기 시각이 지난 작업만 점유하고 시도 횟수를 올림 (checkpoint는 RETURNING으로 함께 전달)
+CREATE OR REPLACE FUNCTION claim_simulation_jobs(
+    p_worker_id TEXT,
+    p_batch_size INT,
+    p_lease_seconds INT DEFAULT 300
+)
+RETURNS SETOF simulation_jobs AS $$
+    UPDATE simulation_jobs AS j
+    SET status = 'running',
+        worker_id = p_worker_id,
+        attempts = j.attempts + 1,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        heartbeat_at = NOW()
+    WHERE j.id IN (
+        SELECT id
+        FROM simulation_jobs
+        WHERE status = 'pending'
+          AND (next_attempt_at IS NULL OR next_attempt_at <= NOW())
+        ORDER BY created_at
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING j.*;
+$$ LANGUAGE sql VOLATILE;
+
+-- 2. Reaper: 리스가 만료된 작업은 백오프 후 재시도, 시도 횟수를 다 쓴 작업은 dead_letter
+--    checkpoint는 지우지 않으므로 다음 워커가 이어서 계산합니다.
+--    (인자 없는 이전 버전과 오버로드가 겹치지 않도록 먼저 삭제)
+DROP FUNCTION IF EXISTS reap_expired_simulation_jobs();
+CREATE OR REPLACE FUNCTION reap_expired_simulation_jobs(p_base_delay_seconds INT DEFAULT 30)
+RETURNS INT AS $$
+    WITH reaped AS (
+        UPDATE simulation_jobs AS j
+        SET status = CASE WHEN j.attempts >= j.max_attempts THEN 'dead_letter' ELSE 'pending' END,
+            error_message = CASE WHEN j.attempts >= j.max_attempts
+                                 THEN 'lease expired after ' || j.attempts || ' attempts'
+                                 ELSE j.error_message END,
+            next_attempt_at = NOW() + make_interval(secs => p_base_delay_seconds * power(2, GREATEST(j.attempts - 1, 0))),
+            worker_id = NULL,
+            lease_expires_at = NULL
+        WHERE j.id IN (
+            SELECT id
+            FROM simulation_jobs
+            WHERE status = 'running'
+              AND lease_expires_at < NOW()
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INT FROM reaped;
+$$ LANGUAGE sql VOLATILE;
+
+-- 3. 실패 보고: 재시도 가능한 오류는 지수 백오프 후 다시 'pending', 횟수 초과 시 'dead_letter',
+--    재시도해도 소용없는 오류(p_retryable = FALSE, 예: 잘못된 파라미터)는 바로 'failed'
+--    리스가 만료되어 다른 워커가 다시 점유한 작업은 바꾸지 않도록, 점유 중인 워커(p_worker_id)의 'running' 작업만 갱신합니다.
+--    (worker_id 없는 이전 버전과 오버로드가 겹치지 않도록 먼저 삭제)
+DROP FUNCTION IF EXISTS fail_simulation_jobs(UUID[], TEXT, BOOLEAN, INT);
+CREATE OR REPLACE FUNCTION fail_simulation_jobs(
+    p_job_ids UUID[],
+    p_worker_id TEXT,
+    p_error_message TEXT,
+    p_retryable BOOLEAN DEFAULT TRUE,
+    p_base_delay_seconds INT DEFAULT 30
+)
+RETURNS INT AS $$
+    WITH failed AS (
+        UPDATE simulation_jobs AS j
+        SET status = CASE WHEN NOT p_retryable THEN 'failed'
+                          WHEN j.attempts >= j.max_attempts THEN 'dead_letter'
+                          ELSE 'pending' END,
+            error_message = p_error_message,
+            next_attempt_at = NOW() + make_interval(secs => p_base_delay_seconds * power(2, GREATEST(j.attempts - 1, 0))),
+            worker_id = NULL,
+            lease_expires_at = NULL
+        WHERE j.id = ANY(p_job_ids)
+          AND j.worker_id = p_worker_id
+          AND j.status = 'running'
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INT FROM failed;
+$$ LANGUAGE sql VOLATILE;
+
+-- 4. 체크포인트: 점유 중인 워커만 진행률/중간 상태를 기록하며 리스도 함께 연장
+--    FALSE를 반환하면 리스를 잃은 것이므로 워커는 계산을 중단해야 합니다.
+CREATE OR REPLACE FUNCTION checkpoint_simulation_job(
+    p_job_id UUID,
+    p_worker_id TEXT,
+    p_progress FLOAT,
+    p_checkpoint JSONB,
+    p_lease_seconds INT DEFAULT 300
+)
+RETURNS BOOLEAN AS $$
+    WITH saved AS (
+        UPDATE simulation_jobs
+        SET progress = p_progress,
+            checkpoint = p_checkpoint,
+            checkpoint_at = NOW(),
+            lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+            heartbeat_at = NOW()
+        WHERE id = p_job_id
+          AND worker_id = p_worker_id
+          AND status = 'running'
+        RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM saved);
+$$ LANGUAGE sql VOLATILE;
@@ -0,0 +1,15 @@
+-- 파라미터 정규화 해시 (result_cache.parameter_hash) 컬럼 추가
+ALTER TABLE meta_atom_dataset
+ADD COLUMN IF NOT EXISTS param_hash TEXT;
+
+ALTER TABLE simulation_jobs
+ADD COLUMN IF NOT EXISTS param_hash TEXT;
+
+-- 같은 파라미터의 결과는 한 번만 저장 (NULL은 서로 다른 값으로 취급되므로 기존 행에는 영향 없음)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_meta_atom_dataset_param_hash ON meta_atom_dataset (param_hash);
+
+-- 작업 생성 시 중복 검사용 (재시도 등으로 같은 파라미터의 작업이 여러 개일 수 있으므로 UNIQUE 아님)
+CREATE INDEX IF NOT EXISTS idx_simulation_jobs_param_hash ON simulation_jobs (param_hash);
+
+COMMENT ON COLUMN meta_atom_dataset.param_hash IS '정규화/양자화한 parameters의 SHA-256 해시 (결과 메모이제이션 키)';
+COMMENT ON COLUMN simulation_jobs.param_hash IS '정규화/양자화한 parameters의 SHA-256 해시';
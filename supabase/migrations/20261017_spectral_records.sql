@@ -0,0 +1,43 @@
+-- 형상 하나의 주파수 스펙트럼을 한 행으로 저장하는 테이블 (spectral_records.py)
+-- 주파수 점마다 parameters JSONB를 반복하는 meta_atom_dataset과 달리, 모든 값을 REAL(float32) 배열로 저장합니다.
+CREATE TABLE IF NOT EXISTS meta_atom_spectra (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    job_id UUID REFERENCES simulation_jobs(id),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    parameters JSONB NOT NULL,
+    param_hash TEXT,
+    n_points INT NOT NULL,
+    frequency REAL[] NOT NULL,
+    transmission REAL[] NOT NULL,
+    phase REAL[] NOT NULL,
+    s11_re REAL[],
+    s11_im REAL[],
+    s21_re REAL[],
+    s21_im REAL[],
+    is_valid BOOLEAN DEFAULT TRUE,
+    -- 모든 배열의 길이는 n_points와 같아야 (N, F) 배열로 바로 합칠 수 있습니다.
+    CONSTRAINT meta_atom_spectra_lengths CHECK (
+        cardinality(frequency) = n_points
+        AND cardinality(transmission) = n_points
+        AND cardinality(phase) = n_points
+        AND (s11_re IS NULL OR cardinality(s11_re) = n_points)
+        AND (s11_im IS NULL OR cardinality(s11_im) = n_points)
+        AND (s21_re IS NULL OR cardinality(s21_re) = n_points)
+        AND (s21_im IS NULL OR cardinality(s21_im) = n_points)
+    )
+);
+
+-- 1. 같은 파라미터(주파수 스윕 포함)의 결과는 한 번만 저장 (워커는 ignore_duplicates upsert)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_meta_atom_spectra_param_hash ON meta_atom_spectra (param_hash);
+
+-- 2. 익스포트의 (created_at, id) 키셋 페이지네이션
+CREATE INDEX IF NOT EXISTS idx_meta_atom_spectra_created_at_id ON meta_atom_spectra (created_at, id);
+
+-- 3. 유효 데이터 필터와 job_id 조회
+CREATE INDEX IF NOT EXISTS idx_meta_atom_spectra_is_valid ON meta_atom_spectra (is_valid);
+CREATE INDEX IF NOT EXISTS idx_meta_atom_spectra_job_id ON meta_atom_spectra (job_id);
+
+COMMENT ON TABLE meta_atom_spectra IS '형상별 주파수 스펙트럼 (행 하나 = 형상 하나, 배열 길이 = n_points)';
+COMMENT ON COLUMN meta_atom_spectra.frequency IS '주파수 격자';
+COMMENT ON COLUMN meta_atom_spectra.s21_re IS 'S21 실수부 (s21_im: 허수부, s11_*: 반사 계수)';
+COMMENT ON COLUMN meta_atom_spectra.is_valid IS '물리적 정합성 검증 통과 여부';
@@ -0,0 +1,11 @@
+-- 물리적 정합성 검증 결과 (validity.py)
+-- 워커는 결과를 기록할 때, 백필(python validity.py)은 기존 행을 다시 검사할 때 is_valid와 함께 실패 사유 비트를 기록합니다.
+ALTER TABLE meta_atom_dataset ADD COLUMN IF NOT EXISTS validity_flags SMALLINT NOT NULL DEFAULT 0;
+ALTER TABLE meta_atom_spectra ADD COLUMN IF NOT EXISTS validity_flags SMALLINT NOT NULL DEFAULT 0;
+
+-- 유효 데이터만 (created_at, id) 키셋 페이지네이션으로 읽는 익스포트/학습 조회용 부분 인덱스
+CREATE INDEX IF NOT EXISTS idx_meta_atom_dataset_valid_created_at_id ON meta_atom_dataset (created_at, id) WHERE is_valid;
+CREATE INDEX IF NOT EXISTS idx_meta_atom_spectra_valid_created_at_id ON meta_atom_spectra (created_at, id) WHERE is_valid;
+
+COMMENT ON COLUMN meta_atom_dataset.validity_flags IS '검증 실패 사유 비트 (1: NaN/inf, 2: transmission 범위, 4: 에너지 보존, 8: 위상 불연속, 16: 형상 제약, 32: 대리 모델 잔차 이상치)';
+COMMENT ON COLUMN meta_atom_spectra.validity_flags IS '검증 실패 사유 비트 (meta_atom_dataset.validity_flags와 같음)';
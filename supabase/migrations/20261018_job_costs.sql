@@ -0,0 +1,61 @@
+-- 예상 실행 시간 기반 작업 스케줄링 (job_scheduling.py)
+-- claim_simulation_jobs를 다시 정의하므로 20261017_* 마이그레이션(job_leases, job_retries, spectral_records)보다 뒤에 정렬되는 파일명을 씁니다.
+ALTER TABLE simulation_jobs
+ADD COLUMN IF NOT EXISTS priority INT NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS estimated_cost REAL;
+
+-- 실제 계산 시간 (배치 계산은 예상 비용 비율로 나눈 값). 런타임 예측 모델의 학습 데이터
+ALTER TABLE meta_atom_dataset ADD COLUMN IF NOT EXISTS runtime_seconds REAL;
+ALTER TABLE meta_atom_spectra ADD COLUMN IF NOT EXISTS runtime_seconds REAL;
+
+COMMENT ON COLUMN simulation_jobs.priority IS '우선순위 등급 (큰 값부터 점유, 예: 능동 학습 작업)';
+COMMENT ON COLUMN simulation_jobs.estimated_cost IS '런타임 예측 모델이 추정한 계산 시간(초). 같은 우선순위에서는 긴 작업부터 점유 (LPT)';
+COMMENT ON COLUMN meta_atom_dataset.runtime_seconds IS '작업 하나의 계산 시간(초)';
+COMMENT ON COLUMN meta_atom_spectra.runtime_seconds IS '작업 하나의 계산 시간(초)';
+
+-- 점유 순서(우선순위 → 예상 비용 → 생성 시각)와 같은 부분 인덱스
+CREATE INDEX IF NOT EXISTS idx_simulation_jobs_pending_schedule
+    ON simulation_jobs (priority DESC, estimated_cost DESC NULLS LAST, created_at) WHERE status = 'pending';
+
+-- 1. 점유: 높은 우선순위, 같은 우선순위에서는 예상 비용이 큰 작업부터 점유합니다.
+--    빈 슬롯이 생긴 워커가 남은 작업 중 가장 긴 것을 가져가므로 호스트 전체에서 LPT 순서의 리스트 스케줄링이 됩니다.
+CREATE OR REPLACE FUNCTION claim_simulation_jobs(
+    p_worker_id TEXT,
+    p_batch_size INT,
+    p_lease_seconds INT DEFAULT 300
+)
+RETURNS SETOF simulation_jobs AS $$
+    UPDATE simulation_jobs AS j
+    SET status = 'running',
+        worker_id = p_worker_id,
+        attempts = j.attempts + 1,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        heartbeat_at = NOW()
+    WHERE j.id IN (
+        SELECT id
+        FROM simulation_jobs
+        WHERE status = 'pending'
+          AND (next_attempt_at IS NULL OR next_attempt_at <= NOW())
+        ORDER BY priority DESC, estimated_cost DESC NULLS LAST, created_at
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING j.*;
+$$ LANGUAGE sql VOLATILE;
+
+-- 2. 예상 비용 일괄 갱신: 런타임 모델을 다시 학습한 뒤 대기 중인 작업의 estimated_cost를 한 번에 바꿉니다.
+CREATE OR REPLACE FUNCTION set_simulation_job_costs(
+    p_job_ids UUID[],
+    p_costs REAL[]
+)
+RETURNS INT AS $$
+    WITH updated AS (
+        UPDATE simulation_jobs AS j
+        SET estimated_cost = c.cost
+        FROM unnest(p_job_ids, p_costs) AS c(id, cost)
+        WHERE j.id = c.id
+          AND j.status = 'pending'
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INT FROM updated;
+$$ LANGUAGE sql VOLATILE;
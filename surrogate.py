@@ -0,0 +1,260 @@
+import os
+import time
+import logging
+import numpy as np
+import torch
+from torch import nn
+from sklearn.base import BaseEstimator, RegressorMixin
+from training_bridge import make_dataloader
+
+
+class SurrogateNet(nn.Module):
+    """공유 MLP 몸통(trunk) + 출력별 헤드. 각도 출력은 (sin, cos) 두 값을 예측합니다."""
+
+    def __init__(self, n_inputs: int, head_dims: list[int], hidden_layer_sizes: tuple[int, ...] = (128, 64)):
+        super().__init__()
+        layers, width = [], n_inputs
+        for size in hidden_layer_sizes:
+            layers += [nn.Linear(width, size), nn.SiLU()]
+            width = size
+        self.trunk = nn.Sequential(*layers)
+        self.heads = nn.ModuleList(nn.Linear(width, dim) for dim in head_dims)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        features = self.trunk(x)
+        return torch.cat([head(features) for head in self.heads], dim=1)
+
+
+class SurrogateRegressor(BaseEstimator, RegressorMixin):
+    """
+    MLPRegressor를 대체하는 PyTorch 대리 모델(surrogate).
+
+    - 미니배치 학습 + 다중 스레드 CPU 연산 (n_threads, 기본값: CPU 코어 수)
+    - 여러 출력(예: transmission, phase)을 한 모델로 동시에 예측하며,
+      angle_outputs에 지정한 출력(도 단위)은 랩어라운드가 없도록 (sin, cos)으로 학습합니다.
+    - checkpoint가 있으면 이전 주기의 가중치와 정규화 통계에서 이어서 학습합니다. (warm start)
+      조기 종료(patience)와 함께 쓰면 새 배치가 추가될 때마다 몇 초 안에 재학습됩니다.
+    - sklearn 추정기 인터페이스(fit/predict/clone)를 따르므로 acquisition의 부트스트랩 앙상블에도 쓸 수 있습니다.
+    """
+
+    def __init__(self, hidden_layer_sizes: tuple[int, ...] = (128, 64), angle_outputs: tuple[int, ...] = (), epochs: int = 200,
+                 batch_size: int = 256, learning_rate: float = 1e-3, weight_decay: float = 0.0, validation_fraction: float = 0.1,
+                 patience: int = 10, n_threads: int | None = None, checkpoint: str | None = None, random_state: int | None = None):
+        self.hidden_layer_sizes = hidden_layer_sizes
+        self.angle_outputs = angle_outputs
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.weight_decay = weight_decay
+        self.validation_fraction = validation_fraction
+        self.patience = patience
+        self.n_threads = n_threads
+        self.checkpoint = checkpoint
+        self.random_state = random_state
+
+    # --- 입출력 인코딩 ---
+
+    def _set_stats(self, x_mean, x_std, y_mean, y_std):
+        self.x_mean_ = np.asarray(x_mean, dtype=np.float32)
+        self.x_std_ = np.where(np.asarray(x_std) == 0, 1, x_std).astype(np.float32)
+        self.y_mean_ = np.asarray(y_mean, dtype=np.float32)
+        self.y_std_ = np.where(np.asarray(y_std) == 0, 1, y_std).astype(np.float32)
+
+    def _encode_inputs(self, X) -> torch.Tensor:
+        X = np.asarray(X, dtype=np.float32)
+        return torch.from_numpy((X - self.x_mean_) / self.x_std_)
+
+    def _encode_outputs(self, Y: np.ndarray) -> torch.Tensor:
+        """스칼라 출력은 표준화, 각도 출력은 (sin, cos)로 변환합니다."""
+        columns = []
+        for j in range(self.n_outputs_):
+            if j in self.angle_outputs:
+                radians = np.deg2rad(Y[:, j])
+                columns += [np.sin(radians), np.cos(radians)]
+            else:
+                columns.append((Y[:, j] - self.y_mean_[j]) / self.y_std_[j])
+        return torch.from_numpy(np.stack(columns, axis=1).astype(np.float32))
+
+    def _decode_outputs(self, encoded: np.ndarray) -> np.ndarray:
+        Y = np.empty((len(encoded), self.n_outputs_), dtype=np.float64)
+        k = 0
+        for j in range(self.n_outputs_):
+            if j in self.angle_outputs:
+                Y[:, j] = np.rad2deg(np.arctan2(encoded[:, k], encoded[:, k + 1]))
+                k += 2
+            else:
+                Y[:, j] = encoded[:, k] * self.y_std_[j] + self.y_mean_[j]
+                k += 1
+        return Y
+
+    # --- 모델 생성 / 체크포인트 ---
+
+    def _build(self, n_inputs: int, n_outputs: int):
+        self.n_features_in_ = n_inputs
+        self.n_outputs_ = n_outputs
+        head_dims = [2 if j in self.angle_outputs else 1 for j in range(n_outputs)]
+        self.net_ = SurrogateNet(n_inputs, head_dims, tuple(self.hidden_layer_sizes))
+
+    def _warm_start(self, n_inputs: int, n_outputs: int) -> bool:
+        """체크포인트의 구조가 같으면 가중치와 정규화 통계를 불러옵니다."""
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return False
+        state = torch.load(self.checkpoint, map_location='cpu', weights_only=False)
+        compatible = (
+            state['n_inputs'] == n_inputs and state['n_outputs'] == n_outputs
+            and tuple(state['hidden_layer_sizes']) == tuple(self.hidden_layer_sizes)
+            and tuple(state['angle_outputs']) == tuple(self.angle_outputs)
+        )
+        if not compatible:
+            logging.warning(f"체크포인트 '{self.checkpoint}'의 모델 구조가 달라 처음부터 학습합니다.")
+            return False
+        self.net_.load_state_dict(state['state_dict'])
+        self._set_stats(state['x_mean'], state['x_std'], state['y_mean'], state['y_std'])
+        logging.info(f"체크포인트 '{self.checkpoint}'에서 이어서 학습합니다.")
+        return True
+
+    def save(self, path: str | None = None, metadata: dict | None = None):
+        """
+        학습된 가중치와 정규화 통계를 저장합니다. (다음 주기의 warm start용)
+        metadata에는 예측 서비스가 함께 불러올 정보(입력 컬럼 이름, 입력 scaler 등)를 넣습니다.
+        """
+        path = path or self.checkpoint
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        torch.save({
+            'state_dict': self.net_.state_dict(),
+            'n_inputs': self.n_features_in_,
+            'n_outputs': self.n_outputs_,
+            'hidden_layer_sizes': tuple(self.hidden_layer_sizes),
+            'angle_outputs': tuple(self.angle_outputs),
+            'x_mean': self.x_mean_, 'x_std': self.x_std_,
+            'y_mean': self.y_mean_, 'y_std': self.y_std_,
+            'metadata': metadata or {},
+        }, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'SurrogateRegressor':
+        """저장된 체크포인트로 예측 가능한 모델을 만듭니다."""
+        state = torch.load(path, map_location='cpu', weights_only=False)
+        model = cls(hidden_layer_sizes=tuple(state['hidden_layer_sizes']), angle_outputs=tuple(state['angle_outputs']), checkpoint=path, **kwargs)
+        model._build(state['n_inputs'], state['n_outputs'])
+        model.net_.load_state_dict(state['state_dict'])
+        model._set_stats(state['x_mean'], state['x_std'], state['y_mean'], state['y_std'])
+        model._single_output = state['n_outputs'] == 1
+        model.metadata_ = state.get('metadata', {})
+        return model
+
+    # --- 학습 ---
+
+    def _prepare(self, n_inputs: int, n_outputs: int) -> torch.optim.Optimizer:
+        torch.set_num_threads(self.n_threads or os.cpu_count() or 1)
+        if self.random_state is not None:
+            torch.manual_seed(self.random_state)
+        self._build(n_inputs, n_outputs)
+        self.warm_started_ = self._warm_start(n_inputs, n_outputs)
+        self.loss_curve_ = []
+        return torch.optim.AdamW(self.net_.parameters(), lr=self.learning_rate, weight_decay=self.weight_decay)
+
+    def _train_step(self, optimizer: torch.optim.Optimizer, x: torch.Tensor, y: torch.Tensor) -> float:
+        optimizer.zero_grad(set_to_none=True)
+        loss = nn.functional.mse_loss(self.net_(x), y)
+        loss.backward()
+        optimizer.step()
+        return loss.item()
+
+    def fit(self, X, y) -> 'SurrogateRegressor':
+        """메모리 위의 (X, y)로 미니배치 학습합니다. y가 1차원이면 predict도 1차원으로 반환합니다."""
+        X = np.asarray(X, dtype=np.float32)
+        Y = np.asarray(y, dtype=np.float64)
+        self._single_output = Y.ndim == 1
+        Y = Y.reshape(len(Y), -1)
+        optimizer = self._prepare(X.shape[1], Y.shape[1])
+        if not self.warm_started_:
+            self._set_stats(X.mean(axis=0), X.std(axis=0), Y.mean(axis=0), Y.std(axis=0))
+
+        inputs, targets = self._encode_inputs(X), self._encode_outputs(Y)
+        rng = np.random.default_rng(self.random_state)
+        order = rng.permutation(len(X))
+        n_val = int(len(X) * self.validation_fraction) if len(X) >= 20 else 0
+        val_idx, train_idx = order[:n_val], order[n_val:]
+        x_val, y_val = inputs[val_idx], targets[val_idx]
+
+        best_loss, best_state, stale = np.inf, None, 0
+        started = time.monotonic()
+        self.net_.train()
+        for epoch in range(self.epochs):
+            batch_order = torch.from_numpy(rng.permutation(train_idx))
+            epoch_loss = 0.0
+            for start in range(0, len(batch_order), self.batch_size):
+                index = batch_order[start:start + self.batch_size]
+                epoch_loss += self._train_step(optimizer, inputs[index], targets[index]) * len(index)
+            self.loss_curve_.append(epoch_loss / max(len(batch_order), 1))
+
+            # 검증 손실이 patience 에폭 동안 개선되지 않으면 조기 종료하고 가장 좋은 가중치로 되돌립니다.
+            if n_val:
+                with torch.no_grad():
+                    val_loss = nn.functional.mse_loss(self.net_(x_val), y_val).item()
+                if val_loss < best_loss:
+                    best_loss, stale = val_loss, 0
+                    best_state = {k: v.clone() for k, v in self.net_.state_dict().items()}
+                else:
+                    stale += 1
+                    if stale >= self.patience:
+                        break
+        if best_state is not None:
+            self.net_.load_state_dict(best_state)
+        self.net_.eval()
+        self.n_iter_ = len(self.loss_curve_)
+        logging.info(f"대리 모델 학습 완료: {len(X)}개 샘플, {self.n_iter_} 에폭, {time.monotonic() - started:.1f}초 (warm start: {self.warm_started_})")
+        return self
+
+    def fit_hdf5(self, path: str = "meta_atom_dataset.h5", block_size: int | None = None, num_workers: int = 2, seed: int = 0) -> 'SurrogateRegressor':
+        """
+        export_dataset.py가 만든 HDF5 파일에서 블록 단위로 스트리밍하며 학습합니다. (메모리에 전체를 올리지 않음)
+        정규화 통계는 파일에 저장된 stats를 사용하고, 출력 컬럼 'phase'는 각도 출력으로 학습합니다.
+        """
+        loader = make_dataloader(path, block_size=block_size, num_workers=num_workers, seed=seed, normalization=None)
+        dataset = loader.dataset
+        if not dataset.stats:
+            raise ValueError(f"'{path}'에 원본 데이터(inputs_raw/outputs_raw)와 통계가 없어 스트리밍 학습을 할 수 없습니다.")
+        if not self.angle_outputs and 'phase' in dataset.output_cols:
+            self.angle_outputs = (dataset.output_cols.index('phase'),)
+        self._single_output = False
+        optimizer = self._prepare(dataset.input_dim, dataset.output_dim)
+        if not self.warm_started_:
+            stats = dataset.stats
+            self._set_stats(stats['inputs']['mean'], stats['inputs']['std'], stats['outputs']['mean'], stats['outputs']['std'])
+
+        started = time.monotonic()
+        self.net_.train()
+        for epoch in range(self.epochs):
+            loader.sampler.set_epoch(epoch)
+            epoch_loss, seen = 0.0, 0
+            for inputs, outputs in loader:
+                x = self._encode_inputs(inputs.numpy())
+                y = self._encode_outputs(outputs.numpy().astype(np.float64))
+                for start in range(0, len(x), self.batch_size):
+                    batch = slice(start, start + self.batch_size)
+                    epoch_loss += self._train_step(optimizer, x[batch], y[batch]) * len(x[batch])
+                seen += len(x)
+            self.loss_curve_.append(epoch_loss / max(seen, 1))
+        self.net_.eval()
+        self.n_iter_ = len(self.loss_curve_)
+        logging.info(f"대리 모델 스트리밍 학습 완료: {dataset.num_rows}행, {self.n_iter_} 에폭, {time.monotonic() - started:.1f}초")
+        return self
+
+    # --- 예측 ---
+
+    def predict(self, X) -> np.ndarray:
+        with torch.no_grad():
+            encoded = self.net_(self._encode_inputs(X)).numpy()
+        Y = self._decode_outputs(encoded)
+        return Y[:, 0] if self._single_output else Y
+
+
+def angular_error(y_true, y_pred) -> np.ndarray:
+    """도 단위 각도의 절대 오차 (랩어라운드 고려, 0~180)."""
+    return np.abs((np.asarray(y_true) - np.asarray(y_pred) + 180) % 360 - 180)
@@ -0,0 +1,204 @@
+import os
+import math
+import h5py
+import numpy as np
+import torch
+import torch.distributed as dist
+from torch.utils.data import DataLoader, Dataset, Sampler
+
+
+class MetaAtomH5Dataset(Dataset):
+    """
+    export_dataset.py가 만든 HDF5 파일을 블록 단위로 읽는 PyTorch Dataset.
+    인덱스 하나가 연속된 block_size개 행(기본값: HDF5 청크 크기)에 해당하므로, 청크 경계에 맞춘 연속 구간만 읽습니다.
+    파일 핸들은 DataLoader 워커 프로세스마다 첫 접근 시점에 열며(fork 이후), 메인 프로세스의 핸들을 공유하지 않습니다.
+
+    원본 데이터셋('inputs_raw'/'outputs_raw')이 있으면 저장된 통계('stats/*')로 즉석에서 정규화합니다.
+    normalization: 'minmax'(export_dataset과 동일), 'standard'(평균/표준편차), None(원본 값)
+    원본이 없는 이전 형식의 파일은 이미 정규화된 'inputs'/'outputs'를 그대로 반환합니다.
+    """
+
+    def __init__(self, path: str = "meta_atom_dataset.h5", block_size: int | None = None, normalization: str | None = 'minmax', shuffle_within_block: bool = False):
+        if normalization not in ('minmax', 'standard', None):
+            raise ValueError(f"지원하지 않는 정규화 방식입니다: '{normalization}'")
+        self.path = path
+        self.shuffle_within_block = shuffle_within_block
+        self._file: h5py.File | None = None
+        self._pid: int | None = None
+
+        # 메타데이터만 읽고 바로 닫습니다. (열린 핸들이 워커로 복제되지 않도록)
+        with h5py.File(path, 'r') as f:
+            if 'inputs_raw' in f:
+                self.input_key, self.output_key = 'inputs_raw', 'outputs_raw'
+                self.normalization = normalization
+            else:
+                self.input_key, self.output_key = 'inputs', 'outputs'
+                self.normalization = None
+            inputs = f[self.input_key]
+            self.num_rows = inputs.shape[0]
+            self.input_dim = inputs.shape[1]
+            self.output_dim = f[self.output_key].shape[1]
+            chunk_rows = inputs.chunks[0] if inputs.chunks else 4096
+            self.block_size = block_size or chunk_rows
+            self.input_cols = list(f.attrs.get('input_cols', []))
+            self.output_cols = list(f.attrs.get('output_cols', []))
+            self.stats = {}
+            if 'stats' in f:
+                for name in ('inputs', 'outputs'):
+                    group = f[f'stats/{name}']
+                    count = int(group.attrs['count'])
+                    self.stats[name] = {
+                        'min': np.asarray(group.attrs['min'], dtype=np.float32),
+                        'max': np.asarray(group.attrs['max'], dtype=np.float32),
+                        'mean': np.asarray(group.attrs['mean'], dtype=np.float32),
+                        'std': np.sqrt(np.asarray(group.attrs['m2'], dtype=np.float64) / max(count, 1)).astype(np.float32),
+                    }
+        if self.normalization is not None and not self.stats:
+            raise ValueError(f"'{path}'에 정규화 통계(stats)가 없습니다. normalization=None으로 열어야 합니다.")
+
+        self._scale = {name: self._affine(name) for name in ('inputs', 'outputs')}
+
+    def _affine(self, name: str):
+        """정규화를 x * scale + offset 형태의 (scale, offset) 쌍으로 미리 계산합니다."""
+        if self.normalization is None:
+            return None
+        stats = self.stats[name]
+        if self.normalization == 'minmax':
+            span = stats['max'] - stats['min']
+            scale = np.where(span == 0, 0, 1 / np.where(span == 0, 1, span)).astype(np.float32)
+            offset = np.where(span == 0, 0.5, -stats['min'] * scale).astype(np.float32)
+        else:
+            std = np.where(stats['std'] == 0, 1, stats['std'])
+            scale = (1 / std).astype(np.float32)
+            offset = (-stats['mean'] * scale).astype(np.float32)
+        return scale, offset
+
+    def _h5(self) -> h5py.File:
+        pid = os.getpid()
+        if self._file is None or self._pid != pid:
+            self._file = h5py.File(self.path, 'r')
+            self._pid = pid
+        return self._file
+
+    def __len__(self) -> int:
+        return math.ceil(self.num_rows / self.block_size)
+
+    def _read_block(self, key: str, name: str, start: int, stop: int) -> torch.Tensor:
+        dataset = self._h5()[key]
+        block = np.empty((stop - start, dataset.shape[1]), dtype=np.float32)
+        # 중간 복사 없이 미리 할당한 버퍼로 바로 읽고, 텐서는 같은 메모리를 공유합니다.
+        dataset.read_direct(block, source_sel=np.s_[start:stop])
+        affine = self._scale[name]
+        if affine is not None:
+            scale, offset = affine
+            np.multiply(block, scale, out=block)
+            np.add(block, offset, out=block)
+        return torch.from_numpy(block)
+
+    def __getitem__(self, block_index: int) -> tuple[torch.Tensor, torch.Tensor]:
+        if block_index < 0 or block_index >= len(self):
+            raise IndexError(block_index)
+        start = block_index * self.block_size
+        stop = min(start + self.block_size, self.num_rows)
+        inputs = self._read_block(self.input_key, 'inputs', start, stop)
+        outputs = self._read_block(self.output_key, 'outputs', start, stop)
+        if self.shuffle_within_block:
+            order = torch.randperm(stop - start)
+            inputs, outputs = inputs[order], outputs[order]
+        return inputs, outputs
+
+    def denormalize_outputs(self, outputs: torch.Tensor) -> torch.Tensor:
+        """정규화된 출력(모델 예측값 등)을 원래 단위(transmission, phase)로 되돌립니다."""
+        affine = self._scale['outputs']
+        if affine is None:
+            if self.input_key == 'inputs':
+                raise ValueError("이전 형식의 HDF5 파일에는 정규화 통계가 없어 역정규화할 수 없습니다.")
+            return outputs
+        scale, offset = (torch.as_tensor(a, dtype=outputs.dtype, device=outputs.device) for a in affine)
+        safe_scale = torch.where(scale == 0, torch.ones_like(scale), scale)
+        restored = (outputs - offset) / safe_scale
+        # 모든 값이 같아 scale이 0인 열은 저장된 상수값으로 복원
+        constant = torch.as_tensor(self.stats['outputs']['min'], dtype=outputs.dtype, device=outputs.device)
+        return torch.where(scale == 0, constant.expand_as(restored), restored)
+
+    def normalize_inputs(self, inputs: np.ndarray | torch.Tensor) -> torch.Tensor:
+        """원래 단위의 입력을 학습 때와 같은 방식으로 정규화합니다."""
+        inputs = torch.as_tensor(inputs, dtype=torch.float32)
+        affine = self._scale['inputs']
+        if affine is None:
+            return inputs
+        scale, offset = (torch.as_tensor(a) for a in affine)
+        return inputs * scale + offset
+
+    def __getstate__(self):
+        # 열린 h5py 핸들은 pickle할 수 없으므로 워커로 보낼 때 제외합니다.
+        state = self.__dict__.copy()
+        state['_file'] = None
+        state['_pid'] = None
+        return state
+
+
+class ShardedBlockSampler(Sampler[int]):
+    """
+    블록 인덱스를 에폭마다 섞어(shuffled block sampling) rank별로 나눠 주는 Sampler.
+    모든 rank가 같은 seed + epoch으로 섞은 뒤 rank::world_size로 잘라 쓰므로 서로 겹치지 않습니다.
+    같은 rank 안에서는 DataLoader가 블록을 워커 프로세스들에 분배합니다.
+    """
+
+    def __init__(self, num_blocks: int, shuffle: bool = True, seed: int = 0, rank: int | None = None, world_size: int | None = None, drop_last: bool = False):
+        if world_size is None:
+            world_size = dist.get_world_size() if dist.is_available() and dist.is_initialized() else 1
+        if rank is None:
+            rank = dist.get_rank() if dist.is_available() and dist.is_initialized() else 0
+        self.num_blocks = num_blocks
+        self.shuffle = shuffle
+        self.seed = seed
+        self.rank = rank
+        self.world_size = world_size
+        self.drop_last = drop_last
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def __len__(self) -> int:
+        if self.drop_last:
+            return self.num_blocks // self.world_size
+        return math.ceil(self.num_blocks / self.world_size)
+
+    def __iter__(self):
+        if self.shuffle:
+            generator = torch.Generator()
+            generator.manual_seed(self.seed + self.epoch)
+            order = torch.randperm(self.num_blocks, generator=generator).tolist()
+        else:
+            order = list(range(self.num_blocks))
+
+        per_rank = len(self)
+        total = per_rank * self.world_size
+        if self.drop_last:
+            order = order[:total]
+        elif total > len(order):
+            # 모든 rank의 스텝 수를 맞추기 위해 앞쪽 블록을 반복해서 채웁니다.
+            order += order[:total - len(order)]
+        return iter(order[self.rank:total:self.world_size])
+
+
+def make_dataloader(path: str = "meta_atom_dataset.h5", block_size: int | None = None, num_workers: int = 4,
+                    shuffle: bool = True, seed: int = 0, rank: int | None = None, world_size: int | None = None,
+                    normalization: str | None = 'minmax', pin_memory: bool = False) -> DataLoader:
+    """
+    MetaAtomH5Dataset과 ShardedBlockSampler로 DataLoader를 구성합니다.
+    DataLoader의 한 배치는 HDF5 블록 하나이므로 batch_size=None(자동 배칭 끔)으로 사용합니다.
+    에폭마다 loader.sampler.set_epoch(epoch)를 호출하면 블록 순서가 바뀝니다.
+    """
+    dataset = MetaAtomH5Dataset(path, block_size=block_size, normalization=normalization, shuffle_within_block=shuffle)
+    sampler = ShardedBlockSampler(len(dataset), shuffle=shuffle, seed=seed, rank=rank, world_size=world_size)
+    return DataLoader(
+        dataset,
+        batch_size=None,
+        sampler=sampler,
+        num_workers=num_workers,
+        persistent_workers=num_workers > 0,
+        pin_memory=pin_memory,
+    )
@@ -0,0 +1,308 @@
+import os
+import logging
+import argparse
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from supabase import Client
+from data_access import DEFAULT_PAGE_SIZE, RESULTS_TABLE, DatasetCache, flatten_records, get_supabase_client, iter_table_pages
+from spectral_records import SPECTRA_TABLE, records_to_arrays
+
+# 검증 실패 사유 비트 (validity_flags). 0이면 is_valid = TRUE
+FLAG_NON_FINITE = 1 << 0         # 출력 또는 주파수에 NaN/inf
+FLAG_TRANSMISSION_RANGE = 1 << 1  # 0 ≤ transmission ≤ 1 위반
+FLAG_ENERGY = 1 << 2             # T + R (+ A) 에너지 보존 위반
+FLAG_PHASE_JUMP = 1 << 3         # 인접 주파수 사이의 위상 불연속
+FLAG_GEOMETRY = 1 << 4           # 형상 제약 위반 (예: radius ≥ period / 2)
+FLAG_OUTLIER = 1 << 5            # 대리 모델 잔차 기준 이상치
+FLAG_NAMES = {
+    FLAG_NON_FINITE: 'non_finite',
+    FLAG_TRANSMISSION_RANGE: 'transmission_range',
+    FLAG_ENERGY: 'energy',
+    FLAG_PHASE_JUMP: 'phase_jump',
+    FLAG_GEOMETRY: 'geometry',
+    FLAG_OUTLIER: 'outlier',
+}
+
+# 주기(period)의 절반보다 작은 양수여야 하는 반지름류 파라미터
+RADIUS_PARAMETERS = ('radius', 'r1', 'r2')
+# 펼쳐진 결과 행에서 형상 파라미터가 아닌 컬럼 (같은 형상 묶음에서 제외)
+NON_PARAMETER_COLUMNS = ('frequency', 'transmission', 'phase', 'reflection', 'absorption', 'id', 'job_id', 'created_at',
+                         'param_hash', 'is_valid', 'validity_flags', 'runtime_seconds')
+# 백필에서 조회할 컬럼 (테이블별)
+BACKFILL_COLUMNS = {
+    RESULTS_TABLE: 'id, created_at, transmission, phase, frequency, parameters, is_valid, validity_flags',
+    SPECTRA_TABLE: 'id, created_at, parameters, n_points, frequency, transmission, phase, s11_re, s11_im, is_valid, validity_flags',
+}
+# in_ 필터 하나에 넣을 id 수 (URL 길이 제한)
+UPDATE_CHUNK_SIZE = 200
+
+
+@dataclass(frozen=True)
+class ValidityRules:
+    """
+    물리적 정합성 검증 기준.
+    tolerance: transmission 범위와 에너지 보존 허용 오차, max_phase_step: 인접 주파수 간 최대 위상 변화(도, 0 이하이면 검사 안 함),
+    outlier_z: 대리 모델 잔차의 robust z-score 임계값.
+    """
+    tolerance: float = float(os.environ.get("VALIDITY_TOLERANCE", 1e-3))
+    max_phase_step: float = float(os.environ.get("VALIDITY_MAX_PHASE_STEP_DEG", 90.0))
+    outlier_z: float = float(os.environ.get("VALIDITY_OUTLIER_Z", 6.0))
+
+
+DEFAULT_RULES = ValidityRules()
+
+
+def wrap_degrees(delta: np.ndarray) -> np.ndarray:
+    """각도 차이를 [-180, 180) 범위로 접습니다."""
+    return (delta + 180.0) % 360.0 - 180.0
+
+
+def _flag(flags: np.ndarray, mask: np.ndarray, bit: int):
+    # (N,) 또는 (N, F) 마스크를 행 단위로 합쳐 해당 비트를 켭니다.
+    if mask.ndim > 1:
+        mask = mask.any(axis=tuple(range(1, mask.ndim)))
+    flags[mask] |= bit
+
+
+def _numeric(frame: pd.DataFrame, column: str) -> np.ndarray:
+    """컬럼을 float 배열로 변환합니다. (없거나 숫자가 아닌 값은 NaN)"""
+    if column not in frame.columns:
+        return np.full(len(frame), np.nan)
+    return pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=np.float64)
+
+
+def screen_outputs(transmission, phase, reflection=None, absorption=None, rules: ValidityRules = DEFAULT_RULES) -> np.ndarray:
+    """
+    출력 배열(스칼라 (N,) 또는 스펙트럼 (N, F))을 검사하여 행별 실패 사유 비트(uint8, (N,))를 반환합니다.
+    reflection/absorption이 있으면 에너지 보존도 검사하며, 값이 NaN인 행은 해당 검사를 건너뜁니다.
+    """
+    transmission = np.asarray(transmission, dtype=np.float64)
+    phase = np.asarray(phase, dtype=np.float64)
+    flags = np.zeros(len(transmission), dtype=np.uint8)
+    _flag(flags, ~np.isfinite(transmission) | ~np.isfinite(phase), FLAG_NON_FINITE)
+    _flag(flags, (transmission < -rules.tolerance) | (transmission > 1 + rules.tolerance), FLAG_TRANSMISSION_RANGE)
+    if reflection is not None:
+        total = transmission + np.asarray(reflection, dtype=np.float64)
+        violated = total > 1 + rules.tolerance  # 수동 소자: T + R ≤ 1
+        if absorption is not None:
+            total = total + np.asarray(absorption, dtype=np.float64)
+            violated |= np.abs(total - 1) > rules.tolerance  # T + R + A = 1
+        _flag(flags, violated, FLAG_ENERGY)
+    return flags
+
+
+def geometry_mask(parameters: pd.DataFrame) -> np.ndarray:
+    """형상 제약(0 < radius < period / 2, period > 0) 위반 행. period가 없는 행은 검사하지 않습니다."""
+    mask = np.zeros(len(parameters), dtype=bool)
+    if 'period' not in parameters.columns:
+        return mask
+    period = _numeric(parameters, 'period')
+    mask |= period <= 0
+    for name in RADIUS_PARAMETERS:
+        if name in parameters.columns:
+            radius = _numeric(parameters, name)
+            mask |= (radius <= 0) | (radius >= period / 2)
+    return mask
+
+
+def phase_spike_mask(frame: pd.DataFrame, rules: ValidityRules = DEFAULT_RULES) -> np.ndarray:
+    """
+    스칼라 행에서 위상 불연속을 찾습니다. 같은 형상(frequency 외 파라미터가 같은 행)을 주파수 순으로 정렬했을 때
+    앞뒤 이웃 모두와 max_phase_step 이상 차이 나는 행(고립된 스파이크)만 표시합니다. (양 끝 행은 판단하지 않음)
+    """
+    mask = np.zeros(len(frame), dtype=bool)
+    group_columns = [col for col in frame.columns if col not in NON_PARAMETER_COLUMNS]
+    if rules.max_phase_step <= 0 or not group_columns or len(frame) < 3:
+        return mask
+    group = frame[group_columns].astype(str).groupby(group_columns, sort=False).ngroup().to_numpy()
+    order = np.lexsort((_numeric(frame, 'frequency'), group))
+    step = np.abs(wrap_degrees(np.diff(_numeric(frame, 'phase')[order]))) > rules.max_phase_step
+    jump = step & (group[order][1:] == group[order][:-1])
+    spike = np.zeros(len(frame), dtype=bool)
+    spike[1:-1] = jump[:-1] & jump[1:]
+    mask[order] = spike
+    return mask
+
+
+def residual_outliers(observed: np.ndarray, predicted: np.ndarray, angle_columns: tuple[int, ...] = (), z: float = DEFAULT_RULES.outlier_z) -> np.ndarray:
+    """
+    대리 모델 잔차의 robust z-score(중앙값/MAD)가 z를 넘는 행. 각도 출력(angle_columns)의 잔차는 [-180, 180)으로 접습니다.
+    잔차 분포는 입력 묶음(청크) 안에서 추정합니다.
+    """
+    residual = np.asarray(observed, dtype=np.float64) - np.asarray(predicted, dtype=np.float64)
+    for j in angle_columns:
+        residual[:, j] = wrap_degrees(residual[:, j])
+    deviation = np.abs(residual - np.nanmedian(residual, axis=0))
+    scale = 1.4826 * np.nanmedian(deviation, axis=0)
+    score = deviation / np.where(scale > 0, scale, np.inf)
+    return (score > z).any(axis=1)
+
+
+def surrogate_outliers(predictor, frame: pd.DataFrame, rules: ValidityRules = DEFAULT_RULES) -> np.ndarray:
+    """prediction_service.PredictionService의 예측과 비교한 이상치 행. 입력/출력 컬럼이 없으면 검사하지 않습니다."""
+    mask = np.zeros(len(frame), dtype=bool)
+    features, outputs = predictor.feature_names or [], predictor.output_names or []
+    if not features or not outputs or any(col not in frame.columns for col in features + outputs):
+        return mask
+    X = np.column_stack([_numeric(frame, col) for col in features])
+    Y = np.column_stack([_numeric(frame, col) for col in outputs])
+    usable = np.isfinite(X).all(axis=1) & np.isfinite(Y).all(axis=1)
+    if usable.sum() < 3:
+        return mask
+    predicted = predictor.predict(X[usable])
+    angle_columns = tuple(j for j, name in enumerate(outputs) if name == 'phase')
+    mask[usable] = residual_outliers(Y[usable], predicted, angle_columns, rules.outlier_z)
+    return mask
+
+
+def screen_frame(frame: pd.DataFrame, rules: ValidityRules = DEFAULT_RULES, predictor=None) -> np.ndarray:
+    """parameters가 펼쳐진 meta_atom_dataset DataFrame을 검사하여 행별 실패 사유 비트를 반환합니다."""
+    reflection = _numeric(frame, 'reflection') if 'reflection' in frame.columns else None
+    absorption = _numeric(frame, 'absorption') if 'absorption' in frame.columns else None
+    flags = screen_outputs(_numeric(frame, 'transmission'), _numeric(frame, 'phase'), reflection, absorption, rules)
+    _flag(flags, ~np.isfinite(_numeric(frame, 'frequency')), FLAG_NON_FINITE)
+    _flag(flags, geometry_mask(frame), FLAG_GEOMETRY)
+    _flag(flags, phase_spike_mask(frame, rules), FLAG_PHASE_JUMP)
+    if predictor is not None:
+        _flag(flags, surrogate_outliers(predictor, frame, rules), FLAG_OUTLIER)
+    return flags
+
+
+def screen_records(records: list[dict], rules: ValidityRules = DEFAULT_RULES, predictor=None) -> np.ndarray:
+    """meta_atom_dataset 행(parameters JSON 포함) 목록을 검사합니다."""
+    if not records:
+        return np.zeros(0, dtype=np.uint8)
+    return screen_frame(flatten_records(records), rules, predictor)
+
+
+def screen_spectra(frequency: np.ndarray, transmission: np.ndarray, phase: np.ndarray, s11: np.ndarray | None = None,
+                   parameters: pd.DataFrame | None = None, rules: ValidityRules = DEFAULT_RULES) -> np.ndarray:
+    """
+    (N, F) 스펙트럼 묶음을 검사합니다. S11이 있으면 |S11|²을 반사율로 써서 에너지 보존(T + R ≤ 1)을 확인하고,
+    인접 주파수 사이의 위상 변화가 max_phase_step을 넘는 스펙트럼은 불연속으로 표시합니다.
+    """
+    reflection = np.abs(s11) ** 2 if s11 is not None else None
+    flags = screen_outputs(transmission, phase, reflection, rules=rules)
+    _flag(flags, ~np.isfinite(np.broadcast_to(frequency, np.shape(transmission))), FLAG_NON_FINITE)
+    if rules.max_phase_step > 0 and np.shape(phase)[1] > 1:
+        _flag(flags, np.abs(wrap_degrees(np.diff(np.asarray(phase, dtype=np.float64), axis=1))) > rules.max_phase_step, FLAG_PHASE_JUMP)
+    if parameters is not None:
+        _flag(flags, geometry_mask(parameters), FLAG_GEOMETRY)
+    return flags
+
+
+def screen_spectral_records(records: list[dict], rules: ValidityRules = DEFAULT_RULES) -> np.ndarray:
+    """meta_atom_spectra 행 목록을 검사합니다. 주파수 점 수(n_points)가 같은 행끼리 (N, F) 배열로 묶어 계산합니다."""
+    flags = np.zeros(len(records), dtype=np.uint8)
+    if not records:
+        return flags
+    n_points = np.array([record['n_points'] for record in records])
+    parameters = pd.DataFrame.from_records([record['parameters'] for record in records])
+    for value in np.unique(n_points):
+        index = np.flatnonzero(n_points == value)
+        arrays = records_to_arrays([records[i] for i in index])
+        s11 = arrays['s11_re'] + 1j * arrays['s11_im'] if 's11_re' in arrays and 's11_im' in arrays else None
+        flags[index] = screen_spectra(arrays['frequency'], arrays['transmission'], arrays['phase'], s11,
+                                      parameters.iloc[index].reset_index(drop=True), rules)
+    return flags
+
+
+def annotate_validity(rows: list[dict], table: str = RESULTS_TABLE, rules: ValidityRules = DEFAULT_RULES) -> int:
+    """결과 행 묶음에 is_valid와 validity_flags를 채우고 무효 행 수를 반환합니다. (ResultWriter의 flush 경로)"""
+    if table == SPECTRA_TABLE:
+        flags = screen_spectral_records(rows, rules)
+    elif table == RESULTS_TABLE:
+        flags = screen_records(rows, rules)
+    else:
+        return 0
+    for row, value in zip(rows, flags.tolist()):
+        row['is_valid'] = value == 0
+        row['validity_flags'] = value
+    return int(np.count_nonzero(flags))
+
+
+def describe_flags(flags: np.ndarray) -> dict[str, int]:
+    """실패 사유별 행 수."""
+    flags = np.asarray(flags)
+    return {name: int(np.count_nonzero(flags & bit)) for bit, name in FLAG_NAMES.items() if np.any(flags & bit)}
+
+
+def _update_chunks(client: Client, table: str, ids: list, values: dict):
+    for start in range(0, len(ids), UPDATE_CHUNK_SIZE):
+        client.table(table).update(values).in_('id', ids[start:start + UPDATE_CHUNK_SIZE]).execute()
+
+
+def backfill(client: Client, table: str = RESULTS_TABLE, page_size: int = DEFAULT_PAGE_SIZE, rules: ValidityRules = DEFAULT_RULES,
+             predictor=None, dry_run: bool = False, after: tuple | None = None, cache: DatasetCache | None = None) -> dict:
+    """
+    기존 행 전체를 (created_at, id) 키셋 페이지 단위로 다시 검사하여 is_valid와 validity_flags를 갱신합니다.
+    값이 바뀌는 행만 실패 사유 비트별로 묶어 in_ 필터의 일괄 update로 보내므로, 페이지당 요청 수는 사유 조합 수 정도입니다.
+    predictor(PredictionService)를 주면 meta_atom_dataset에서 대리 모델 잔차 이상치도 검사합니다.
+    cache(DatasetCache)를 주면 한 행이라도 갱신한 경우 끝날 때(중간에 실패해도) 그 테이블의 캐시 항목을 모두 지웁니다.
+    증분 동기화는 이미 받은 행의 is_valid 변경을 다시 받지 않기 때문입니다.
+    """
+    if table not in BACKFILL_COLUMNS:
+        raise ValueError(f"검증을 지원하지 않는 테이블입니다: {table}")
+    totals = {'rows': 0, 'invalid': 0, 'updated': 0}
+    reasons: dict[str, int] = {}
+    written = False
+    try:
+        for records in iter_table_pages(client, table, BACKFILL_COLUMNS[table], None, page_size, after=after):
+            if table == SPECTRA_TABLE:
+                flags = screen_spectral_records(records, rules)
+            else:
+                flags = screen_records(records, rules, predictor)
+            ids = np.array([record['id'] for record in records], dtype=object)
+            previous = np.array([record.get('validity_flags') or 0 for record in records], dtype=np.int64)
+            previous_valid = np.array([record.get('is_valid') is not False for record in records])
+            changed = (flags != previous) | ((flags == 0) != previous_valid)
+
+            if not dry_run:
+                for value in np.unique(flags[changed]).tolist():
+                    written = True
+                    _update_chunks(client, table, ids[changed & (flags == value)].tolist(), {'is_valid': value == 0, 'validity_flags': value})
+
+            totals['rows'] += len(records)
+            totals['invalid'] += int(np.count_nonzero(flags))
+            totals['updated'] += int(np.count_nonzero(changed))
+            for name, count in describe_flags(flags).items():
+                reasons[name] = reasons.get(name, 0) + count
+            logging.info(f"{table}: {totals['rows']}행 검사, 무효 {totals['invalid']}행, 갱신{' 예정' if dry_run else ''} {totals['updated']}행 "
+                         f"(마지막 행: {records[-1]['created_at']}, {records[-1]['id']})")
+    finally:
+        # 백필 도중 동기화된 캐시도 이후 페이지의 변경을 놓치므로, 시작 시점이 아니라 끝난 뒤에 지웁니다.
+        if written and cache is not None:
+            cache.invalidate(table)
+    return {**totals, 'reasons': reasons}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="저장된 결과의 물리적 정합성을 다시 검사하여 is_valid를 갱신합니다.")
+    parser.add_argument('--table', choices=sorted(BACKFILL_COLUMNS), default=RESULTS_TABLE, help="검사할 결과 테이블")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help="한 번에 조회할 행 수")
+    parser.add_argument('--checkpoint', default=None, help="대리 모델 체크포인트 (주면 잔차 기준 이상치도 검사)")
+    parser.add_argument('--max-phase-step', type=float, default=DEFAULT_RULES.max_phase_step, help="인접 주파수 간 최대 위상 변화 (도, 0이면 검사 안 함)")
+    parser.add_argument('--outlier-z', type=float, default=DEFAULT_RULES.outlier_z, help="잔차 robust z-score 임계값")
+    parser.add_argument('--after', default=None, help="이 행 이후부터 이어서 검사 (로그의 '마지막 행' 값: CREATED_AT,ID)")
+    parser.add_argument('--dry-run', action='store_true', help="갱신하지 않고 결과만 집계")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    rules = ValidityRules(DEFAULT_RULES.tolerance, args.max_phase_step, args.outlier_z)
+    after = tuple(args.after.rsplit(',', 1)) if args.after else None
+
+    predictor = None
+    if args.checkpoint:
+        from prediction_service import PredictionService
+        predictor = PredictionService.load(args.checkpoint)
+    try:
+        summary = backfill(get_supabase_client(), args.table, args.page_size, rules, predictor, args.dry_run, after, cache=DatasetCache())
+    finally:
+        if predictor is not None:
+            predictor.close()
+    logging.info(f"검증 완료: {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,388 @@
 
 import os
 import time
-import random
+import atexit
+import signal
 import logging
+import threading
 from multiprocessing import Pool, cpu_count
+from multiprocessing.util import Finalize
+import numpy as np
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from job_events import AdaptiveBackoff, JobNotificationListener
+from job_scheduling import RUNTIME_MODEL_PATH, RuntimeModel, job_costs, pack_batches, split_runtime
+from job_queue import DEFAULT_LEASE_SECONDS, JobQueue, LeaseHeartbeat, LeaseLostError, SupabaseJobQueue, make_worker_id
+from result_cache import DEFAULT_LOCAL_CACHE_PATH, LocalResultCache, ResultCache, parameter_hash
+from result_writer import DEFAULT_FLUSH_MAX_ATTEMPTS, ResultWriter
+from simulation_engine import SimulationEngine, SimulationResult, get_engine
+from spectral_records import SPECTRA_TABLE, frequency_grid, is_spectral_job, spectrum_row
+from worker_metrics import DEFAULT_METRICS_DIR, SamplingProfiler, SnapshotWriter, clear_snapshots, get_registry, reset_registry, start_metrics_server
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def process_job(job: dict):
+# 풀 프로세스마다 한 번만 만들어 재사용하는 전역 객체 (_init_worker에서 초기화)
+_supabase: Client | None = None
+_writer: ResultWriter | None = None
+_engine: SimulationEngine | None = None
+_cache: ResultCache | None = None
+_queue: SupabaseJobQueue | None = None
+# 체크포인트 저장에 필요한 워커 식별자와 리스 설정 (메인 프로세스의 값을 그대로 사용)
+_worker_id: str | None = None
+_lease_seconds: int = DEFAULT_LEASE_SECONDS
+_checkpoint_interval: float = 60.0
+
+
+def _init_worker(supabase_url: str, supabase_key: str, flush_rows: int, flush_ms: int, engine_name: str = 'analytic', engine_batch_size: int = 64,
+                 result_cache_path: str | None = None, metrics_dir: str = DEFAULT_METRICS_DIR, metrics_interval: float = 10.0, profile: bool = False,
+                 worker_id: str | None = None, lease_seconds: int = DEFAULT_LEASE_SECONDS, checkpoint_interval: float = 60.0,
+                 flush_max_attempts: int = DEFAULT_FLUSH_MAX_ATTEMPTS):
     """
-    단일 시뮬레이션 작업을 처리하고 결과를 데이터베이스에 저장합니다.
+    프로세스 풀 initializer. 프로세스당 Supabase 클라이언트, 결과 버퍼, 시뮬레이션 엔진, 결과 캐시를 한 번만 생성합니다.
+    클라이언트 내부의 HTTP 세션이 keep-alive 커넥션 풀을 유지하므로 작업마다 연결을 새로 맺지 않습니다.
+    result_cache_path가 없으면 로컬(SQLite) 캐시 없이 meta_atom_dataset만 조회합니다.
+    단계별 지표는 metrics_interval초마다 metrics_dir에 스냅샷으로 기록되며, profile이면 샘플링 프로파일러도 실행합니다.
+    재개 가능한 엔진(resumable)의 체크포인트는 checkpoint_interval초에 한 번씩 worker_id 이름으로 저장됩니다.
+    결과 기록이 flush_max_attempts번 연속 실패한 작업은 버퍼에서 빼고 실패로 기록합니다.
+    """
+    global _supabase, _writer, _engine, _cache, _queue, _worker_id, _lease_seconds, _checkpoint_interval
+    # fork로 복제된 메인 프로세스의 지표를 버리고 프로세스별로 새로 집계
+    reset_registry()
+    profiler = SamplingProfiler() if profile else None
+    if profiler is not None:
+        profiler.start()
+    snapshots = SnapshotWriter(metrics_dir, metrics_interval, profiler)
+    snapshots.start()
+
+    _supabase = create_client(supabase_url, supabase_key)
+    _writer = ResultWriter(_supabase, worker_id, max_rows=flush_rows, max_delay_ms=flush_ms, max_attempts=flush_max_attempts)
+    _engine = get_engine(engine_name, batch_size=engine_batch_size)
+    _cache = ResultCache(_supabase, LocalResultCache(result_cache_path) if result_cache_path else None)
+    _queue = SupabaseJobQueue(_supabase)
+    _worker_id, _lease_seconds, _checkpoint_interval = worker_id, lease_seconds, checkpoint_interval
+
+    # 정상 종료(pool.close/join) 시 남은 결과와 마지막 지표를 기록
+    Finalize(_writer, _writer.close, exitpriority=10)
+    Finalize(snapshots, snapshots.stop, exitpriority=5)
+    atexit.register(_writer.close)
+
+    # pool.terminate() 등으로 SIGTERM을 받아도 버퍼를 비우고 종료
+    def _flush_and_exit(signum, frame):
+        _writer.close()
+        snapshots.stop()
+        os._exit(0)
+    signal.signal(signal.SIGTERM, _flush_and_exit)
+
+
+def _mark_failed(job_ids: list, error_message: str, retryable: bool = True):
+    """
+    작업 실패를 한 번의 요청으로 기록합니다. 재시도 가능한 오류는 지수 백오프 후 다시 'pending'이 되고
+    (시도 횟수 초과 시 'dead_letter'), 재시도할 수 없는 오류는 'failed'가 됩니다.
     """
-    job_id = job['id']
-    parameters = job['parameters']
     process_id = os.getpid()
-    logging.info(f"[Process {process_id}] Job {job_id} 처리 시작. 파라미터: {parameters}")
+    try:
+        _queue.fail(_worker_id, job_ids, error_message, retryable=retryable)
+    except Exception as update_e:
+        logging.error(f"[Process {process_id}] Job {job_ids}의 실패 상태를 업데이트하는 중에도 오류 발생: {update_e}")
+    get_registry().inc('jobs_failed', len(job_ids))
 
-    # 환경 변수에서 Supabase 접속 정보 로드
-    # 각 자식 프로세스는 자체 Supabase 클라이언트를 생성해야 합니다.
-    supabase_url = os.environ.get("SUPABASE_URL")
-    supabase_key = os.environ.get("SUPABASE_KEY")
-    if not supabase_url or not supabase_key:
-        logging.error(f"[Process {process_id}] Supabase URL 또는 Key가 설정되지 않았습니다.")
+
+class _Checkpointer:
+    """
+    simulate_resumable에 넘기는 save_checkpoint 콜백. 호출이 잦아도 interval초에 한 번만 저장합니다.
+    리스를 잃은 것이 확인되면(다른 워커가 회수) LeaseLostError로 계산을 중단시킵니다.
+    (async_worker의 시뮬레이션 프로세스도 같은 콜백을 씁니다)
+    """
+
+    def __init__(self, queue: JobQueue, worker_id: str, job_id, lease_seconds: int, interval: float):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.job_id = job_id
+        self.lease_seconds = lease_seconds
+        self.interval = interval
+        self._last_saved = time.monotonic()
+
+    def __call__(self, progress: float, state: dict):
+        now = time.monotonic()
+        if now - self._last_saved < self.interval:
+            return
+        self._last_saved = now
+        try:
+            with get_registry().span('checkpoint'):
+                saved = self.queue.checkpoint(self.worker_id, self.job_id, progress, state, self.lease_seconds)
+        except Exception as e:
+            # 일시적인 네트워크 오류로 계산을 버리지 않도록 다음 체크포인트에서 다시 시도
+            logging.warning(f"[Process {os.getpid()}] Job {self.job_id} 체크포인트 저장 실패: {e}")
+            return
+        if not saved:
+            raise LeaseLostError(f"Job {self.job_id}의 리스를 잃었습니다.")
+
+
+def _lookup_cached(hashes: list[str]) -> dict[str, dict]:
+    """결과 캐시를 조회합니다. 조회에 실패하면 캐시 미스로 취급하여 그대로 계산합니다."""
+    if _cache is None:
+        return {}
+    try:
+        with get_registry().span('cache_lookup'):
+            return _cache.lookup(hashes)
+    except Exception as e:
+        logging.warning(f"[Process {os.getpid()}] 결과 캐시 조회 실패: {e}. 캐시 없이 계산합니다.")
+        return {}
+
+
+def process_batch(jobs: list[dict]):
+    """
+    시뮬레이션 작업 묶음을 엔진의 배치 계산 한 번으로 처리하고 결과를 write-behind 버퍼에 추가합니다.
+    같은 파라미터(param_hash)의 결과가 이미 있는 작업은 계산하지 않고 저장된 결과로 완료 처리합니다.
+    결과 기록과 'completed' 상태 갱신은 ResultWriter가 일괄로 처리합니다.
+    """
+    process_id = os.getpid()
+    if _supabase is None or _writer is None or _engine is None:
+        logging.error(f"[Process {process_id}] 워커 프로세스가 초기화되지 않았습니다. (_init_worker 누락)")
         return
 
-    supabase: Client = create_client(supabase_url, supabase_key)
+    metrics = get_registry()
+    with metrics.span('batch'):
+        _process_batch(jobs, process_id, metrics)
+
+
+def _process_batch(jobs: list[dict], process_id: int, metrics):
+    # 1. 파라미터 JSON을 엔진 입력 배열로 변환 (변환할 수 없는 작업은 개별적으로 실패 처리)
+    #    frequency_sweep이 있는 작업은 주파수 격자별로 묶어 스펙트럼 단위로 계산합니다.
+    valid_jobs, rows, hashes = [], [], []
+    sweeps: dict[bytes, tuple[np.ndarray, list]] = {}
+    for job in jobs:
+        try:
+            row = _engine.params_to_array(job['parameters'])
+            param_hash = job.get('param_hash') or parameter_hash(job['parameters'])
+            if is_spectral_job(job['parameters']):
+                grid = frequency_grid(job['parameters'])
+                sweeps.setdefault(grid.tobytes(), (grid, []))[1].append((job, row, param_hash))
+                continue
+            rows.append(row)
+            hashes.append(param_hash)
+            valid_jobs.append(job)
+        except (KeyError, TypeError, ValueError) as e:
+            logging.error(f"[Process {process_id}] Job {job['id']}의 파라미터를 해석할 수 없습니다: {e}")
+            _mark_failed([job['id']], f"invalid parameters: {e}", retryable=False)
+    for grid, group in sweeps.values():
+        _process_spectra(grid, group, process_id, metrics)
+    if not valid_jobs:
+        return
+
+    # 2. 결과 캐시 적중 작업은 저장된 결과를 그대로 사용 (upsert가 중복 행을 무시하므로 결과 행은 항상 존재)
+    cached = _lookup_cached(hashes)
+    if cached:
+        misses = []
+        for i, job in enumerate(valid_jobs):
+            hit = cached.get(hashes[i])
+            if hit is None:
+                misses.append(i)
+                continue
+            _writer.add(job['id'], {
+                "job_id": job['id'],
+                "transmission": hit['transmission'],
+                "phase": hit['phase'],
+                "frequency": hit['frequency'],
+                "parameters": job['parameters'],
+                "param_hash": hashes[i]
+            })
+        logging.info(f"[Process {process_id}] 결과 캐시 적중 {len(valid_jobs) - len(misses)}개, 계산 필요 {len(misses)}개.")
+        metrics.inc('jobs_cache_hit', len(valid_jobs) - len(misses))
+        valid_jobs = [valid_jobs[i] for i in misses]
+        rows = [rows[i] for i in misses]
+        hashes = [hashes[i] for i in misses]
+        if not valid_jobs:
+            return
+
+    # 장시간 솔버는 작업마다 체크포인트를 남기며 개별로 계산 (이전 시도의 체크포인트가 있으면 이어서 계산)
+    if _engine.resumable:
+        for job, row, param_hash in zip(valid_jobs, rows, hashes):
+            _process_resumable(job, row, param_hash, process_id, metrics)
+        return
+
+    job_ids = [job['id'] for job in valid_jobs]
+    logging.info(f"[Process {process_id}] {len(valid_jobs)}개 작업 배치의 물리 응답 계산 중...")
 
     try:
-        # 가상 물리 계산 симуляция
-        # 실제 계산 로직으로 대체해야 할 부분입니다.
-        logging.info(f"[Process {process_id}] Job {job_id}의 물리 응답 계산 중...")
-        time.sleep(random.uniform(1, 4))  # 계산에 시간이 걸리는 것을 시뮬레이션
-
-        # 예시: 파라미터(frequency)에 기반한 가상 결과 생성
-        frequency = parameters.get('frequency', 1.0)
-        transmission = random.uniform(0.1, 0.99) * (1 / (1 + (frequency/10)**2)) # 주파수에 따른 가상 감쇠
-        phase = random.uniform(-180, 180) * (1 - frequency/20) # 주파수에 따른 가상 위상 변이
-
-        logging.info(f"[Process {process_id}] Job {job_id} 계산 완료. 결과: Transmission={transmission:.4f}, Phase={phase:.4f}")
-
-        # 1. 계산 결과를 meta_atom_dataset 테이블에 삽입
-        result_data = {
-            "job_id": job_id,
-            "transmission": transmission,
-            "phase": phase,
-            "frequency": frequency,
-            "parameters": parameters
-        }
-        supabase.table("meta_atom_dataset").insert(result_data).execute()
-        logging.info(f"[Process {process_id}] Job {job_id}의 결과를 meta_atom_dataset에 저장했습니다.")
-
-        # 2. 원래 작업의 상태를 'completed'로 업데이트
-        supabase.table("simulation_jobs").update({"status": "completed", "progress": 100}).eq("id", job_id).execute()
-        logging.info(f"[Process {process_id}] Job {job_id}의 상태를 'completed'로 업데이트했습니다.")
+        # 3. 배치 단위 물리 계산 (스칼라 호출 N번 대신 배열 호출 1번)
+        started = time.perf_counter()
+        with metrics.span('simulate'):
+            result = _engine.simulate_batch(np.vstack(rows))
+        runtimes = split_runtime(time.perf_counter() - started, job_costs(valid_jobs))
+        metrics.inc('jobs_simulated', len(result))
+        logging.info(f"[Process {process_id}] {len(result)}개 작업 배치 계산 완료.")
+
+        # 4. 계산 결과를 버퍼에 추가 (meta_atom_dataset upsert + 'completed' 업데이트는 일괄 처리)
+        #    로컬 결과 캐시도 배치 전체를 한 번의 트랜잭션으로 기록합니다.
+        computed = {}
+        for i, job in enumerate(valid_jobs):
+            computed[hashes[i]] = _add_result(job, result, i, hashes[i], runtimes[i])
+        _store_cached(computed)
 
     except Exception as e:
-        logging.error(f"[Process {process_id}] Job {job_id} 처리 중 오류 발생: {e}")
-        # 오류 발생 시 작업 상태를 'failed'로 업데이트
-        try:
-            supabase.table("simulation_jobs").update({
-                "status": "failed",
-                "error_message": str(e)
-            }).eq("id", job_id).execute()
-        except Exception as update_e:
-            logging.error(f"[Process {process_id}] Job {job_id}의 상태를 'failed'로 업데이트하는 중에도 오류 발생: {update_e}")
+        logging.error(f"[Process {process_id}] Job {job_ids} 배치 처리 중 오류 발생: {e}")
+        # 오류 발생 시 배치의 작업을 재시도 대기(횟수 초과 시 dead_letter)로 전환
+        _mark_failed(job_ids, str(e))
+
+
+def _add_result(job: dict, result: SimulationResult, i: int, param_hash: str, runtime: float) -> dict:
+    """
+    계산 결과 i번째 행을 결과 버퍼에 추가하고, 로컬 결과 캐시에 기록할 값을 반환합니다. runtime은 이 작업의 계산 시간(초)입니다.
+    (캐시 기록은 호출자가 배치 단위로 모아 _store_cached로 한 번에 합니다.)
+    """
+    dataset_row = {
+        "job_id": job['id'],
+        "transmission": float(result.transmission[i]),
+        "phase": float(result.phase[i]),
+        "frequency": float(result.frequency[i]),
+        "parameters": job['parameters'],
+        "param_hash": param_hash,
+        "runtime_seconds": float(runtime)
+    }
+    _writer.add(job['id'], dataset_row)
+    return {key: dataset_row[key] for key in ("transmission", "phase", "frequency")}
+
+
+def _store_cached(results: dict[str, dict]):
+    """새로 계산한 결과를 로컬 결과 캐시에 한 번에 기록합니다. (put_many 한 번, commit 한 번)"""
+    if _cache is not None and results:
+        _cache.store(results)
+
+
+def _process_spectra(frequencies: np.ndarray, group: list[tuple[dict, np.ndarray, str]], process_id: int, metrics):
+    """같은 주파수 격자를 쓰는 스펙트럼 작업들을 한 번에 계산하여 meta_atom_spectra 행으로 버퍼에 추가합니다."""
+    job_ids = [job['id'] for job, _, _ in group]
+    logging.info(f"[Process {process_id}] {len(group)}개 형상의 스펙트럼({len(frequencies)}개 주파수) 계산 중...")
+    try:
+        started = time.perf_counter()
+        with metrics.span('simulate'):
+            result = _engine.simulate_spectrum(np.vstack([row for _, row, _ in group]), frequencies)
+        runtimes = split_runtime(time.perf_counter() - started, job_costs([job for job, _, _ in group]))
+        metrics.inc('jobs_simulated', len(group))
+        for i, (job, _, param_hash) in enumerate(group):
+            _writer.add(job['id'], {**spectrum_row(job, param_hash, result, i), "runtime_seconds": float(runtimes[i])}, table=SPECTRA_TABLE)
+    except Exception as e:
+        logging.error(f"[Process {process_id}] Job {job_ids} 스펙트럼 계산 중 오류 발생: {e}")
+        _mark_failed(job_ids, str(e))
+
+
+def _process_resumable(job: dict, row: np.ndarray, param_hash: str, process_id: int, metrics):
+    """재개 가능한 엔진으로 작업 하나를 계산합니다. 리스를 잃으면 결과를 버리고 중단합니다."""
+    if job.get('checkpoint'):
+        logging.info(f"[Process {process_id}] Job {job['id']}을(를) 체크포인트(진행률 {job.get('progress', 0)}%)에서 이어서 계산합니다.")
+    try:
+        started = time.perf_counter()
+        with metrics.span('simulate'):
+            result = _engine.simulate_resumable(row, job.get('checkpoint'), _Checkpointer(_queue, _worker_id, job['id'], _lease_seconds, _checkpoint_interval))
+        runtime = time.perf_counter() - started
+    except LeaseLostError as e:
+        logging.warning(f"[Process {process_id}] {e} 다른 워커가 이어서 계산하므로 중단합니다.")
+        metrics.inc('jobs_lease_lost')
+        return
+    except Exception as e:
+        logging.error(f"[Process {process_id}] Job {job['id']} 처리 중 오류 발생: {e}")
+        _mark_failed([job['id']], str(e))
+        return
+    metrics.inc('jobs_simulated')
+    _store_cached({param_hash: _add_result(job, result, 0, param_hash, runtime)})
+
+
+def process_job(job: dict):
+    """단일 시뮬레이션 작업을 처리합니다. (크기 1의 배치)"""
+    process_batch([job])
+
+
+class JobDispatcher:
+    """
+    장기 실행(long-lived) 프로세스 풀에 작업 배치를 스트리밍 방식으로 공급합니다.
+    슬롯이 하나라도 비면 즉시 새 배치를 투입하므로, 작업 시간 편차가 커도 코어가 쉬지 않습니다.
+    슬롯 하나는 배치 하나에 해당합니다.
+    """
+
+    def __init__(self, num_processes: int, prefetch_depth: int, initializer=None, initargs: tuple = ()):
+        self.num_processes = num_processes
+        # 실행 중인 배치 + 대기열에 미리 올려둘 배치 수
+        self.capacity = num_processes + prefetch_depth
+        self.pool = Pool(processes=num_processes, initializer=initializer, initargs=initargs)
+        self._in_flight: dict[int, list] = {}
+        self._next_batch_id = 0
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Event()
+
+    @property
+    def free_slots(self) -> int:
+        with self._lock:
+            return self.capacity - len(self._in_flight)
+
+    @property
+    def in_flight_count(self) -> int:
+        with self._lock:
+            return len(self._in_flight)
+
+    def in_flight_ids(self) -> list:
+        with self._lock:
+            return [job_id for job_ids in self._in_flight.values() for job_id in job_ids]
+
+    def submit(self, jobs: list[dict]):
+        """작업 배치 하나를 풀에 투입합니다. 완료되면 슬롯이 반환됩니다."""
+        with self._lock:
+            batch_id = self._next_batch_id
+            self._next_batch_id += 1
+            self._in_flight[batch_id] = [job['id'] for job in jobs]
+        self.pool.apply_async(
+            process_batch,
+            (jobs,),
+            callback=lambda _: self._release(batch_id),
+            error_callback=lambda e: self._release(batch_id, e),
+        )
+
+    def _release(self, batch_id: int, error: BaseException | None = None):
+        with self._lock:
+            job_ids = self._in_flight.pop(batch_id, [])
+        if error is not None:
+            logging.error(f"Job {job_ids} 배치 실행 중 처리되지 않은 오류 발생: {error}")
+        self._slot_freed.set()
+
+    def wake(self):
+        """wait_for_slot으로 대기 중인 메인 루프를 깨웁니다. (새 작업 알림 등)"""
+        self._slot_freed.set()
+
+    def wait_for_slot(self, timeout: float) -> bool:
+        """슬롯이 반환되거나 wake()가 호출될 때까지 최대 timeout 초 동안 대기합니다."""
+        freed = self._slot_freed.wait(timeout)
+        self._slot_freed.clear()
+        return freed
+
+    def shutdown(self):
+        """새 작업 투입을 멈추고 실행 중인 작업이 끝날 때까지 기다립니다."""
+        self.pool.close()
+        self.pool.join()
+
+
+def _get_int_env(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logging.warning(f"환경 변수 {name}의 값 '{value}'가 정수가 아닙니다. 기본값 {default}을(를) 사용합니다.")
+        return default
 
 
 def main():
     """
-    메인 워커 함수. 'pending' 상태의 작업을 가져와 병렬로 처리합니다.
+    메인 워커 함수. 'pending' 상태의 작업을 가져와 장기 실행 프로세스 풀에서 병렬로 처리합니다.
     """
     load_dotenv()
+    if os.environ.get("WORKER_MODE", "pool") == "async":
+        # asyncio 워커 모드 (DB 왕복과 계산을 겹쳐 실행)
+        from async_worker import main as async_main
+        async_main()
+        return
+
     supabase_url = os.environ.get("SUPABASE_URL")
     supabase_key = os.environ.get("SUPABASE_KEY")
 
@@ -81,38 +390,109 @@ def main():
         logging.error("Supabase URL 또는 Key가 .env 파일에 설정되지 않았습니다. 스크립트를 종료합니다.")
         return
 
+    # --- 워커 설정 ---
+    NUM_PROCESSES = max(1, _get_int_env("WORKER_PROCESSES", cpu_count()))
+    PREFETCH_DEPTH = max(0, _get_int_env("WORKER_PREFETCH", NUM_PROCESSES))
+    IDLE_MAX_INTERVAL = max(1, _get_int_env("WORKER_IDLE_MAX_INTERVAL", 15))  # 큐가 비었을 때 폴링 간격 상한 (초, 0.5초부터 2배씩 증가)
+    DB_URL = os.environ.get("SUPABASE_DB_URL")  # 설정하면 LISTEN/NOTIFY로 새 작업을 즉시 감지
+    LEASE_SECONDS = _get_int_env("WORKER_LEASE_SECONDS", DEFAULT_LEASE_SECONDS)
+    REAP_INTERVAL = 60  # 만료된 리스 회수 주기 (초)
+    FLUSH_ROWS = max(1, _get_int_env("WORKER_FLUSH_ROWS", 50))    # 결과 일괄 기록 행 수
+    FLUSH_MS = max(1, _get_int_env("WORKER_FLUSH_MS", 500))       # 결과 일괄 기록 최대 지연 (ms)
+    FLUSH_MAX_ATTEMPTS = max(1, _get_int_env("WORKER_FLUSH_MAX_ATTEMPTS", DEFAULT_FLUSH_MAX_ATTEMPTS))  # 결과 기록 재시도 횟수 상한
+    ENGINE_NAME = os.environ.get("SIMULATION_ENGINE", "analytic")
+    ENGINE_BATCH_SIZE = max(1, _get_int_env("ENGINE_BATCH_SIZE", 64))  # 엔진 배치 하나의 작업 수
+    RESULT_CACHE_PATH = os.environ.get("WORKER_RESULT_CACHE", DEFAULT_LOCAL_CACHE_PATH) or None  # 빈 값이면 로컬 결과 캐시 사용 안 함
+    CHECKPOINT_INTERVAL = max(1, _get_int_env("WORKER_CHECKPOINT_INTERVAL", 60))  # 재개 가능한 엔진의 체크포인트 저장 주기 (초)
+    METRICS_PORT = _get_int_env("WORKER_METRICS_PORT", 0)           # 지표 HTTP 포트 (0이면 스냅샷 파일만 기록)
+    METRICS_INTERVAL = max(1, _get_int_env("WORKER_METRICS_INTERVAL", 10))  # 지표 스냅샷 주기 (초)
+    PROFILE = _get_int_env("WORKER_PROFILE", 0) > 0                # 샘플링 프로파일러 사용 여부
+    # ---------------------
+
+    clear_snapshots(DEFAULT_METRICS_DIR)
+    metrics = get_registry()
+    profiler = SamplingProfiler() if PROFILE else None
+    if profiler is not None:
+        profiler.start()
+    snapshots = SnapshotWriter(DEFAULT_METRICS_DIR, METRICS_INTERVAL, profiler)
+    snapshots.start()
+    metrics_server = start_metrics_server(METRICS_PORT) if METRICS_PORT > 0 else None
+
     supabase: Client = create_client(supabase_url, supabase_key)
-    logging.info("워커 시작. 'pending' 상태의 시뮬레이션 작업을 확인합니다...")
+    queue = SupabaseJobQueue(supabase)
+    worker_id = make_worker_id()
+    dispatcher = JobDispatcher(
+        NUM_PROCESSES,
+        PREFETCH_DEPTH,
+        initializer=_init_worker,
+        initargs=(supabase_url, supabase_key, FLUSH_ROWS, FLUSH_MS, ENGINE_NAME, ENGINE_BATCH_SIZE, RESULT_CACHE_PATH,
+                  DEFAULT_METRICS_DIR, METRICS_INTERVAL, PROFILE, worker_id, LEASE_SECONDS, CHECKPOINT_INTERVAL, FLUSH_MAX_ATTEMPTS),
+    )
+    # estimated_cost가 없는 작업(모델 학습 전에 만든 작업 등)의 비용 추정용 (python job_scheduling.py로 학습)
+    runtime_model = RuntimeModel.load(RUNTIME_MODEL_PATH)
+    heartbeat = LeaseHeartbeat(queue, worker_id, dispatcher.in_flight_ids, LEASE_SECONDS)
+    heartbeat.start()
+    listener = None
+    if DB_URL:
+        listener = JobNotificationListener(DB_URL, on_notify=dispatcher.wake)
+        listener.start()
+    # 알림을 받는 동안에는 폴링이 안전장치 역할만 하므로 간격을 더 길게 둡니다.
+    backoff = AdaptiveBackoff(max_interval=IDLE_MAX_INTERVAL * 4 if listener else IDLE_MAX_INTERVAL)
+    logging.info(f"워커 {worker_id} 시작 (프로세스 {NUM_PROCESSES}개, prefetch {PREFETCH_DEPTH}개). 'pending' 상태의 시뮬레이션 작업을 확인합니다...")
 
-    while True:
-        try:
-            # 'pending' 상태인 작업들을 가져옵니다.
-            response = supabase.table("simulation_jobs").select("id, parameters").eq("status", "pending").execute()
-            pending_jobs = response.data
+    last_reap = 0.0
+    try:
+        while True:
+            try:
+                if time.monotonic() - last_reap >= REAP_INTERVAL:
+                    with metrics.span('reap'):
+                        reaped = queue.reap_expired()
+                    if reaped:
+                        logging.info(f"리스가 만료된 작업 {reaped}개를 재시도 대기(시도 횟수 초과 시 dead_letter)로 전환했습니다.")
+                    last_reap = time.monotonic()
 
-            if not pending_jobs:
-                logging.info("'pending' 상태의 작업이 없습니다. 5초 후 다시 확인합니다.")
-                time.sleep(5)
-                continue
+                free_slots = dispatcher.free_slots
+                metrics.set_gauge('free_slots', free_slots)
+                metrics.set_gauge('in_flight_batches', dispatcher.in_flight_count)
+                if free_slots <= 0:
+                    # 모든 슬롯이 차 있으면 하나가 반환될 때까지 대기
+                    dispatcher.wait_for_slot(REAP_INTERVAL)
+                    continue
 
-            logging.info(f"{len(pending_jobs)}개의 'pending' 작업을 찾았습니다. 병렬 처리를 시작합니다.")
+                # 비어 있는 슬롯(배치) 수만큼만 'pending' 작업을 원자적으로 점유합니다. (리스 기반, 중복 점유 없음)
+                with metrics.span('claim'):
+                    pending_jobs = queue.claim(worker_id, free_slots * ENGINE_BATCH_SIZE, LEASE_SECONDS)
+                metrics.inc('jobs_claimed', len(pending_jobs))
 
-            # 찾은 작업을 'running' 상태로 변경하여 다른 워커가 중복으로 가져가지 않도록 합니다.
-            job_ids_to_run = [job['id'] for job in pending_jobs]
-            supabase.table("simulation_jobs").update({"status": "running"}).in_("id", job_ids_to_run).execute()
-            
-            # 멀티프로세싱 풀을 사용하여 병렬로 작업 처리
-            # 사용할 CPU 코어 수를 조절할 수 있습니다. (예: cpu_count() - 1)
-            num_processes = min(len(pending_jobs), cpu_count())
-            with Pool(processes=num_processes) as pool:
-                pool.map(process_job, pending_jobs)
+                if not pending_jobs:
+                    delay = backoff.next_delay()
+                    if dispatcher.in_flight_count == 0:
+                        logging.debug(f"'pending' 상태의 작업이 없습니다. 최대 {delay:.1f}초 후 다시 확인합니다.")
+                    # 실행 중인 작업이 끝나거나, 새 작업 알림이 오거나, 폴링 간격이 지나면 다시 확인
+                    dispatcher.wait_for_slot(delay)
+                    continue
 
-            logging.info("모든 작업 처리가 완료되었습니다. 다음 사이클을 시작합니다.")
-            time.sleep(2) # 다음 루프 전에 잠시 대기
+                backoff.reset()
+                logging.info(f"{len(pending_jobs)}개의 작업을 점유했습니다. 풀에 투입합니다.")
 
-        except Exception as e:
-            logging.error(f"메인 루프에서 오류 발생: {e}")
-            time.sleep(10) # 오류 발생 시 잠시 대기 후 재시도
+                # 점유한 작업을 예상 비용 기준 LPT로 빈 슬롯 수만큼의 배치(최대 엔진 배치 크기)에 나눠, 긴 배치부터 투입
+                for batch in pack_batches(pending_jobs, free_slots, ENGINE_BATCH_SIZE, job_costs(pending_jobs, runtime_model)):
+                    dispatcher.submit(batch)
+
+            except Exception as e:
+                logging.error(f"메인 루프에서 오류 발생: {e}")
+                metrics.inc('main_loop_errors')
+                time.sleep(10) # 오류 발생 시 잠시 대기 후 재시도
+    except KeyboardInterrupt:
+        logging.info("종료 신호를 받았습니다. 실행 중인 작업이 끝날 때까지 기다립니다...")
+    finally:
+        dispatcher.shutdown()
+        heartbeat.stop()
+        if listener is not None:
+            listener.stop()
+        snapshots.stop()
+        if metrics_server is not None:
+            metrics_server.shutdown()
 
 if __name__ == "__main__":
     main()
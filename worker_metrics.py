@@ -0,0 +1,266 @@
+import os
+import sys
+import json
+import time
+import glob
+import bisect
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 단계별 소요 시간 히스토그램 버킷 상한 (초, Prometheus 기본 버킷과 유사)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_METRICS_DIR = os.environ.get("WORKER_METRICS_DIR", ".cache/worker_metrics")
+
+
+class Histogram:
+    """고정 버킷 히스토그램 (누적 전 버킷별 개수 + 합계 + 개수)."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self) -> dict:
+        return {'buckets': list(self.buckets), 'counts': list(self.counts), 'sum': self.sum, 'count': self.count}
+
+
+class MetricsRegistry:
+    """
+    프로세스 하나의 지표 저장소. 단계별 소요 시간(span) 히스토그램, 카운터, 게이지를 보관합니다.
+    기록은 잠금 한 번 + 정수 연산뿐이므로 작업 처리 경로에 넣어도 부담이 없습니다.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: Counter = Counter()
+        self.gauges: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, stage: str):
+        """with 블록의 소요 시간을 stage 히스토그램에 기록합니다. (예외가 나도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def inc(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] += value
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self.gauges[name] = value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            uptime = time.time() - self.started_at
+            return {
+                'pid': os.getpid(),
+                'started_at': self.started_at,
+                'uptime': uptime,
+                'histograms': {stage: histogram.to_dict() for stage, histogram in self.histograms.items()},
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'rates': {name: value / uptime for name, value in self.counters.items()} if uptime > 0 else {},
+            }
+
+
+# 프로세스마다 하나씩 쓰는 전역 저장소 (fork된 풀 프로세스는 reset_registry로 새로 만듭니다)
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def reset_registry() -> MetricsRegistry:
+    global _registry
+    _registry = MetricsRegistry()
+    return _registry
+
+
+class SamplingProfiler(threading.Thread):
+    """
+    sys._current_frames()로 다른 스레드의 호출 스택을 interval초마다 표본 추출하는 저부하 프로파일러.
+    가장 자주 관측된 함수(self)와 스택(collapsed, flamegraph 입력 형식)을 스냅샷에 포함합니다.
+    """
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 30):
+        super().__init__(name="sampling-profiler", daemon=True)
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self.functions: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, frame in frames.items():
+                    if thread_id == own_id:
+                        continue
+                    stack = []
+                    while frame is not None and len(stack) < self.max_depth:
+                        code = frame.f_code
+                        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                        frame = frame.f_back
+                    if not stack:
+                        continue
+                    self.functions[stack[0]] += 1
+                    self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def top(self, n: int = 20) -> dict:
+        with self._lock:
+            return {
+                'samples': self.samples,
+                'interval': self.interval,
+                'functions': self.functions.most_common(n),
+                'stacks': self.stacks.most_common(n),
+            }
+
+    def stop(self):
+        self._stopped.set()
+
+
+class SnapshotWriter(threading.Thread):
+    """프로세스의 지표 스냅샷을 interval초마다 metrics-<pid>.json 파일로 기록합니다. (메인 프로세스가 합쳐서 노출)"""
+
+    def __init__(self, directory: str = DEFAULT_METRICS_DIR, interval: float = 10.0, profiler: SamplingProfiler | None = None):
+        super().__init__(name="metrics-snapshot", daemon=True)
+        self.directory = directory
+        self.interval = interval
+        self.profiler = profiler
+        self._stopped = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self):
+        snapshot = get_registry().snapshot()
+        if self.profiler is not None:
+            snapshot['profile'] = self.profiler.top()
+        path = os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                logging.warning(f"지표 스냅샷 기록 실패: {e}")
+
+    def stop(self):
+        self._stopped.set()
+        try:
+            self.write()
+        except OSError:
+            pass
+
+
+def clear_snapshots(directory: str = DEFAULT_METRICS_DIR):
+    """이전 실행에서 남은 스냅샷 파일을 삭제합니다."""
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+        os.remove(path)
+
+
+def collect_snapshots(directory: str = DEFAULT_METRICS_DIR) -> list[dict]:
+    """현재 프로세스의 지표와 다른 프로세스들이 기록한 스냅샷 파일을 모읍니다."""
+    own = get_registry().snapshot()
+    snapshots = [own]
+    for path in sorted(glob.glob(os.path.join(directory, 'metrics-*.json'))):
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if snapshot['pid'] != own['pid']:
+            snapshots.append(snapshot)
+    return snapshots
+
+
+def render_prometheus(snapshots: list[dict]) -> str:
+    """스냅샷 목록을 Prometheus 텍스트 형식으로 변환합니다. (pid 레이블로 프로세스 구분)"""
+    lines = [
+        '# HELP worker_stage_seconds 워커 단계별 소요 시간',
+        '# TYPE worker_stage_seconds histogram',
+    ]
+    for snapshot in snapshots:
+        pid = snapshot['pid']
+        for stage, histogram in sorted(snapshot['histograms'].items()):
+            labels = f'pid="{pid}",stage="{stage}"'
+            cumulative = 0
+            for bound, count in zip(histogram['buckets'], histogram['counts']):
+                cumulative += count
+                lines.append(f'worker_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'worker_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+            lines.append(f'worker_stage_seconds_sum{{{labels}}} {histogram["sum"]}')
+            lines.append(f'worker_stage_seconds_count{{{labels}}} {histogram["count"]}')
+
+    lines += ['# HELP worker_events_total 워커 이벤트 누적 횟수', '# TYPE worker_events_total counter']
+    for snapshot in snapshots:
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f'worker_events_total{{pid="{snapshot["pid"]}",event="{name}"}} {value}')
+
+    lines += ['# HELP worker_gauge 워커 상태 값', '# TYPE worker_gauge gauge']
+    for snapshot in snapshots:
+        for name, value in sorted(snapshot['gauges'].items()):
+            lines.append(f'worker_gauge{{pid="{snapshot["pid"]}",name="{name}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """GET /metrics → Prometheus 텍스트, GET /metrics.json → 프로세스별 JSON 스냅샷"""
+
+    directory: str
+
+    def do_GET(self):
+        snapshots = collect_snapshots(self.directory)
+        if self.path == '/metrics':
+            body, content_type = render_prometheus(snapshots).encode(), 'text/plain; version=0.0.4'
+        elif self.path == '/metrics.json':
+            body, content_type = json.dumps(snapshots).encode(), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} - {format % args}")
+
+
+def start_metrics_server(port: int, directory: str = DEFAULT_METRICS_DIR, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """지표 엔드포인트를 백그라운드 스레드에서 실행합니다."""
+    handler = type('MetricsHandler', (_MetricsHandler,), {'directory': directory})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logging.info(f"워커 지표를 http://{host}:{port}/metrics (Prometheus), /metrics.json 에서 제공합니다.")
+    return server